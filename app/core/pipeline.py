@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+
+# Work item travelling between stages: the caller's future and the current payload
+Job = Tuple[Future, Any]
+
+
+class Stage:
+    """
+    Stage is a single step of a Pipeline, executed by a fixed number of threads.
+
+    Attributes:
+        name (str): The name of the stage, used for thread names and logging.
+        handler (Callable[[Any], Any]): Transforms the payload and returns it for the next stage.
+        concurrency (int): The number of payloads this stage may process at the same time.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, name: str, handler: Callable[[Any], Any], concurrency: int = 1):
+        """
+        Initializes the Stage.
+
+        Args:
+            name (str): The name of the stage.
+            handler (Callable[[Any], Any]): The function applied to each payload.
+            concurrency (int): The number of worker threads for this stage (minimum 1).
+        """
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+
+
+class Pipeline:
+    """
+    Pipeline chains stages through bounded queues, so that consecutive payloads
+    overlap: while one payload is in a slow stage, the next ones already progress
+    through the earlier stages. Under sustained load the throughput is limited by
+    the slowest stage rather than by the sum of all stages.
+
+    A full queue blocks the previous stage, which keeps memory bounded and applies
+    backpressure up to `submit`.
+
+    Attributes:
+        stages (List[Stage]): The stages, in execution order.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, stages: List[Stage], capacity: int = 8):
+        """
+        Initializes the queues and starts the worker threads of every stage.
+
+        Args:
+            stages (List[Stage]): The stages, in execution order.
+            capacity (int): The maximum number of payloads waiting in front of each stage.
+        """
+        self.stages = stages
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=max(1, capacity)) for _ in stages]
+        self._threads: List[threading.Thread] = []
+
+        for index, stage in enumerate(stages):
+            for worker in range(stage.concurrency):
+                thread = threading.Thread(target=self._run, args=(index,), name=f"{stage.name}_{worker}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    # ----------------------------------------------------------------------
+    def submit(self, payload: Any) -> Future:
+        """
+        Queues a payload at the first stage.
+
+        Args:
+            payload (Any): The payload handed to the first stage.
+
+        Returns:
+            Future: Resolved with the output of the last stage, or with the exception
+            raised by the first failing stage.
+        """
+        future = Future()
+        self._queues[0].put((future, payload))
+        return future
+
+    # ----------------------------------------------------------------------
+    def shutdown(self):
+        """
+        Stops the worker threads once the payloads already queued are processed.
+        """
+        for index, stage in enumerate(self.stages):
+            for _ in range(stage.concurrency):
+                self._queues[index].put(None)
+
+    # ----------------------------------------------------------------------
+    def _run(self, index: int):
+        stage = self.stages[index]
+        source = self._queues[index]
+        target: Optional[queue.Queue] = self._queues[index + 1] if index + 1 < len(self._queues) else None
+
+        while True:
+            job: Optional[Job] = source.get()
+            if job is None:
+                break
+
+            future, payload = job
+            # A payload can only be cancelled before it enters the first stage
+            if index == 0 and not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = stage.handler(payload)
+            except Exception as e:
+                logging.debug(f"[{stage.name}] Stage failed: {e}")
+                future.set_exception(e)
+                continue
+
+            if target is not None:
+                target.put((future, result))
+            else:
+                future.set_result(result)
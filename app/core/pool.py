@@ -0,0 +1,115 @@
+import itertools
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from core.remote import Remote
+
+
+class ConnectionPool:
+    """
+    ConnectionPool keeps up to `size` Remote connections to a single Openfabric
+    application and spreads requests across them.
+
+    Connections are opened lazily: a new one is only created when every open
+    connection is busy and the pool is not full yet. A connection that lost its
+    socket is dropped and reopened the next time it is selected.
+
+    Attributes:
+        proxy_url (str): The URL of the application proxy.
+        proxy_tag (str): The tag prefix of the proxy instances.
+        size (int): The maximum number of connections.
+    """
+
+    # ----------------------------------------------------------------------
+    def __init__(self, proxy_url: str, proxy_tag: str, size: int = 2):
+        """
+        Initializes an empty pool.
+
+        Args:
+            proxy_url (str): The URL of the application proxy.
+            proxy_tag (str): The tag prefix of the proxy instances.
+            size (int): The maximum number of connections (minimum 1).
+        """
+        self.proxy_url = proxy_url
+        self.proxy_tag = proxy_tag
+        self.size = max(1, size)
+        self._connections: List[Remote] = []
+        self._in_flight: List[int] = []
+        self._connecting: List[threading.Lock] = []
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------------------
+    def warm_up(self) -> 'ConnectionPool':
+        """
+        Opens the first connection, so that the first request does not pay for it.
+
+        Returns:
+            ConnectionPool: The current instance for chaining.
+        """
+        with self.acquire():
+            pass
+        return self
+
+    # ----------------------------------------------------------------------
+    @contextmanager
+    def acquire(self) -> Iterator[Remote]:
+        """
+        Borrows the least busy healthy connection for the duration of a request.
+        Ties are broken round-robin.
+
+        Yields:
+            Remote: A connected Remote instance.
+        """
+        with self._lock:
+            index = self._select()
+            self._in_flight[index] += 1
+            connection = self._connections[index]
+            connecting = self._connecting[index]
+
+        try:
+            # Only one request (re)opens a given connection, the others wait for it
+            with connecting:
+                if not connection.is_connected():
+                    logging.info(f"[{self.proxy_tag}] Opening connection {index}")
+                    connection.disconnect()
+                    connection.connect()
+            yield connection
+        finally:
+            with self._lock:
+                # The pool may have been closed while the request was running
+                if index < len(self._in_flight):
+                    self._in_flight[index] -= 1
+
+    # ----------------------------------------------------------------------
+    def close(self):
+        """
+        Disconnects every connection of the pool.
+        """
+        with self._lock:
+            for connection in self._connections:
+                connection.disconnect()
+            self._connections.clear()
+            self._in_flight.clear()
+            self._connecting.clear()
+
+    # ----------------------------------------------------------------------
+    def _select(self) -> int:
+        # Reuse an idle connection, grow the pool while every connection is busy,
+        # otherwise fall back to the connection with the fewest requests in flight.
+        count = len(self._connections)
+        if count > 0:
+            turn = next(self._turn)
+            order = [(turn + offset) % count for offset in range(count)]
+            index = min(order, key=lambda i: (not self._connections[i].is_connected(), self._in_flight[i]))
+            if self._in_flight[index] == 0 and self._connections[index].is_connected():
+                return index
+            if count >= self.size:
+                return index
+
+        self._connections.append(Remote(self.proxy_url, f"{self.proxy_tag}-{count}"))
+        self._in_flight.append(0)
+        self._connecting.append(threading.Lock())
+        return count
@@ -1,3 +1,4 @@
+import logging
 from typing import Optional, Union
 
 from openfabric_pysdk.helper import Proxy
@@ -40,6 +41,30 @@ class Remote:
         self.client = Proxy(self.proxy_url, self.proxy_tag, ssl_verify=False)
         return self
 
+    # ----------------------------------------------------------------------
+    def is_connected(self) -> bool:
+        """
+        Checks whether the proxy client holds a live connection.
+
+        Returns:
+            bool: True if the client exists and its socket is connected.
+        """
+        return self.client is not None and self.client.is_connected()
+
+    # ----------------------------------------------------------------------
+    def disconnect(self):
+        """
+        Closes the proxy client, if any. The instance can be connected again afterwards.
+        """
+        if self.client is None:
+            return
+
+        client, self.client = self.client, None
+        try:
+            client.disconnect()
+        except Exception as e:
+            logging.debug(f"[{self.proxy_tag}] Disconnect failed: {e}")
+
     # ----------------------------------------------------------------------
     def execute(self, inputs: dict, uid: str) -> Union[ExecutionResult, None]:
         """
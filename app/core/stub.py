@@ -1,18 +1,20 @@
 import json
 import logging
+import os
 import pprint
+import threading
 from typing import Any, Dict, List, Literal, Tuple
 
 import requests
 
-from core.remote import Remote
-from openfabric_pysdk.helper import has_resource_fields, json_schema_to_marshmallow, resolve_resources
+from core.pool import ConnectionPool
+from openfabric_pysdk.helper import compile_schema, resolve_resources
 from openfabric_pysdk.loader import OutputSchemaInst
 
 # Type aliases for clarity
 Manifests = Dict[str, dict]
 Schemas = Dict[str, Tuple[dict, dict]]
-Connections = Dict[str, Remote]
+Connections = Dict[str, ConnectionPool]
 
 
 class Stub:
@@ -21,12 +23,47 @@ class Stub:
     to multiple Openfabric applications, fetching their manifests, schemas, and enabling
     execution of calls to these apps.
 
+    Manifests, schemas and connection pools are kept in a process-wide registry, so
+    every Stub of the same app ID shares them and only the first one pays for the
+    HTTP requests and the WebSocket handshake.
+
     Attributes:
         _schema (Schemas): Stores input/output schemas for each app ID.
         _manifest (Manifests): Stores manifest metadata for each app ID.
-        _connections (Connections): Stores active Remote connections for each app ID.
+        _connections (Connections): Stores the connection pool for each app ID.
     """
 
+    # Process-wide registry, shared by all instances
+    _registry_lock = threading.Lock()
+    _app_locks: Dict[str, threading.Lock] = {}
+    _shared_schema: Schemas = {}
+    _shared_manifest: Manifests = {}
+    _shared_connections: Connections = {}
+    _instances: Dict[Tuple[str, ...], 'Stub'] = {}
+
+    # ----------------------------------------------------------------------
+    @classmethod
+    def shared(cls, app_ids: List[str]) -> 'Stub':
+        """
+        Returns the Stub shared by every caller asking for the same app IDs,
+        creating it on first use.
+
+        Args:
+            app_ids (List[str]): A list of application identifiers (hostnames or URLs).
+
+        Returns:
+            Stub: The shared instance.
+        """
+        key = tuple(sorted(app_ids))
+        with cls._registry_lock:
+            stub = cls._instances.get(key)
+            if stub is None:
+                stub = cls._instances[key] = cls([])
+
+        # Apps that failed to initialize are retried on the next call
+        stub._load(app_ids)
+        return stub
+
     # ----------------------------------------------------------------------
     def __init__(self, app_ids: List[str]):
         """
@@ -39,35 +76,74 @@ class Stub:
         self._schema: Schemas = {}
         self._manifest: Manifests = {}
         self._connections: Connections = {}
+        self._load(app_ids)
+
+    # ----------------------------------------------------------------------
+    def _load(self, app_ids: List[str]):
+        """
+        Binds the given app IDs to this instance, initializing the ones that are not
+        in the process-wide registry yet.
 
+        Args:
+            app_ids (List[str]): A list of application identifiers (hostnames or URLs).
+        """
         for app_id in app_ids:
-            base_url = app_id.strip('/')
+            if app_id in self._connections:
+                continue
 
-            try:
-                # Fetch manifest
-                manifest = requests.get(f"https://{base_url}/manifest", timeout=5).json()
-                logging.info(f"[{app_id}] Manifest loaded: {manifest}")
-                self._manifest[app_id] = manifest
+            with Stub._registry_lock:
+                app_lock = Stub._app_locks.setdefault(app_id, threading.Lock())
 
-                # Fetch input schema
-                input_schema = requests.get(f"https://{base_url}/schema?type=input", timeout=5).json()
-                logging.info(f"[{app_id}] Input schema loaded: {input_schema}")
+            # Concurrent callers of the same app wait for a single initialization
+            with app_lock:
+                if app_id not in Stub._shared_connections:
+                    self._initialize(app_id)
 
-                # Fetch output schema
-                output_schema = requests.get(f"https://{base_url}/schema?type=output", timeout=5).json()
-                logging.info(f"[{app_id}] Output schema loaded: {output_schema}")
-                self._schema[app_id] = (input_schema, output_schema)
+                if app_id in Stub._shared_connections:
+                    self._manifest[app_id] = Stub._shared_manifest[app_id]
+                    self._schema[app_id] = Stub._shared_schema[app_id]
+                    self._connections[app_id] = Stub._shared_connections[app_id]
 
-                # Establish Remote WebSocket connection
-                self._connections[app_id] = Remote(f"wss://{base_url}/app", f"{app_id}-proxy").connect()
-                logging.info(f"[{app_id}] Connection established.")
-            except Exception as e:
-                logging.error(f"[{app_id}] Initialization failed: {e}")
+    # ----------------------------------------------------------------------
+    @staticmethod
+    def _initialize(app_id: str):
+        """
+        Fetches the manifest and schemas of an app and opens its connection pool.
+        Nothing is registered if any step fails.
+
+        Args:
+            app_id (str): The application identifier (hostname or URL).
+        """
+        base_url = app_id.strip('/')
+
+        try:
+            # Fetch manifest
+            manifest = requests.get(f"https://{base_url}/manifest", timeout=5).json()
+            logging.info(f"[{app_id}] Manifest loaded: {manifest}")
+
+            # Fetch input schema
+            input_schema = requests.get(f"https://{base_url}/schema?type=input", timeout=5).json()
+            logging.info(f"[{app_id}] Input schema loaded: {input_schema}")
+
+            # Fetch output schema
+            output_schema = requests.get(f"https://{base_url}/schema?type=output", timeout=5).json()
+            logging.info(f"[{app_id}] Output schema loaded: {output_schema}")
+
+            # Establish the first Remote WebSocket connection, the others are opened on demand
+            size = int(os.getenv("STUB_POOL_SIZE", "2"))
+            pool = ConnectionPool(f"wss://{base_url}/app", f"{app_id}-proxy", size).warm_up()
+            logging.info(f"[{app_id}] Connection established.")
+
+            Stub._shared_manifest[app_id] = manifest
+            Stub._shared_schema[app_id] = (input_schema, output_schema)
+            Stub._shared_connections[app_id] = pool
+        except Exception as e:
+            logging.error(f"[{app_id}] Initialization failed: {e}")
 
     # ----------------------------------------------------------------------
     def call(self, app_id: str, data: Any, uid: str = 'super-user') -> dict:
         """
-        Sends a request to the specified app via its Remote connection.
+        Sends a request to the specified app via one of its pooled Remote connections.
 
         Args:
             app_id (str): The application ID to route the request to.
@@ -80,20 +156,21 @@ class Stub:
         Raises:
             Exception: If no connection is found for the provided app ID, or execution fails.
         """
-        connection = self._connections.get(app_id)
-        if not connection:
+        pool = self._connections.get(app_id)
+        if not pool:
             raise Exception(f"Connection not found for app ID: {app_id}")
 
         try:
-            handler = connection.execute(data, uid)
-            result = connection.get_response(handler)
+            with pool.acquire() as connection:
+                handler = connection.execute(data, uid)
+                result = connection.get_response(handler)
 
-            schema = self.schema(app_id, 'output')
-            marshmallow = json_schema_to_marshmallow(schema)
-            handle_resources = has_resource_fields(marshmallow())
+            # Compiled once per schema content, hot calls only hash the schema
+            compiled = compile_schema(self.schema(app_id, 'output'))
 
-            if handle_resources:
-                result = resolve_resources("https://" + app_id + "/resource?reid={reid}", result, marshmallow())
+            if compiled.has_resources:
+                result = resolve_resources("https://" + app_id + "/resource?reid={reid}", result,
+                                           compiled.schema, compiled.field_types)
 
             return result
         except Exception as e:
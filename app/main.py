@@ -3,9 +3,12 @@ import os
 import base64
 import requests
 import sqlite3
+import threading
+from dataclasses import dataclass
 
 from openfabric_pysdk.app.execution.execution_context import ExecutionContext
 from ontology_dc8f06af066e4a7880a5938933236037.config import ConfigClass
+from core.pipeline import Pipeline, Stage
 from core.stub import Stub
 
 
@@ -18,6 +21,21 @@ class AppModel:
         self.request = request
         self.response = response
 
+############################################################
+# Pipeline job (one per request, passed from stage to stage)
+############################################################
+class StageError(Exception):
+    """Raised by a stage to stop the job with a user facing message."""
+
+
+@dataclass
+class Job:
+    prompt: str
+    expanded: str = None
+    image: bytes = None
+    image_path: str = None
+    model_path: str = None
+
 ############################################################
 # Execution callback function
 ############################################################
@@ -28,61 +46,75 @@ def execute(model: AppModel) -> None:
     prompt = request.prompt.strip()
     logging.info(f"Original prompt: {prompt}")
 
-    # Step 1: Expand the prompt with local LLM (Ollama)
-    llm_response = local_llm_expand(prompt)
-    logging.info(f"Expanded prompt: {llm_response}")
+    # The stages overlap across concurrent requests: while this job waits
+    # for the 3D conversion, the next ones already expand and render.
+    try:
+        get_pipeline().submit(Job(prompt=prompt)).result()
+    except StageError as e:
+        response.message = str(e)
+        return
+
+    response.message = f"✅ Prompt işlendi: {prompt}"
+
+############################################################
+# Pipeline stages
+############################################################
 
-    # Step 2: Generate image using Text-to-Image Openfabric app
+# Step 1: Expand the prompt with local LLM (Ollama)
+def expand_stage(job: Job) -> Job:
+    job.expanded = local_llm_expand(job.prompt)
+    logging.info(f"Expanded prompt: {job.expanded}")
+    return job
+
+# Step 2: Generate image using Text-to-Image Openfabric app
+def image_stage(job: Job) -> Job:
     stub = get_stub()
     try:
-        image_object = stub.call("f0997a01-d6d3-a5fe-53d8-561300318557", {"prompt": llm_response}, "super-user")
+        image_object = stub.call(TEXT_TO_IMAGE_APP, {"prompt": job.expanded}, "super-user")
         image_data = image_object.get("result")
         if isinstance(image_data, str):
             image_data = base64.b64decode(image_data)
     except Exception as e:
         logging.error(f"Image generation error: {e}")
-        response.message = "❌ Görsel oluşturulamadı."
-        return
+        raise StageError("❌ Görsel oluşturulamadı.") from e
 
-    image_path = "output_image.png"
+    # The next job may overwrite the file before the 3D stage runs, keep the image with the job
+    job.image = image_data
+    job.image_path = "output_image.png"
     try:
-        with open(image_path, "wb") as f:
-            f.write(image_data)
+        write_output(job.image_path, image_data)
     except Exception as e:
         logging.error(f"Image save error: {e}")
-        response.message = "❌ Görsel kaydedilemedi."
-        return
+        raise StageError("❌ Görsel kaydedilemedi.") from e
+    return job
 
-    # Step 3: Convert image to 3D model using Image-to-3D app
+# Step 3: Convert image to 3D model using Image-to-3D app
+def model_stage(job: Job) -> Job:
+    stub = get_stub()
     try:
-        with open(image_path, "rb") as img_file:
-            image_bytes = img_file.read()
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-        model3d_object = stub.call("69543f29-4d41-4afc-7f29-3d51591f11eb", {"image": image_base64}, "super-user")
+        image_base64 = base64.b64encode(job.image).decode("utf-8")
+        model3d_object = stub.call(IMAGE_TO_3D_APP, {"image": image_base64}, "super-user")
         model3d_base64 = model3d_object.get("result")
     except Exception as e:
         logging.error(f"3D model generation error: {e}")
-        response.message = "❌ 3D model oluşturulamadı."
-        return
+        raise StageError("❌ 3D model oluşturulamadı.") from e
 
-    model_path = "output_model.glb"
+    job.model_path = "output_model.glb"
     try:
-        with open(model_path, "wb") as f:
-            f.write(base64.b64decode(model3d_base64))
+        write_output(job.model_path, base64.b64decode(model3d_base64))
     except Exception as e:
         logging.error(f"3D model save error: {e}")
-        response.message = "❌ 3D model kaydedilemedi."
-        return
+        raise StageError("❌ 3D model kaydedilemedi.") from e
+    return job
 
-    # Step 4: Save to memory
+# Step 4: Save to memory
+def memory_stage(job: Job) -> Job:
     try:
-        save_to_memory(prompt, llm_response, image_path, model_path)
+        save_to_memory(job.prompt, job.expanded, job.image_path, job.model_path)
     except Exception as e:
         logging.error(f"Memory save error: {e}")
-        response.message = "❌ Hafızaya kaydedilemedi."
-        return
-
-    response.message = f"✅ Prompt işlendi: {prompt}"
+        raise StageError("❌ Hafızaya kaydedilemedi.") from e
+    return job
 
 ############################################################
 # Helpers
@@ -100,8 +132,42 @@ class DummyStub:
             dummy_img = base64.b64encode(b"dummy_image_data").decode("utf-8")
             return {"result": dummy_img}
 
+_dummy_stub = DummyStub()
+
+TEXT_TO_IMAGE_APP = os.getenv("TEXT_TO_IMAGE_APP", "f0997a01-d6d3-a5fe-53d8-561300318557")
+IMAGE_TO_3D_APP = os.getenv("IMAGE_TO_3D_APP", "69543f29-4d41-4afc-7f29-3d51591f11eb")
+
 def get_stub():
-    return DummyStub()
+    # DUMMY_STUB=1 runs the app without reaching the Openfabric apps
+    if os.getenv("DUMMY_STUB", "0") == "1":
+        return _dummy_stub
+    # Every stage thread gets the same Stub: manifests, schemas and connection
+    # pools are set up once per process, failed apps are retried on the next call
+    return Stub.shared([TEXT_TO_IMAGE_APP, IMAGE_TO_3D_APP])
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+def get_pipeline() -> Pipeline:
+    # Concurrency per stage and queue size between stages are configurable
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = Pipeline([
+                Stage("expand", expand_stage, int(os.getenv("PIPELINE_EXPAND_CONCURRENCY", "2"))),
+                Stage("image", image_stage, int(os.getenv("PIPELINE_IMAGE_CONCURRENCY", "2"))),
+                Stage("model3d", model_stage, int(os.getenv("PIPELINE_MODEL3D_CONCURRENCY", "1"))),
+                # SQLite writes are serialized anyway
+                Stage("memory", memory_stage, 1),
+            ], capacity=int(os.getenv("PIPELINE_QUEUE_SIZE", "8")))
+        return _pipeline
+
+def write_output(path: str, data: bytes):
+    # Jobs in flight write the same file, readers only ever see a complete one
+    temp = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp, "wb") as f:
+        f.write(data)
+    os.replace(temp, path)
 
 def local_llm_expand(prompt: str) -> str:
     endpoint = os.getenv("LLM_ENDPOINT", "http://localhost:11434/api/generate")
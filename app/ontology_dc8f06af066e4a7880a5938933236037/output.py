@@ -2,14 +2,14 @@ from dataclasses import dataclass
 from marshmallow import Schema, fields, post_load
 
 from openfabric_pysdk.fields import Resource
-from openfabric_pysdk.utility import SchemaUtil
+from openfabric_pysdk.utility import SchemaUtil, TrackedObject
 
 
 ################################################################
 # Output concept class - AUTOGENERATED
 ################################################################
 @dataclass
-class OutputClass:
+class OutputClass(TrackedObject):
     message: str = None
 
 
@@ -1,3 +1,8 @@
+import os
+
+# Runs without the Openfabric apps
+os.environ.setdefault("DUMMY_STUB", "1")
+
 from main import execute, AppModel
 
 class Request:
@@ -0,0 +1,158 @@
+import threading
+
+import pytest
+
+from core import remote as remote_module
+from core import stub as stub_module
+from core.stub import Stub
+
+
+class Execution:
+    def __init__(self, output, status="COMPLETED"):
+        self.output = output
+        self.__status = status
+
+    def wait(self):
+        pass
+
+    def status(self):
+        return self.__status
+
+    def data(self):
+        return self.output
+
+
+class Proxy:
+    instances = []
+
+    def __init__(self, url, tag=None, ssl_verify=True):
+        self.connected = True
+        self.requests = []
+        self.gate = None
+        Proxy.instances.append(self)
+
+    def is_connected(self):
+        return self.connected
+
+    def disconnect(self):
+        self.connected = False
+
+    def request(self, inputs, uid):
+        self.requests.append(inputs)
+        if self.gate is not None:
+            self.gate.wait()
+        if inputs.get("fail", False):
+            return Execution(None, "FAILED")
+        return Execution({"echo": inputs})
+
+
+class Http:
+    def __init__(self):
+        self.urls = []
+        self.down = set()
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        if any(url.startswith(f"https://{app}/") for app in self.down):
+            raise ConnectionError(url)
+        return self
+
+    def json(self):
+        return {}
+
+
+@pytest.fixture
+def http(monkeypatch):
+    # Fresh registry for every test
+    monkeypatch.setattr(Stub, "_app_locks", {})
+    monkeypatch.setattr(Stub, "_shared_schema", {})
+    monkeypatch.setattr(Stub, "_shared_manifest", {})
+    monkeypatch.setattr(Stub, "_shared_connections", {})
+    monkeypatch.setattr(Stub, "_instances", {})
+    monkeypatch.setattr(remote_module, "Proxy", Proxy)
+    monkeypatch.setattr(Proxy, "instances", [])
+    monkeypatch.setattr(stub_module, "compile_schema", lambda schema: type("Compiled", (), {"has_resources": False}))
+
+    http = Http()
+    monkeypatch.setattr(stub_module.requests, "get", http.get)
+    return http
+
+
+def test_shared_stub_is_initialized_once(http):
+    stub = Stub.shared(["a", "b"])
+    assert Stub.shared(["b", "a"]) is stub
+    assert Stub.shared(["a"]) is not stub
+
+    # Manifest and both schemas, once per app
+    assert len(http.urls) == 6
+    # One warm connection per app
+    assert len(Proxy.instances) == 2
+
+
+def test_stubs_share_the_connection_pools(http):
+    first, second = Stub(["a"]), Stub(["a", "b"])
+
+    assert first._connections["a"] is second._connections["a"]
+    assert first.manifest("a") is second.manifest("a")
+    assert http.urls.count("https://a/manifest") == 1
+    assert second.call("a", {"prompt": "hi"}) == {"echo": {"prompt": "hi"}}
+
+
+def test_failed_app_is_retried(http):
+    http.down.add("b")
+    stub = Stub.shared(["a", "b"])
+    assert "b" not in stub._connections
+
+    http.down.clear()
+    assert Stub.shared(["a", "b"]) is stub
+    assert "b" in stub._connections
+    assert http.urls.count("https://a/manifest") == 1
+
+
+def test_connections_are_released(http):
+    stub = Stub.shared(["a"])
+    pool = stub._connections["a"]
+
+    assert stub.call("a", {"prompt": "hi"}) == {"echo": {"prompt": "hi"}}
+    # Failed requests give their connection back too
+    assert stub.call("a", {"fail": True}) is None
+    assert pool._in_flight == [0]
+    assert len(Proxy.instances) == 1
+
+
+def test_busy_pool_grows_up_to_its_size(http, monkeypatch):
+    monkeypatch.setenv("STUB_POOL_SIZE", "2")
+    stub = Stub.shared(["a"])
+    pool = stub._connections["a"]
+    gate = threading.Event()
+    Proxy.instances[0].gate = gate
+
+    busy = threading.Thread(target=stub.call, args=("a", {"prompt": "slow"}))
+    busy.start()
+    while pool._in_flight != [1]:
+        gate.wait(0.01)
+
+    # The first connection is busy, a second one is opened
+    assert stub.call("a", {"prompt": "fast"}) == {"echo": {"prompt": "fast"}}
+    assert len(Proxy.instances) == 2
+
+    gate.set()
+    busy.join()
+    assert pool._in_flight == [0, 0]
+
+
+def test_closed_pool_disconnects(http):
+    pool = Stub.shared(["a"])._connections["a"]
+    pool.close()
+    assert [proxy.connected for proxy in Proxy.instances] == [False]
+
+
+def test_app_uses_the_shared_stub(http, monkeypatch):
+    import main
+
+    assert main.get_stub() is main.get_stub()
+    assert main.get_stub() is Stub.shared([main.TEXT_TO_IMAGE_APP, main.IMAGE_TO_3D_APP])
+    assert len(Proxy.instances) == 2
+
+    monkeypatch.setenv("DUMMY_STUB", "1")
+    assert isinstance(main.get_stub(), main.DummyStub)
@@ -152,13 +152,14 @@ class ActionDispatcher:
                 if cancelled:
                     return
 
-                ResourceService.lock(qid)
-                PersistenceService.set_asset(qid, "out", getSchemaInst('out').dump(output))
-                ResourceService.unlock()
+                with ResourceService.location(qid):
+                    PersistenceService.set_asset(qid, "out", getSchemaInst('out').dump(output))
             except:                
                 self.ray.on_update(None)
                 # Extra precotion to not send the same ray twice
                 self.workerContext.notifier.onRayUpdate(None)
+                # Waits for a partial output being stored, none is stored once the execution failed
+                self.workerContext.notifier.onPartialUpdate(None)
                 error = f"process - failed executing: [{qid}]\n{traceback.format_exc()}"
                 logger.error(error)
                 self.ray.message(MessageType.ERROR, error)
@@ -174,6 +175,8 @@ class ActionDispatcher:
                 return
 
             self.ray.complete()
+            # The supervisor reads the output as soon as it gets the finished ray
+            PersistenceService.flush(qid)
             self.workerContext.publish(ActionEncoder.state_update(qid, ray=RaySchemaInst.dump(self.ray)))
             self.ray = None
 
@@ -233,7 +236,7 @@ class ActionDispatcher:
         self.activeSessionModel = app_model
         self.lock.release()
 
-    def scheduleAction(self, message: str):
+    def scheduleAction(self, message: list):
         self.actionDecoder.decode(message)
 
     def onAdd(self, qid):
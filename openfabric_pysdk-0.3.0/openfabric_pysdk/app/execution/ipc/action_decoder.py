@@ -1,7 +1,8 @@
-import pickle
-from typing import Any, Dict
+import json
+from typing import Any, Dict, List
 
-from openfabric_pysdk.app.execution.ipc.actions import DispatchActions
+from openfabric_pysdk.app.execution.ipc.actions import ACTION_NAMES, DispatchActions, PAYLOADS, WIRE_HEADER, \
+    WIRE_VERSION
 from openfabric_pysdk.logger import logger
 
 
@@ -32,12 +33,27 @@ class ActionDecoder:
 
     # ------------------------------------------------------------------------
     @staticmethod
-    def deserialize(input: Any):
-        data = pickle.loads(input)
-        return data['action'], data['data'] if 'data' in data else None
+    def deserialize(frames: List[Any]):
+        if len(frames) < 2 or len(frames[0]) != WIRE_HEADER.size:
+            logger.error("Malformed message")
+            return None, None
+
+        version, code = WIRE_HEADER.unpack(bytes(frames[0]))
+        if version != WIRE_VERSION:
+            logger.error(f"Unsupported message version {version}, expected {WIRE_VERSION}")
+            return None, None
+
+        metadata = json.loads(bytes(frames[1]))
+        data = metadata.get('data', None)
+        payloads = metadata.get(PAYLOADS, [])
+        if len(payloads) > 0:
+            for name, frame in zip(payloads, frames[2:]):
+                data[name] = json.loads(bytes(frame))
+
+        return ACTION_NAMES.get(code, code), data
 
     # ------------------------------------------------------------------------
-    def decode(self, message: str):
+    def decode(self, message: List[Any]):
         action, data = ActionDecoder.deserialize(message)
 
         if action is None:
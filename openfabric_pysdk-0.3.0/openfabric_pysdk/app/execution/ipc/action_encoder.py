@@ -1,65 +1,81 @@
-import pickle
+import json
+from typing import Any, Dict, List
 
-from openfabric_pysdk.app.execution.ipc.actions import DispatchActions
+from openfabric_pysdk.app.execution.ipc.actions import ACTION_CODES, DispatchActions, PAYLOADS, WIRE_HEADER, \
+    WIRE_VERSION
 
 
 class ActionEncoder:
 
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def serialize(action: str, data: Any = None, payloads: Dict[str, Any] = None) -> List[bytes]:
+        frames = [WIRE_HEADER.pack(WIRE_VERSION, ACTION_CODES[action])]
+        metadata = {'data': data}
+        if payloads:
+            metadata[PAYLOADS] = list(payloads.keys())
+        frames.append(json.dumps(metadata).encode('utf-8'))
+        if payloads:
+            frames.extend(json.dumps(payload).encode('utf-8') for payload in payloads.values())
+        return frames
+
     # ------------------------------------------------------------------------
     @staticmethod
     def add(qid: str):
-        return pickle.dumps({'action': DispatchActions.ADD, 'data': qid})
+        return ActionEncoder.serialize(DispatchActions.ADD, qid)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def check_request(qid: str):
-        return pickle.dumps({'action': DispatchActions.CHECK, 'data': qid})
+        return ActionEncoder.serialize(DispatchActions.CHECK, qid)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def configure():
-        return pickle.dumps({'action': DispatchActions.CONFIGURE})
+        return ActionEncoder.serialize(DispatchActions.CONFIGURE)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def exit(reason: str):
-        return pickle.dumps({'action': DispatchActions.EXIT, 'data': reason})
+        return ActionEncoder.serialize(DispatchActions.EXIT, reason)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def fetch(field: str):
-        return pickle.dumps({'action': DispatchActions.FETCH, 'data': field})
+        return ActionEncoder.serialize(DispatchActions.FETCH, field)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def log(level: int, message: str):
         data = {'level': level, 'message': message}
-        return pickle.dumps({'action': DispatchActions.LOG, 'data': data})
+        return ActionEncoder.serialize(DispatchActions.LOG, data)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def sync(qid: str):
-        return pickle.dumps({'action': DispatchActions.SYNC, 'data': qid})
+        return ActionEncoder.serialize(DispatchActions.SYNC, qid)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def remove(qid: str):
-        return pickle.dumps({'action': DispatchActions.REMOVE, 'data': qid})
+        return ActionEncoder.serialize(DispatchActions.REMOVE, qid)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def state_update(qid: str, input=None, output=None, ray=None, partial=None):
         data = {'qid': qid}
+        # Inputs and outputs can be large, they travel in their own frames
+        payloads = {}
         if input is not None:
-            data['input'] = input
+            payloads['input'] = input
         if output is not None:
-            data['output'] = output
+            payloads['output'] = output
         if partial is not None:
-            data['partial'] = partial
+            payloads['partial'] = partial
         if ray is not None:
             data['ray'] = ray
 
-        return pickle.dumps({'action': DispatchActions.UPDATE, 'data': data})
+        return ActionEncoder.serialize(DispatchActions.UPDATE, data, payloads)
 
     # ------------------------------------------------------------------------
     @staticmethod
@@ -72,9 +88,9 @@ class ActionEncoder:
         if config is not None:
             data['config'] = config
 
-        return pickle.dumps({'action': DispatchActions.SCHEMA_UPDATE, 'data': data})
+        return ActionEncoder.serialize(DispatchActions.SCHEMA_UPDATE, data)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def app_state(state: str):
-        return pickle.dumps({'action': DispatchActions.APP_STATE, 'data': state})
+        return ActionEncoder.serialize(DispatchActions.APP_STATE, state)
@@ -1,3 +1,6 @@
+import struct
+from typing import Dict
+
 
 class DispatchActions:
     ADD = 'add'
@@ -11,3 +14,28 @@ class DispatchActions:
     UPDATE = 'update'
     SCHEMA_UPDATE = 'schema_update'
     SYNC = 'sync'
+
+
+# Wire format of the messages exchanged between the supervisor and the executors:
+#   frame 0: header, (version, action code) packed as two unsigned bytes
+#   frame 1: JSON metadata, the action data without its large payloads
+#   frame 2+: one JSON frame per large payload, in the order listed under metadata[PAYLOADS]
+WIRE_VERSION = 1
+WIRE_HEADER = struct.Struct("!BB")
+PAYLOADS = '__payloads__'
+
+# Action codes are part of the wire format: never reuse or renumber them, only append
+ACTION_CODES: Dict[str, int] = {
+    DispatchActions.ADD: 1,
+    DispatchActions.CHECK: 2,
+    DispatchActions.CONFIGURE: 3,
+    DispatchActions.EXIT: 4,
+    DispatchActions.FETCH: 5,
+    DispatchActions.LOG: 6,
+    DispatchActions.REMOVE: 7,
+    DispatchActions.APP_STATE: 8,
+    DispatchActions.UPDATE: 9,
+    DispatchActions.SCHEMA_UPDATE: 10,
+    DispatchActions.SYNC: 11,
+}
+ACTION_NAMES: Dict[int, str] = {code: action for action, code in ACTION_CODES.items()}
@@ -1,9 +1,13 @@
+import threading
+
 import zmq
 
 
 class Publisher:
     # ------------------------------------------------------------------------
     def __init__(self, address="tcp://127.0.0.1:5556"):
+        # zmq sockets are not thread safe: the dispatcher, the update publisher and the logs share this one
+        self.lock = threading.Lock()
         self.context = zmq.Context()
         self.publisher_socket = self.context.socket(zmq.PUB)
         self.publisher_socket.bind(address)
@@ -18,13 +22,16 @@ class Publisher:
 
     # ------------------------------------------------------------------------
     def publish(self, message):
-        self.publisher_socket.send(message)
+        # The frames of a message must not interleave with those of another thread
+        with self.lock:
+            self.publisher_socket.send_multipart(message)
 
     # ------------------------------------------------------------------------
     def close(self):
-        if self.publisher_socket is not None:
-            self.publisher_socket.close()
-        if self.context is not None:
-            self.context.destroy()
-        self.publisher_socket = None
-        self.context = None
+        with self.lock:
+            if self.publisher_socket is not None:
+                self.publisher_socket.close()
+            if self.context is not None:
+                self.context.destroy()
+            self.publisher_socket = None
+            self.context = None
@@ -1,59 +1,82 @@
 import threading
+import uuid
 
-import gevent
 import zmq
+import zmq.green
+from gevent import monkey
+
+from openfabric_pysdk.logger import logger
 
 
 class Subscriber:
+    # Maximum number of messages handled per wake-up, before checking for a shutdown request
+    __batch_size: int = 64
 
     # ------------------------------------------------------------------------
-    def __init__(self, address="tcp://127.0.0.1:5556", callback=None, is_gevent: bool = False):
-        self.context = zmq.Context()
+    def __init__(self, address="tcp://127.0.0.1:5556", callback=None, is_gevent: bool = None):
+        # A blocking poll would freeze every greenlet of a monkey patched process, use the green sockets there
+        if is_gevent is None:
+            is_gevent = monkey.is_module_patched('threading')
+        self.__zmq = zmq.green if is_gevent else zmq
+        self.context = self.__zmq.Context()
 
         self.subscriber_socket = self.context.socket(zmq.SUB)
         self.subscriber_socket.connect(address)
         self.subscriber_socket.setsockopt_string(zmq.SUBSCRIBE, "")
 
+        # The handler owns the sockets above, close() asks it to stop through this pair
+        control_address = f"inproc://subscriber_control_{uuid.uuid4().hex}"
+        self.__control = self.context.socket(zmq.PAIR)
+        self.__control.bind(control_address)
+        self.__control_client = self.context.socket(zmq.PAIR)
+        self.__control_client.connect(control_address)
+
         self.running = True
 
         self.on_message_received_callback = callback
-        if is_gevent:
-            self.subscriber_greenlet = gevent.spawn(self.__message_handler2, self.subscriber_socket)
-        else:
-            self.__execution = threading.Thread(target=self.__message_handler, name="zmq_subscriber", args=(self.subscriber_socket,))
-            self.__execution.start()
+        self.__execution = threading.Thread(target=self.__message_handler, name="zmq_subscriber",
+                                            args=(self.subscriber_socket, self.__control))
+        self.__execution.start()
 
     # ------------------------------------------------------------------------
     def __del__(self):
         try:
             self.close()
-            if self.__execution is not None:
-                self.__execution.join()
-            self.__execution = None
         except Exception as e:
             # Object is deleted on close. Error would relate to python closing.
-            print(e)
-            pass
+            logger.debug(f"Failed to close the subscriber: {e}")
 
     # ------------------------------------------------------------------------
-    def __message_handler(self, socket):
-        while self.running:
-            try:
-                message = socket.recv(flags=zmq.NOBLOCK)
-                if self.on_message_received_callback is not None:
-                    self.on_message_received_callback(message)
-            except zmq.Again:
-                gevent.sleep(0.1)
-                pass
+    def __message_handler(self, socket, control):
+        poller = self.__zmq.Poller()
+        poller.register(socket, zmq.POLLIN)
+        poller.register(control, zmq.POLLIN)
 
-    # ------------------------------------------------------------------------
-    # Todo: try to switch to this message handler
-    def __message_handler2(self, socket):
-        while self.running:
-            message = socket.recv()
-            if self.on_message_received_callback is not None:
-                self.on_message_received_callback(message)
-            gevent.sleep(0.001)
+        try:
+            while True:
+                # Sleep until a message or a shutdown request arrives
+                events = dict(poller.poll())
+                if control in events:
+                    break
+
+                if socket in events:
+                    for _ in range(self.__batch_size):
+                        try:
+                            message = socket.recv_multipart(flags=zmq.NOBLOCK)
+                        except zmq.Again:
+                            break
+                        if self.on_message_received_callback is not None:
+                            try:
+                                self.on_message_received_callback(message)
+                            except Exception as e:
+                                logger.error(f"Failed to handle message: {e}")
+        except zmq.ContextTerminated:
+            pass
+        finally:
+            socket.close(linger=0)
+            control.close(linger=0)
+            self.__control_client.close(linger=0)
+            self.context.term()
 
     # ------------------------------------------------------------------------
     def register_callback(self, callback):
@@ -61,10 +84,11 @@ class Subscriber:
 
     # ------------------------------------------------------------------------
     def close(self):
+        if not self.running:
+            return
         self.running = False
-        if self.subscriber_socket is not None:
-            self.subscriber_socket.close()
-        if self.context is not None:
-            self.context.destroy()
-        self.subscriber_socket = None
-        self.context = None
+
+        # The handler closes the sockets and terminates the context once it gets the request
+        self.__control_client.send(b"")
+        if self.__execution is not threading.current_thread():
+            self.__execution.join()
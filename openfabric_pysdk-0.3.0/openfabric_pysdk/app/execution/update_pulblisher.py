@@ -6,7 +6,9 @@ from openfabric_pysdk.context import AppModel, Ray
 from openfabric_pysdk.context.ray_schema import RaySchemaInst
 from openfabric_pysdk.loader import getSchemaInst
 from openfabric_pysdk.logger import logger
+from openfabric_pysdk.service import PersistenceService
 from openfabric_pysdk.service.hash_service import HashService
+from openfabric_pysdk.utility import TrackingUtil
 
 from openfabric_pysdk.service.resource_service import ResourceService
 
@@ -28,7 +30,7 @@ class UpdatePublisher:
         self.running = False
         self.__runner = None
         self.publisingPeriodinS = 0.1
-        self.last_output_hash = None
+        self.last_output_version = None
 
     def start(self):
         self.__runner = threading.Thread(target=self.run, name="sdk_publisher")
@@ -56,7 +58,7 @@ class UpdatePublisher:
         else:
             self.qid = app_model.ray.qid
             self.output = app_model.response
-        self.last_output_hash = None
+        self.last_output_version = None
         self.lock.release()
 
     def onLogMessage(self, level, msg):
@@ -79,16 +81,17 @@ class UpdatePublisher:
 
             if self.qid is not None and self.output is not None:
                 try:
-                    current_output_hash = HashService.fast_hash(self.output)
-                    if self.last_output_hash != current_output_hash:
-                        ResourceService.lock(self.qid)
-                        partial = None
-                        try:
+                    # Tracked outputs count their changes, hash the others
+                    current_output_version = TrackingUtil.version(self.output)
+                    if current_output_version is None:
+                        current_output_version = HashService.fast_hash(self.output)
+                    if self.last_output_version != current_output_version:
+                        with ResourceService.location(self.qid):
                             partial = getSchemaInst('out').dump(self.output)
-                        finally:
-                            ResourceService.unlock()
+                        # Stored by the worker, so that it is always written before the final output
+                        PersistenceService.set_asset(self.qid, 'out', partial)
                         publisher.publish(ActionEncoder.state_update(self.qid, partial=partial))
-                        self.last_output_hash = current_output_hash
+                        self.last_output_version = current_output_version
                 except BaseException as e:
                     logger.error(f"Exception occurred - {e}")
             self.lock.release()
@@ -1,12 +1,11 @@
 import json
 import os
-import subprocess
-import gevent
+import threading
 import random
-from typing import Any, Dict
-from pathlib import Path
+from typing import Any, Dict, List, Optional
 
-from openfabric_pysdk.app.execution import ActionDecoder, ActionEncoder, ExecutionContext
+from openfabric_pysdk.app.execution import ActionEncoder
+from openfabric_pysdk.app.worker import Worker
 from openfabric_pysdk.auth import session_link
 from openfabric_pysdk.context import Ray, State, StateStatus, RaySchema, RayStatus, StateSchema
 from openfabric_pysdk.context.ray_schema import RaySchemaInst
@@ -18,46 +17,44 @@ from openfabric_pysdk.logger import logger, logger_worker
 from openfabric_pysdk.store import KeyValueDB
 from openfabric_pysdk.service import PersistenceService
 
-my_env = os.environ.copy()
-if "PYTHONPATH" in my_env:
-    my_env["PYTHONPATH"] = f"{os.getcwd()}:{my_env['PYTHONPATH']}"
-else:
-    my_env["PYTHONPATH"] = os.getcwd()
-
 
 #######################################################
 #  Supervisor
 #######################################################
 class Supervisor:
     state: State = None
-    __process = None
-    __script_dir = Path(__file__).parent.absolute()
+    # Number of executor processes, each one running one request at a time
+    workers: int = max(1, int(os.environ.get("OPENFABRIC_WORKERS", 1)))
+    # Preferred worker status when aggregating the application state
+    __status_priority: List[StateStatus] = [StateStatus.RUNNING, StateStatus.STARTING, StateStatus.PENDING_CONFIG,
+                                            StateStatus.PAUSED, StateStatus.CRASHED]
 
     # ------------------------------------------------------------------------
     def __init__(self):
         self.state = State()
         self.notificationSocket = None
-        self.publisher_port = random.randint(5001, 9999)
-        self.subscriber_port = self.publisher_port + 1
-        self.executionContext = ExecutionContext(publisher_port=self.publisher_port,
-                                                 subscriber_port=self.subscriber_port)
-        self.executionContext.register(self.scheduleAction)
-        self.actionDecoder = ActionDecoder(self)
-        self.__update_worker_state()
+        self.__lock: threading.RLock = threading.RLock()
+        # Set when the finished ray of the request arrives, one per request being executed
+        self.__completions: Dict[str, threading.Event] = dict()
+        # Each worker uses a pair of consecutive ports
+        base_port = random.randint(5001, 9999 - 2 * Supervisor.workers)
+        self.__workers: List[Worker] = [
+            Worker(index, self, publisher_port=base_port + 2 * index, subscriber_port=base_port + 2 * index + 1)
+            for index in range(Supervisor.workers)
+        ]
+        for worker in self.__workers:
+            worker.start()
 
     # ------------------------------------------------------------------------
     def __del__(self):
         # TODO: could signal 
         #    self.executionContext.publish(DispatchMessage.exit("closing"))
         # in order to have a graceful shutdown
-        # if no response after a period of time, kill self.__process
+        # if no response after a period of time, kill the worker processes
         # stop publisher and subscriber
         pass
 
     # ------------------------------------------------------------------------
-    def scheduleAction(self, message):
-        self.actionDecoder.decode(message)
-
     def onFetch(self, data):
         if data == "queue":
             self.dispatch(ActionEncoder.fetch(data), False)
@@ -84,8 +81,10 @@ class Supervisor:
 
         if 'ray' in response:
             ray = RaySchemaInst.load(response['ray'])
-            engine.ray(ray.qid).update(ray)
+            engine.update(ray)
             PersistenceService.set_asset(qid, "ray", response['ray'])
+            if ray.finished:
+                self.__complete(qid)
         else:
             ray = engine.ray(qid)
 
@@ -141,21 +140,14 @@ class Supervisor:
         self.notificationSocket.emit('schema_update', response)
 
     def onAppState(self, data):
-        receivedState = StateSchema().load(data)
-        logger.info(f"State update: {self.state.status} -> {receivedState['status']}")
-        self.state.status = receivedState["status"]
+        self.__update_status()
 
     def onLog(self, data):
         logger_worker.log(data['level'], data['message'])
 
     def onExit(self, data):
-        logger.info("Worker exited with reason: " + str(data))
-        # Temporary workaround
-        self.__process.kill()
-        self.__process = None
-
-        if str(data) == "suspend":
-            self.state.status = StateStatus.PAUSED
+        # The worker already stopped its own process
+        self.__update_status()
 
     def onUnsupportedAction(self, action):
         # logger.error("Unexpected action: " + str(action))
@@ -173,59 +165,111 @@ class Supervisor:
         self.notificationSocket = notificationSocket
 
     # ------------------------------------------------------------------------
-    def dispatch(self, data="", start_worker=True):
+    def dispatch(self, data="", start_worker=True, worker: Optional[Worker] = None):
         logger.debug(f"Dispatching {data}")
 
-        if start_worker:
-            self.__update_worker_state()
+        # Without an explicit target the message is broadcast to every worker
+        targets = self.__workers if worker is None else [worker]
+        for target in targets:
+            target.publish(data, start_worker)
+
+    # ------------------------------------------------------------------------
+    def __update_status(self):
+        # The application is as available as its best worker,
+        # so a single crashed process does not take down the others.
+        statuses = [worker.state.status for worker in self.__workers]
+        for status in Supervisor.__status_priority:
+            if status in statuses:
+                if self.state.status != status:
+                    logger.info(f"State update: {self.state.status} -> {status}")
+                self.state.status = status
+                return
+
+    # ------------------------------------------------------------------------
+    def __owner(self, qid: str) -> Optional[Worker]:
+        return next((worker for worker in self.__workers if worker.owns(qid)), None)
+
+    # ------------------------------------------------------------------------
+    def __route(self, qid: str) -> Optional[Worker]:
+        with self.__lock:
+            # Crashed workers are given another chance, with a growing delay
+            if any([worker.recover() for worker in self.__workers]):
+                self.__update_status()
+
+            owner = self.__owner(qid)
+            if owner is not None:
+                if owner.is_healthy():
+                    return owner
+                # Crashed worker, move the request to a healthy one
+                owner.release(qid)
+
+            candidates = [worker for worker in self.__workers if worker.is_healthy()]
+            if len(candidates) == 0:
+                return None
+
+            # Least loaded worker first, idle workers having no load at all
+            worker = min(candidates, key=lambda w: (w.load(), w.index))
+            worker.assign(qid)
+            return worker
 
-        self.executionContext.publish(data)
+    # ------------------------------------------------------------------------
+    def __release(self, qid: str):
+        owner = self.__owner(qid)
+        if owner is not None:
+            owner.release(qid)
 
     # ------------------------------------------------------------------------
-    def __update_worker_state(self):
-        if self.__process is None or self.__process.poll() is not None:
-            if "OPENFABRIC_DEBUG" in my_env:
-                # Note: remove stdout/stderr redirection to debug app
-                self.__process = subprocess.Popen(
-                    ["python3", self.__script_dir / "executor.py", "--publisher_port", str(self.subscriber_port),
-                     "--subscriber_port", str(self.publisher_port)], env=my_env)
-            else:
-                self.__process = subprocess.Popen(
-                    ["python3", self.__script_dir / "executor.py", "--publisher_port", str(self.subscriber_port),
-                     "--subscriber_port", str(self.publisher_port)],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.STDOUT,
-                    env=my_env)
+    def __completion(self, qid: str) -> threading.Event:
+        with self.__lock:
+            return self.__completions.setdefault(qid, threading.Event())
+
+    def __complete(self, qid: str):
+        with self.__lock:
+            completion = self.__completions.pop(qid, None)
+        if completion is not None:
+            completion.set()
 
     # ------------------------------------------------------------------------
     def execution_callback_function(self, input: InputClass, ray: Ray) -> OutputClass:
-        self.dispatch(ActionEncoder.add(ray.qid))
-        counter = 0
-
-        while True:
-            if not ray.finished:
-                gevent.sleep(0.1)
-                counter += 1
-                # Make sure the worker was not closing while we
-                # were proposing a new entry, or that it died.
-                if counter % 10 == 0:
-                    self.dispatch(ActionEncoder.check_request(ray.qid))
-
-                # If the app crashed, cancel all ongoing rays.
-                if self.state.status == StateStatus.CRASHED:
-                    ray.status = RayStatus.FAILED
-                    ray.finished = True
-                    break
-            else:
+        completion = self.__completion(ray.qid)
+        worker = self.__route(ray.qid)
+        # The worker reads the ray and the input from the store
+        PersistenceService.flush(ray.qid)
+        if worker is not None:
+            self.dispatch(ActionEncoder.add(ray.qid), worker=worker)
+
+        # Woken up by onUpdate as soon as the finished ray arrives. The timeout only
+        # drives the watchdog: make sure the worker was not closing while we were
+        # proposing a new entry, or that it died.
+        while not ray.finished and not completion.wait(1.0):
+            if ray.finished:
+                break
+
+            worker = self.__route(ray.qid)
+            if worker is not None:
+                PersistenceService.flush(ray.qid)
+                self.dispatch(ActionEncoder.check_request(ray.qid), worker=worker)
+
+            # If all the workers crashed, cancel all ongoing rays.
+            if worker is None or self.state.status == StateStatus.CRASHED:
+                ray.status = RayStatus.FAILED
+                ray.finished = True
                 break
 
+        with self.__lock:
+            if self.__completions.get(ray.qid) is completion:
+                self.__completions.pop(ray.qid)
+        self.__release(ray.qid)
         return None
 
     # ------------------------------------------------------------------------
     def cancel_execution(self, ray: Ray):
         ray.status = RayStatus.CANCELED
         ray.complete()
-        self.dispatch(ActionEncoder.remove(ray.qid), False)
+        self.__complete(ray.qid)
+        owner = self.__owner(ray.qid)
+        self.__release(ray.qid)
+        self.dispatch(ActionEncoder.remove(ray.qid), False, worker=owner)
 
     # ------------------------------------------------------------------------
     def config_callback_function(self, config: Dict[str, ConfigClass]):
@@ -233,7 +277,11 @@ class Supervisor:
 
     # ------------------------------------------------------------------------
     def sync(self, qid):
-        self.dispatch(ActionEncoder.sync(qid))
+        # Only the worker executing the request can apply the new input
+        owner = self.__owner(qid)
+        if owner is not None:
+            PersistenceService.flush(qid)
+            self.dispatch(ActionEncoder.sync(qid), worker=owner)
 
     # ------------------------------------------------------------------------
     def get_manifest(self) -> KeyValueDB:
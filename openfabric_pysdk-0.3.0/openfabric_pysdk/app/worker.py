@@ -0,0 +1,175 @@
+import os
+import subprocess
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+
+from openfabric_pysdk.app.execution import ActionDecoder, ExecutionContext
+from openfabric_pysdk.context import State, StateStatus, StateSchema
+from openfabric_pysdk.logger import logger
+
+my_env = os.environ.copy()
+if "PYTHONPATH" in my_env:
+    my_env["PYTHONPATH"] = f"{os.getcwd()}:{my_env['PYTHONPATH']}"
+else:
+    my_env["PYTHONPATH"] = os.getcwd()
+
+
+# Worker class
+# This class owns one executor process together with its own ZMQ publisher/subscriber pair.
+# It keeps track of the requests assigned to the process and of the state reported by it,
+# so that the supervisor can route requests and isolate a crashing process from the others.
+
+#######################################################
+#  Worker
+#######################################################
+class Worker:
+    __script_dir = Path(__file__).parent.absolute()
+    # Seconds before restarting a crashed executor, doubled after each crash in a row
+    __restart_delay: float = 1.0
+    __restart_delay_max: float = 60.0
+
+    # ------------------------------------------------------------------------
+    def __init__(self, index: int, supervisor, publisher_port: int, subscriber_port: int):
+        self.index = index
+        self.state = State()
+        self.last_seen: datetime = None
+        self.publisher_port = publisher_port
+        self.subscriber_port = subscriber_port
+        self.__supervisor = supervisor
+        self.__process = None
+        self.__qids: Set[str] = set()
+        self.__crashes: int = 0
+        self.__restart_at: Optional[float] = None
+        self.__lock: threading.RLock = threading.RLock()
+        self.executionContext = ExecutionContext(publisher_port=self.publisher_port,
+                                                 subscriber_port=self.subscriber_port)
+        self.executionContext.register(self.scheduleAction)
+        self.actionDecoder = ActionDecoder(self)
+
+    # ------------------------------------------------------------------------
+    def __str__(self):
+        return f"Worker(index={self.index}, status={self.state.status}, load={self.load()})"
+
+    # ------------------------------------------------------------------------
+    def scheduleAction(self, message):
+        self.last_seen = datetime.now()
+        self.actionDecoder.decode(message)
+
+    # ------------------------------------------------------------------------
+    def load(self) -> int:
+        with self.__lock:
+            return len(self.__qids)
+
+    # ------------------------------------------------------------------------
+    def owns(self, qid: str) -> bool:
+        with self.__lock:
+            return qid in self.__qids
+
+    # ------------------------------------------------------------------------
+    def assign(self, qid: str):
+        with self.__lock:
+            self.__qids.add(qid)
+
+    # ------------------------------------------------------------------------
+    def release(self, qid: str):
+        with self.__lock:
+            self.__qids.discard(qid)
+
+    # ------------------------------------------------------------------------
+    def is_alive(self) -> bool:
+        return self.__process is not None and self.__process.poll() is None
+
+    # ------------------------------------------------------------------------
+    def is_healthy(self) -> bool:
+        return self.state.status != StateStatus.CRASHED
+
+    # ------------------------------------------------------------------------
+    def recover(self) -> bool:
+        # Restarts a crashed executor once its delay is over, True when restarted
+        with self.__lock:
+            if self.is_healthy() or self.__restart_at is None or time.monotonic() < self.__restart_at:
+                return False
+            self.__restart_at = None
+            logger.info(f"Worker {self.index} restarting after {self.__crashes} crash(es)")
+            self.kill()
+            self.state.status = StateStatus.STARTING
+            self.start()
+            return True
+
+    # ------------------------------------------------------------------------
+    def start(self):
+        if self.is_alive():
+            return
+
+        command = ["python3", self.__script_dir / "executor.py",
+                   "--publisher_port", str(self.subscriber_port),
+                   "--subscriber_port", str(self.publisher_port)]
+
+        if "OPENFABRIC_DEBUG" in my_env:
+            # Note: remove stdout/stderr redirection to debug app
+            self.__process = subprocess.Popen(command, env=my_env)
+        else:
+            self.__process = subprocess.Popen(command,
+                                              stdout=subprocess.DEVNULL,
+                                              stderr=subprocess.STDOUT,
+                                              env=my_env)
+
+    # ------------------------------------------------------------------------
+    def kill(self):
+        if self.__process is not None:
+            self.__process.kill()
+        self.__process = None
+
+    # ------------------------------------------------------------------------
+    def publish(self, data, start_worker=True):
+        if start_worker:
+            self.start()
+
+        self.executionContext.publish(data)
+
+    # ------------------------------------------------------------------------
+    def onUpdate(self, data):
+        response: Dict[str, Any] = data
+        ray = response.get('ray', None)
+        if 'qid' in response and ray is not None and ray.get('finished', False) is True:
+            self.release(response['qid'])
+
+        self.__supervisor.onUpdate(data)
+
+    def onAppState(self, data):
+        receivedState = StateSchema().load(data)
+        logger.info(f"Worker {self.index} state update: {self.state.status} -> {receivedState['status']}")
+        with self.__lock:
+            self.state.status = receivedState["status"]
+            if self.state.status == StateStatus.CRASHED:
+                self.__crashes += 1
+                delay = min(Worker.__restart_delay * 2 ** (self.__crashes - 1), Worker.__restart_delay_max)
+                self.__restart_at = time.monotonic() + delay
+            elif self.state.status == StateStatus.RUNNING:
+                self.__crashes = 0
+        self.__supervisor.onAppState(data)
+
+    def onExit(self, data):
+        logger.info(f"Worker {self.index} exited with reason: " + str(data))
+        # Temporary workaround
+        self.kill()
+
+        if str(data) == "suspend":
+            self.state.status = StateStatus.PAUSED
+
+        self.__supervisor.onExit(data)
+
+    def onFetch(self, data):
+        self.__supervisor.onFetch(data)
+
+    def onSchemaUpdate(self, data):
+        self.__supervisor.onSchemaUpdate(data)
+
+    def onLog(self, data):
+        self.__supervisor.onLog(data)
+
+    def onUnsupportedAction(self, action):
+        self.__supervisor.onUnsupportedAction(action)
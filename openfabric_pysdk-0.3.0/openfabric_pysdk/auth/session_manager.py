@@ -54,6 +54,8 @@ class SessionManager:
                     self.active_tokens[token] = user_id
 
         self.timer = Timer(300, self.cleanup_challenges)
+        # Housekeeping only, it must not keep the process alive
+        self.timer.daemon = True
         self.timer.start()
 
     # ------------------------------------------------------------------------
@@ -65,6 +67,8 @@ class SessionManager:
             logger.debug(f"Challenge expired: {key}")
             del self.active_challenges[key]
         self.timer = Timer(300, self.cleanup_challenges)
+        # Housekeeping only, it must not keep the process alive
+        self.timer.daemon = True
         self.timer.start()
 
     # ------------------------------------------------------------------------
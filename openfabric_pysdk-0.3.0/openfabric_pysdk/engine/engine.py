@@ -1,7 +1,10 @@
+import collections
+import os
 import threading
 import uuid
+from datetime import datetime
 from time import sleep
-from typing import Dict, List, Optional
+from typing import Callable, List, Optional, OrderedDict, Tuple
 
 from openfabric_pysdk.app import Supervisor
 from openfabric_pysdk.benchmark import measure_block_time
@@ -19,33 +22,45 @@ from openfabric_pysdk.utility import LRUCacheMap
 #######################################################
 class Engine:
     __supervisor: Supervisor = None
-    __rays: Dict[str, Ray] = None
+    # Hot rays, least recently used first. Older rays are paged in from the persistence on demand
+    __rays: OrderedDict[str, Ray] = None
+    __rays_limit: int = None
+    __rays_lock: threading.RLock = threading.RLock()
+    # Rays in these states are in use and never evicted
+    __active: List[RayStatus] = [RayStatus.QUEUED, RayStatus.PENDING, RayStatus.RUNNING]
     __partial_outputs: LRUCacheMap = None
-    __reported_partial_outputs: LRUCacheMap = None
+    __partial_listeners: List[Callable[[str], None]] = None
     __task: Task = None
     __instances: int = 0
     __running: bool = False
     __current_qid: Optional[str] = None
     __worker: threading.Thread = None
     __lock: threading.Condition = threading.Condition()
+    # One slot per executor process, so that queued requests run concurrently
+    __slots: threading.BoundedSemaphore = threading.BoundedSemaphore(Supervisor.workers)
 
     # ------------------------------------------------------------------------
     def __init__(self):
-        self.__rays = dict()
+        self.__rays = collections.OrderedDict()
+        self.__rays_limit = max(1, int(os.environ.get("OPENFABRIC_RAY_CACHE", 1024)))
         self.__partial_outputs = LRUCacheMap(3)
-        self.__reported_partial_outputs = LRUCacheMap(3)
+        self.__partial_listeners = list()
         self.__lock.acquire()
         if self.__instances == 0:
             self.__task = Task()
 
-            # Populate rays on startup
-            for qid in self.__task.all():
+            # Index the rays of tasks created before the ray index existed (done only once)
+            for qid in self.__task.unindexed():
                 ray = PersistenceService.get_asset(qid, 'ray', RaySchemaInst.load)
                 if ray is None:
-                    continue
-                self.__rays[qid] = ray
+                    # Without its ray, the request was created when its input was stored
+                    ray = Ray(qid=qid)
+                    timestamp = PersistenceService.get_asset_timestamp(qid, 'in')
+                    object.__setattr__(ray, 'created_at', datetime.fromtimestamp(timestamp or 0))
+                self.__index(qid, ray)
 
-            self.__worker = threading.Thread(target=self.__process, name="engine", args=())
+            # Only waits for queued requests, the requests being processed run in their own threads
+            self.__worker = threading.Thread(target=self.__process, name="engine", args=(), daemon=True)
             self.__worker.start()
 
         self.__instances = self.__instances + 1
@@ -71,6 +86,8 @@ class Engine:
     def __process(self):
         self.__running = True
         while self.__running:
+            # Wait for a free worker before taking the next request
+            self.__slots.acquire()
             self.__lock.acquire()
             self.__current_qid = None
             while self.__running and self.__task.empty():
@@ -83,7 +100,19 @@ class Engine:
                 self.__lock.release()
 
             if self.__running and self.__current_qid is not None:
-                self.process(self.__current_qid)
+                threading.Thread(target=self.__process_slot, name=f"engine_{self.__current_qid}",
+                                 args=(self.__current_qid,)).start()
+            else:
+                self.__slots.release()
+
+    # ------------------------------------------------------------------------
+    def __process_slot(self, qid: str):
+        try:
+            self.process(qid)
+        except Exception as e:
+            logger.error(f"Openfabric - failed processing {qid}: {e}")
+        finally:
+            self.__slots.release()
 
     # ------------------------------------------------------------------------
     def prepare(self, supervisor: Supervisor, data: str, qid=None, sid=None, uid=None, rid=None) -> str:
@@ -98,6 +127,7 @@ class Engine:
 
         PersistenceService.set_asset(qid, 'ray', ray, RaySchemaInst.dump)
         PersistenceService.set_asset(qid, 'in', data)
+        self.__index(qid, ray)
 
         self.__supervisor = supervisor
         self.__task.add(qid)
@@ -107,27 +137,52 @@ class Engine:
 
     # ------------------------------------------------------------------------
     def ray(self, qid: str) -> Ray:
-        if self.__rays.get(qid) is None:
-            ray = Ray(qid=qid)
+        with self.__rays_lock:
+            ray = self.__rays.get(qid)
+            if ray is not None:
+                self.__rays.move_to_end(qid)
+                return ray
+
+            ray = PersistenceService.get_asset(qid, 'ray', RaySchemaInst.load)
+            if ray is None:
+                ray = Ray(qid=qid)
             self.__rays[qid] = ray
-        return self.__rays[qid]
+            self.__evict(qid)
+            return ray
+
+    # ------------------------------------------------------------------------
+    def update(self, ray: Ray) -> Ray:
+        current = self.ray(ray.qid)
+        current.update(ray)
+        self.__index(ray.qid, current)
+        return current
+
+    # ------------------------------------------------------------------------
+    def rays(self, criteria=None, uid: str = None) -> List[Ray]:
+        return self.pending_rays(criteria, uid)
 
     # ------------------------------------------------------------------------
-    def rays(self, criteria=None) -> List[Ray]:
+    def pending_rays(self, criteria=None, uid: str = None) -> List[Ray]:
+        # The index narrows down the candidates and gives the creation order,
+        # the criteria is only evaluated on the rays of the requested user
         rays: List[Ray] = []
-        for qid, ray in self.__rays.items():
-            if criteria is None or criteria(ray):
+        for qid in self.__task.find(uid):
+            ray = self.__peek(qid)
+            if ray is not None and (criteria is None or criteria(ray)):
                 rays.append(ray)
         return rays
 
     # ------------------------------------------------------------------------
-    def pending_rays(self, criteria=None) -> List[Ray]:
+    def page_rays(self, uid: str, start_date: datetime = None, end_date: datetime = None, status: str = None,
+                  after: Tuple[float, str] = None, limit: int = 0,
+                  descending: bool = False) -> Tuple[List[Ray], Optional[Tuple[float, str]]]:
+        qids, following = self.__task.page(uid, start_date, end_date, status, after, limit, descending)
         rays: List[Ray] = []
-        for qid, ray in self.__rays.items():
-            if criteria is None or criteria(ray):
+        for qid in qids:
+            ray = self.__peek(qid)
+            if ray is not None:
                 rays.append(ray)
-        rays.sort(key=lambda r: r.created_at)
-        return rays
+        return rays, following
 
     # ------------------------------------------------------------------------
     def process(self, qid):
@@ -139,6 +194,7 @@ class Engine:
         with measure_block_time("Engine::execution_callback_function"):
             ray = self.ray(qid)
             self.__supervisor.execution_callback_function(None, ray)
+            self.__index(qid, ray)
         output = PersistenceService.get_asset(qid, 'out', getSchemaInst('out').load)
         return output
 
@@ -152,16 +208,55 @@ class Engine:
         else:
             self.__supervisor.cancel_execution(ray)
         PersistenceService.drop_assets(qid)
-        self.__rays.pop(qid)
+        with self.__rays_lock:
+            self.__rays.pop(qid, None)
         ray.status = RayStatus.REMOVED
         self.__lock.notify_all()
         self.__lock.release()
         return ray
 
+    # ------------------------------------------------------------------------
+    def __peek(self, qid: str) -> Optional[Ray]:
+        # Read a ray without making it hot, listings must not flush the cache
+        with self.__rays_lock:
+            ray = self.__rays.get(qid)
+        if ray is not None:
+            return ray
+        return PersistenceService.get_asset(qid, 'ray', RaySchemaInst.load)
+
+    # ------------------------------------------------------------------------
+    def __evict(self, keep: str):
+        # The ray just paged in is handed out, its status is only set afterwards
+        excess = len(self.__rays) - self.__rays_limit
+        if excess <= 0:
+            return
+
+        evicted: List[str] = []
+        for qid, ray in self.__rays.items():
+            if len(evicted) == excess:
+                break
+            if qid != keep and ray.status not in self.__active:
+                evicted.append(qid)
+
+        for qid in evicted:
+            del self.__rays[qid]
+
+    # ------------------------------------------------------------------------
+    def __index(self, qid: str, ray: Ray):
+        self.__task.index(qid, ray.uid, ray.created_at, str(ray.status))
+
     # ------------------------------------------------------------------------
     def partial_output(self, qid: str, partial: str):
         logger.debug(f"Openfabric - partial output: {partial}")
         self.__partial_outputs.put(qid, getSchemaInst('out').load(partial, partial=True))
+        for listener in self.__partial_listeners:
+            try:
+                listener(qid)
+            except Exception as e:
+                logger.error(f"Openfabric - partial output listener failed for {qid}: {e}")
+
+    def on_partial_output(self, listener: Callable[[str], None]):
+        self.__partial_listeners.append(listener)
 
     def get_partial_output(self, qid: str):
         return self.__partial_outputs.get(qid)
@@ -169,12 +264,5 @@ class Engine:
     def get_partial_output_ts(self, qid: str):
         return self.__partial_outputs.get_update_timestamp(qid)
 
-    def reported_partial_output(self, qid: str, hash: str):
-        logger.debug(f"Openfabric - reported partial output: {hash}")
-        self.__reported_partial_outputs.put(qid, hash)
-
-    def get_reported_partial_output(self, qid: str):
-        return self.__reported_partial_outputs.get(qid)
-
 
 engine = Engine()
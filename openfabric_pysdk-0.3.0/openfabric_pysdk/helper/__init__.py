@@ -1,3 +1,5 @@
 from .proxy import Proxy
-from .resource_resolver import has_resource_fields, resolve_resources, json_schema_to_marshmallow, resolve_plugins, create_class_from_schema
+from .resource_cache import ResourceCache, resource_cache
+from .async_proxy import AsyncProxy
+from .resource_resolver import has_resource_fields, resolve_resources, json_schema_to_marshmallow, compile_schema, resolve_plugins, create_class_from_schema
 from .plugins import load_plugin_schemas
\ No newline at end of file
@@ -0,0 +1,261 @@
+import asyncio
+import collections
+import json
+import logging
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import socketio
+
+
+#######################################################
+#  AsyncProxy
+#######################################################
+class AsyncProxy:
+    '''
+    asyncio counterpart of Proxy.
+
+    A single socket.io connection carries any number of in-flight requests. Responses are
+    matched to their request by rid, and every handler runs on the event loop, so no locks
+    are needed.
+
+        proxy = AsyncProxy(url, tag)
+        await proxy.connect()
+        outputs = await asyncio.gather(*[proxy.request(data, uid) for data in inputs])
+    '''
+
+    # ------------------------------------------------------------------------
+    def __init__(self, url: str, tag: str = None, ssl_verify=True):
+        '''
+        url: str
+            The URL of the server to connect to.
+        tag: str
+            A tag to identify the proxy.
+        ssl_verify: bool
+            Whether to verify the SSL certificate.
+        '''
+        self.maximum_no_respose_interval = 15  # seconds
+        self.minimum_check_interval = 5  # seconds
+        self.minimum_update_interval = 5  # seconds
+        self.__url = url
+        self.__tag = url if tag is None else tag
+        self.__sio = socketio.AsyncClient(ssl_verify=ssl_verify)
+        self.__checker: Optional[asyncio.Task] = None
+        self.__pending: Dict[str, asyncio.Future] = {}
+        self.__progress: Dict[str, Dict[str, Any]] = {}
+        self.__last_update: Dict[str, datetime] = {}
+        self.__observers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self.__callbacks = collections.defaultdict(list)
+        self.__setup_call_backs()
+
+    # ------------------------------------------------------------------------
+    async def connect(self, connection_timeout=15):
+        await self.__sio.connect(self.__url, transports='websocket', namespaces=["/app"],
+                                 wait_timeout=connection_timeout)
+        if self.__checker is None or self.__checker.done():
+            self.__checker = asyncio.get_running_loop().create_task(self.__check_state())
+        return self
+
+    async def disconnect(self):
+        if self.__checker is not None:
+            self.__checker.cancel()
+            self.__checker = None
+        # The requests in flight fail the same way as when the server drops the connection
+        for rid in list(self.__pending.keys()):
+            self.__fail(rid, ConnectionError(f"{self.__tag}: disconnected before request {rid} completed"))
+        await self.__sio.disconnect()
+
+    def is_connected(self):
+        return self.__sio.connected
+
+    def get_tag(self):
+        return self.__tag
+
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    # ------------------------------------------------------------------------
+    async def request(self, input, uid=None, timeout=None, on_progress: Callable[[Dict[str, Any]], Any] = None):
+        '''
+        Submits a request and waits for its response without blocking the event loop.
+
+        Returns the output of the execution. Raises an Exception if the execution failed, was
+        cancelled or stopped responding, ConnectionError if the connection was lost, and
+        asyncio.TimeoutError if no response arrived within timeout seconds.
+        '''
+        access = True
+        if uid is None:
+            uid = uuid.uuid4().hex
+        rid = uuid.uuid4().hex
+
+        future = asyncio.get_running_loop().create_future()
+        self.__pending[rid] = future
+        self.__last_update[rid] = datetime.now()
+        if on_progress is not None:
+            self.__observers[rid] = on_progress
+
+        data = {}
+        data["body"] = input
+        data["header"] = {"uid": uid, "rid": rid}
+        data = zlib.compress(json.dumps(data).encode('utf-8')), access
+
+        try:
+            await self.__sio.emit('execute', data=data, namespace='/app')
+            response = await asyncio.wait_for(future, timeout)
+        finally:
+            self.__pending.pop(rid, None)
+            self.__progress.pop(rid, None)
+            self.__last_update.pop(rid, None)
+            self.__observers.pop(rid, None)
+
+        ray = response.get("ray", None) or {}
+        status = str(ray.get("status", "")).lower()
+        if status in ("cancelled", "canceled", "failed"):
+            raise Exception(f"{self.__tag}: request {rid} failed or was cancelled!")
+
+        return response.get("output", None)
+
+    # ------------------------------------------------------------------------
+    def progress(self, rid: str) -> Optional[Dict[str, Any]]:
+        return self.__progress.get(rid, None)
+
+    def last_update(self, rid: str) -> Optional[datetime]:
+        return self.__last_update.get(rid, None)
+
+    # ------------------------------------------------------------------------
+    def register(self, action, callback):
+        self.__callbacks[action].append(callback)
+
+    def unregister(self, action, callback):
+        self.__callbacks[action] = [f for f in self.__callbacks[action] if f != callback]
+
+    def __notify(self, action, *args):
+        for callback in self.__callbacks[action]:
+            callback(*args)
+
+    # ------------------------------------------------------------------------
+    async def restore(self, qid: str):
+        await self.__sio.emit('restore', data=qid, namespace='/app')
+
+    async def delete(self, qid: str):
+        await self.__sio.emit('delete', data=qid, namespace='/app')
+
+    async def auth_by_token(self, token: str):
+        await self.__sio.emit('auth_by_token', data=token, namespace='/app')
+
+    # ------------------------------------------------------------------------
+    def __resolve(self, rid, response):
+        future = self.__pending.get(rid, None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def __track(self, rid, progress=None):
+        if rid not in self.__pending:
+            return
+        self.__last_update[rid] = datetime.now()
+        if progress is not None:
+            self.__progress[rid] = progress
+            observer = self.__observers.get(rid, None)
+            if observer is not None:
+                observer(progress)
+
+    def __fail(self, rid, error: Exception):
+        future = self.__pending.get(rid, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+
+    # ------------------------------------------------------------------------
+    async def __check_state(self):
+        # Same policy as Proxy: ask for an update of a silent request, give up on it when it stays silent
+        logging.info(f"{self.__tag}: State checker started")
+        while True:
+            await asyncio.sleep(self.minimum_check_interval)
+
+            now = datetime.now()
+            for rid in list(self.__pending.keys()):
+                last_update = self.__last_update.get(rid, None)
+                if last_update is None:
+                    continue
+                elapsedSinceLastUpdate = (now - last_update).total_seconds()
+                qid = (self.__progress.get(rid, None) or {}).get("qid", None)
+                try:
+                    if elapsedSinceLastUpdate > self.maximum_no_respose_interval:
+                        logging.error(f"{self.__tag}: Execution {rid} is not responding. Cancelling")
+                        self.__fail(rid, Exception(f"{self.__tag}: request {rid} is not responding!"))
+                        if qid is not None:
+                            await self.delete(qid)
+                    elif elapsedSinceLastUpdate > self.minimum_update_interval:
+                        if qid is not None:
+                            logging.info(f"{self.__tag}: Execution {rid} is not responding. Requesting update")
+                            await self.restore(qid)
+                        else:
+                            logging.info(f"{self.__tag}: Execution {rid} is not responding. Queue id not yet available")
+                except Exception:
+                    logging.exception(f"{self.__tag}: Exception in state checker")
+
+    # ------------------------------------------------------------------------
+    def __setup_call_backs(self):
+        @self.__sio.event(namespace='/app')
+        async def connect():
+            logging.info(f"{self.__tag}: Connection established")
+            self.__notify("connected", True)
+
+        @self.__sio.event(namespace='/app')
+        async def connect_error(data):
+            logging.error(f"{self.__tag}: Failed to establish connection")
+
+        @self.__sio.event(namespace='/app')
+        async def disconnect():
+            logging.info(f"{self.__tag}: Disconnected from server")
+            # The responses of the requests in flight would never arrive
+            for rid in list(self.__pending.keys()):
+                self.__fail(rid, ConnectionError(f"{self.__tag}: disconnected before request {rid} completed"))
+            self.__notify("connected", False)
+
+        @self.__sio.event(namespace='/app')
+        async def response(data):
+            response: Dict[str, Any] = data
+            ray = response.get("ray", None) or {}
+            rid = ray.get("rid", None)
+            if rid is not None:
+                self.__track(rid, ray)
+                self.__resolve(rid, response)
+
+            self.__notify("response", data)
+
+        @self.__sio.event(namespace='/app')
+        async def submitted(data):
+            logging.debug(f"{self.__tag}: Data Received [submitted]: {data}")
+            self.__track(data.get("rid", None), data)
+            self.__notify("submitted", data)
+
+        @self.__sio.event(namespace='/app')
+        async def progress(data):
+            logging.debug(f"{self.__tag}: Data Received [progress]: {data}")
+            self.__track(data.get("rid", None), data)
+            self.__notify("progress", data)
+
+        @self.__sio.event(namespace='/app')
+        async def pulse(data):
+            logging.debug(f"{self.__tag}: Data Received [pulse]: {data}")
+            self.__track(data.get("rid", None))
+            self.__notify("pulse", data)
+
+        @self.__sio.event(namespace='/app')
+        async def restore(data):
+            logging.debug(f"{self.__tag}: Data Received [restore]: {data}")
+            response: Dict[str, Any] = data or {}
+            ray = response.get("ray", None) or {}
+            rid = ray.get("rid", None)
+            # A restored execution is complete only when its output is available
+            if rid is not None and response.get("output", None) is not None:
+                self.__track(rid, ray)
+                self.__resolve(rid, response)
+            self.__notify("restore", data)
+
+        @self.__sio.event(namespace='/app')
+        async def error(data):
+            logging.debug(f"{self.__tag}: Data Received [error]: {data}")
+            self.__notify("error", data)
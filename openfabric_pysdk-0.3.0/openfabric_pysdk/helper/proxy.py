@@ -6,7 +6,7 @@ import threading
 import time
 import uuid
 import zlib
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Dict
 
@@ -17,6 +17,8 @@ class Proxy: pass
 
 from deepdiff import Delta
 
+from openfabric_pysdk.utility import JsonPatch
+
 
 class ExecutionResult:
     def __init__(self, proxy: Proxy):
@@ -27,6 +29,9 @@ class ExecutionResult:
         self.last_update = datetime.now()
         self.__result = None
         self.__watch = False
+        # Set once the execution is finished or cancelled, waking up the waiters
+        self.__done = threading.Event()
+        self.__future = Future()
         logging.info(f"Created rid" + str(self.__rid))
 
     def __del__(self):
@@ -55,6 +60,7 @@ class ExecutionResult:
 
         self.__finished = True
         self.cancel()
+        self.__complete()
 
     def on_restore(self, data):
         if data != None and "ray" in data:
@@ -65,6 +71,7 @@ class ExecutionResult:
             self.__result = data["output"]
             self.__finished = True
             self.cancel()
+            self.__complete()
 
     def request_id(self):
         return self.__rid
@@ -104,15 +111,27 @@ class ExecutionResult:
                 self.__progress = {}
             self.__progress["status"] = "CANCELLED"
 
-    def wait(self, timeout=0):
-        remaining = timeout
+        self.__complete()
 
-        while self.__proxy != None and (timeout == 0 or remaining > 0) and self.__finished == False:
-            remaining -= 0.1
-            time.sleep(0.1)
+    def __complete(self):
+        # Resolve the future only once: with the output if finished, cancelled otherwise
+        if not self.__future.done():
+            if self.__finished:
+                self.__future.set_result(self.__result)
+            else:
+                self.__future.cancel()
+                self.__future.set_running_or_notify_cancel()
+        self.__done.set()
 
+    def wait(self, timeout=0):
+        # timeout == 0 waits until the execution is finished or cancelled
+        self.__done.wait(None if timeout == 0 else timeout)
         return self.__finished
 
+    def future(self) -> Future:
+        # concurrent.futures compatible handle, resolved with data() or cancelled
+        return self.__future
+
     def watch(self):
         # If qid is not available, then schedule it when it becomes available
         # Note: this might backfire if progress is sent later for different watch
@@ -125,6 +144,7 @@ class ExecutionResult:
 
     def discard(self):
         self.__finished = True
+        self.__complete()
 
     def data(self):
         return self.__result
@@ -158,6 +178,10 @@ class Proxy:
         self.minimum_check_interval = 5  # seconds
         self.minimum_update_interval = 5  # seconds
         self.__results = {}
+        # rids nobody waits for anymore (timed out or cancelled), their late responses are dropped
+        self.__abandoned: collections.OrderedDict = collections.OrderedDict()
+        self.__abandoned_limit = 1024
+        self.__results_condition: threading.Condition = threading.Condition()
         self.__executions = {}
         self.__url = url
         self.__tag = url if tag is None else tag
@@ -206,7 +230,7 @@ class Proxy:
         if hasattr(self, '_Proxy__sio'):
             self.__sio.disconnect()
 
-        Proxy.proxies.remove(self)
+        Proxy.proxies.discard(self)
 
     @staticmethod
     def stop_all():
@@ -377,33 +401,46 @@ class Proxy:
         return self.__pending_responses > 0
 
     def cancel_next(self):
-        self.__cancel_next = True
+        with self.__results_condition:
+            self.__cancel_next = True
+            self.__results_condition.notify_all()
 
-    def get_response(self, rid: str):
+    def get_response(self, rid: str, timeout=None):
         ++self.__pending_responses
-        return self.__get_response(rid)
+        return self.__get_response(rid, timeout)
 
     # TODO: remove
     # TODO: should probably return also the error status
-    def __get_response(self, rid: str):
+    def __get_response(self, rid: str, timeout=None):
         result = None
-        print("Check state of rid: ", rid)
-        while rid not in self.__results and not self.__cancel_next:
-            # TODO: Given that we use a limited number of executors
-            # per proxy, we should define a timeout.
-            time.sleep(0.1)
-
-        if self.__cancel_next:
-            print("Canceled rid: ", rid)
-        else:
-            print("Got response for rid: ", rid)
-            result = self.__results.pop(rid)
+        logging.debug(f"{self.__tag}: Check state of rid: {rid}")
+        with self.__results_condition:
+            # Woken up by the response handler, no polling
+            received = self.__results_condition.wait_for(lambda: rid in self.__results or self.__cancel_next,
+                                                         timeout)
+
+            if self.__cancel_next:
+                logging.debug(f"{self.__tag}: Canceled rid: {rid}")
+                self.__abandon(rid)
+            elif not received:
+                logging.debug(f"{self.__tag}: Timed out rid: {rid}")
+                self.__abandon(rid)
+            else:
+                logging.debug(f"{self.__tag}: Got response for rid: {rid}")
+                result = self.__results.pop(rid)
 
-        self.__cancel_next = False
+            self.__cancel_next = False
         --self.__pending_responses
 
         return result
 
+    def __abandon(self, rid: str):
+        # Called with the results condition held
+        self.__results.pop(rid, None)
+        self.__abandoned[rid] = None
+        while len(self.__abandoned) > self.__abandoned_limit:
+            self.__abandoned.popitem(last=False)
+
     def register(self, action, callback, context=None):
         self.__callbacks[action].append((callback, context))
 
@@ -467,6 +504,14 @@ class Proxy:
         def connect_error(data):
             logging.error(f"{self.__tag}: Failed to establish connection")
 
+        @self.__sio.event(namespace='/app')
+        def capabilities(data):
+            logging.debug(f"{self.__tag}: Data Received [capabilities]: {data}")
+            # Partial outputs come as patches once we tell the app we apply them
+            if isinstance(data, dict) and data.get("patch", False) is True:
+                self.__sio.emit('capabilities', data={"patch": True}, namespace='/app')
+            self.__notify("capabilities", data)
+
         @self.__sio.event(namespace='/app')
         def response(data):
             response: Dict[str, Any] = data
@@ -477,7 +522,13 @@ class Proxy:
                     # TODO: would be good to store results only for known/recent requests
                     #       in order to avoid a case with faulty server sending bad data
                     if "output" in response:
-                        self.__results[rid] = (response["output"])
+                        with self.__results_condition:
+                            if rid in self.__abandoned:
+                                # The waiter gave up on it, nobody would ever pop it
+                                self.__abandoned.pop(rid)
+                            else:
+                                self.__results[rid] = (response["output"])
+                                self.__results_condition.notify_all()
 
             self.__lock.acquire()
             if rid is not None and rid in self.__executions:
@@ -533,10 +584,16 @@ class Proxy:
 
                     current = {} if refresh == True else self.__partials.get(qid, None)
 
-                    delta = Delta(output["delta"])
-
-                    # Update object
-                    self.__partials[qid] = delta + current
+                    # Update object, older apps send deltas instead of patches
+                    try:
+                        if "patch" in output:
+                            self.__partials[qid] = JsonPatch.apply(current, output["patch"])
+                        else:
+                            self.__partials[qid] = Delta(output["delta"]) + current
+                    except Exception as e:
+                        logging.warning(f"{self.__tag}: Failed to apply partial update for {qid}: {e}")
+                        self.reset_watch(qid)
+                        return
 
                     self.__active_watch_hash = new_hash
                     # We will pass as additional information to the user the qid
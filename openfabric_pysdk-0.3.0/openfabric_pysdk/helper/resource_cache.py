@@ -0,0 +1,198 @@
+import collections
+import os
+import shutil
+import threading
+import uuid
+from typing import Optional, OrderedDict
+
+from openfabric_pysdk.logger import logger
+from openfabric_pysdk.utility.resource_util import ResourceUtil
+
+
+#######################################################
+#  Resource cache
+#######################################################
+class ResourceCache:
+    '''
+    Content addressed cache of the resources fetched from Openfabric apps.
+
+    The reid of a resource is '{name}/{location}', where name ends with the hash of the
+    content. The same blob therefore always has the same name, whichever execution produced
+    it, and the name alone is used as key. Entries live in a memory LRU bounded in bytes,
+    backed by a disk tier (also LRU, bounded in bytes) that survives restarts. The disk
+    index is rebuilt on first use, importing the module does not touch the disk.
+    '''
+
+    # ------------------------------------------------------------------------
+    def __init__(self, location: str, memory_limit: int, disk_limit: int):
+        self.__location = location
+        self.__memory_limit = memory_limit
+        self.__disk_limit = disk_limit
+        self.__memory: OrderedDict[str, bytes] = collections.OrderedDict()
+        self.__memory_size = 0
+        self.__disk: OrderedDict[str, int] = collections.OrderedDict()
+        self.__disk_size = 0
+        self.__lock: threading.RLock = threading.RLock()
+        self.__loaded = False
+
+    # ------------------------------------------------------------------------
+    def get(self, reid: str) -> Optional[bytes]:
+        key = ResourceUtil.key(reid)
+        if key is None:
+            return None
+
+        with self.__lock:
+            data = self.__memory.get(key, None)
+            if data is not None:
+                self.__memory.move_to_end(key)
+                return data
+
+        path = self.path(reid)
+        if path is None:
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        self.__remember(key, data)
+        return data
+
+    # ------------------------------------------------------------------------
+    def path(self, reid: str) -> Optional[str]:
+        key = ResourceUtil.key(reid)
+        if key is None:
+            return None
+
+        with self.__lock:
+            self.__load()
+            if key not in self.__disk:
+                return None
+            self.__disk.move_to_end(key)
+
+        path = f"{self.__location}/{key}"
+        try:
+            # Keep the recency across restarts, the index is rebuilt from mtime
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    # ------------------------------------------------------------------------
+    def put(self, reid: str, data: bytes):
+        key = ResourceUtil.key(reid)
+        if key is None or data is None:
+            return
+
+        data = bytes(data)
+        self.__remember(key, data)
+
+        with self.__lock:
+            self.__load()
+            if key in self.__disk:
+                return
+
+        self.__store(key, len(data), lambda f: f.write(data))
+
+    # ------------------------------------------------------------------------
+    def put_file(self, reid: str, path: str):
+        key = ResourceUtil.key(reid)
+        if key is None:
+            return
+
+        with self.__lock:
+            self.__load()
+            if key in self.__disk:
+                return
+
+        with open(path, 'rb') as source:
+            self.__store(key, os.fstat(source.fileno()).st_size, lambda f: shutil.copyfileobj(source, f))
+
+    # ------------------------------------------------------------------------
+    def clear(self):
+        with self.__lock:
+            self.__load()
+            self.__memory.clear()
+            self.__memory_size = 0
+            while len(self.__disk) > 0:
+                self.__evict_disk()
+
+    # ------------------------------------------------------------------------
+    def __remember(self, key: str, data: bytes):
+        size = len(data)
+        if size > self.__memory_limit:
+            return
+
+        with self.__lock:
+            if key in self.__memory:
+                self.__memory.move_to_end(key)
+                return
+            self.__memory[key] = data
+            self.__memory_size += size
+            while self.__memory_size > self.__memory_limit:
+                _key, _data = self.__memory.popitem(last=False)
+                self.__memory_size -= len(_data)
+
+    # ------------------------------------------------------------------------
+    def __store(self, key: str, size: int, write):
+        if size > self.__disk_limit:
+            return
+
+        # Write to a temporary file first, readers never see a partial entry
+        tmp = f"{self.__location}/.{key}.{uuid.uuid4().hex}"
+        try:
+            os.makedirs(self.__location, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                write(f)
+            os.replace(tmp, f"{self.__location}/{key}")
+        except OSError as e:
+            logger.warning(f"Could not cache resource {key}: {e}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+
+        with self.__lock:
+            if key not in self.__disk:
+                self.__disk[key] = size
+                self.__disk_size += size
+            while self.__disk_size > self.__disk_limit:
+                self.__evict_disk()
+
+    # ------------------------------------------------------------------------
+    def __evict_disk(self):
+        _key, _size = self.__disk.popitem(last=False)
+        self.__disk_size -= _size
+        try:
+            os.remove(f"{self.__location}/{_key}")
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------------
+    def __load(self):
+        # Called under the lock
+        if self.__loaded:
+            return
+        self.__loaded = True
+        if not os.path.isdir(self.__location):
+            return
+
+        # Rebuild the disk index, least recently used first
+        entries = []
+        for entry in os.scandir(self.__location):
+            if entry.is_file() and ResourceUtil.key(entry.name) is not None:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+        for _mtime, key, size in sorted(entries):
+            self.__disk[key] = size
+            self.__disk_size += size
+
+        while self.__disk_size > self.__disk_limit:
+            self.__evict_disk()
+
+
+resource_cache = ResourceCache(location=f"{os.getcwd()}/datastore/cache",
+                               memory_limit=int(os.environ.get("OPENFABRIC_RESOURCE_CACHE_MEMORY", 256 * 1024 * 1024)),
+                               disk_limit=int(os.environ.get("OPENFABRIC_RESOURCE_CACHE_DISK", 2 * 1024 * 1024 * 1024)))
@@ -1,14 +1,24 @@
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field as dataclass_field
 from marshmallow import Schema, fields, class_registry, missing, ValidationError
-import io
+import hashlib
+import json
 import logging
 import requests
 import os
 import importlib.util
+import threading
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+from requests.adapters import HTTPAdapter
 
 
 from openfabric_pysdk.fields import Resource, DecimalField, PluginField
+from openfabric_pysdk.helper.resource_cache import resource_cache
+from openfabric_pysdk.store.lru import LRU
+from openfabric_pysdk.utility.tracking_util import TrackedDict, TrackedList, TrackedObject
 
 def get_schema_field_types(schema: Schema, path: str = "") -> Dict[str, type]:
     field_types = {}
@@ -67,8 +77,9 @@ def find_values_by_type(json_obj: Any, expected_types: Dict[str, type], target_t
 
     return matches
 
-def get_resource_paths(json_obj: Any, schema: Schema) -> List[Tuple[str, str]]:
-    expected_types = get_schema_field_types(schema)
+def get_resource_paths(json_obj: Any, schema: Schema, expected_types: Optional[Dict[str, type]] = None) -> List[Tuple[str, str]]:
+    if expected_types is None:
+        expected_types = get_schema_field_types(schema)
     return find_values_by_type(json_obj, expected_types, Resource)
 
 def get_object_by_path(obj: Any, path: str) -> Any:
@@ -133,15 +144,68 @@ def set_object_by_path(obj: Any, path: str, value: Any) -> None:
             else:
                 raise KeyError(f"Invalid path: {path}")
 
-def fetch_data(url, params=None, headers=None, timeout=120):
+# Maximum number of resources downloaded at the same time by resolve_resources
+fetch_workers = max(1, int(os.environ.get("OPENFABRIC_FETCH_WORKERS", 8)))
+
+# Shared session: keeps the connections to the apps alive between downloads
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=fetch_workers, pool_maxsize=fetch_workers))
+_session.mount("https://", HTTPAdapter(pool_connections=fetch_workers, pool_maxsize=fetch_workers))
+
+def fetch_data(url, params=None, headers=None, timeout=120, path=None, reid=None):
+    # Returns the content of the resource, or with a path, downloads it there and returns the path.
+    # None when the resource could not be fetched.
+    if reid is None:
+        reid = (params or {}).get("reid", None) or parse_qs(urlparse(url).query).get("reid", [None])[0]
+
+    # Reids are content addressed, a cached blob is always up to date
+    if path is None:
+        data = resource_cache.get(reid)
+        if data is not None:
+            return data
+    else:
+        cached_path = resource_cache.path(reid)
+        if cached_path is not None:
+            def copy(file):
+                with open(cached_path, "rb") as cached:
+                    shutil.copyfileobj(cached, file)
+            return _write_file(path, copy)
+
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        return io.BytesIO(response.content).getvalue()
+        with _session.get(url, params=params, headers=headers, timeout=timeout, stream=path is not None) as response:
+            response.raise_for_status()
+            if path is None:
+                resource_cache.put(reid, response.content)
+                return response.content
+
+            # Streamed to disk, the file only shows up once complete
+            def stream(file):
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    file.write(chunk)
+            if _write_file(path, stream) is None:
+                return None
     except requests.RequestException as e:
         logging.error(f"Error fetching data: {e}")
         return None
 
+    resource_cache.put_file(reid, path)
+    return path
+
+def _write_file(path, write):
+    # Written next to the destination and renamed over it: a failed download leaves nothing behind
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb") as file:
+            write(file)
+        os.replace(tmp_path, path)
+        return path
+    except (OSError, requests.RequestException) as e:
+        logging.error(f"Error writing {path}: {e}")
+        return None
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 def has_resource_fields(schema: Schema):
     expected_types = get_schema_field_types(schema)
     for path, value in expected_types.items():
@@ -149,16 +213,39 @@ def has_resource_fields(schema: Schema):
             return True
     return False
 
-def resolve_resources(app_url_pattern: str, json_obj: Any, schema: Schema):
+def resolve_resources(app_url_pattern: str, json_obj: Any, schema: Schema, expected_types: Optional[Dict[str, type]] = None,
+                      download_dir: Optional[str] = None):
     cached = schema.load(json_obj, partial=True)
-    paths = get_resource_paths(json_obj, schema)
+    paths = get_resource_paths(json_obj, schema, expected_types)
 
+    pending: Dict[str, List[str]] = {}
     for path, resource in paths:
         # we'll assume that if the value of a resource is set, it was already fetched
         # so we won't fetch it again, as the hash matches.
         if resource != None and get_object_by_path(cached, path) == None:
-            url = app_url_pattern.format(reid=resource)
-            set_object_by_path(cached, path, fetch_data(url))
+            pending.setdefault(resource, []).append(path)
+
+    if len(pending) == 0:
+        return cached
+
+    # With a download_dir, the resource fields hold the paths of the downloaded files
+    def fetch(resource):
+        url = app_url_pattern.format(reid=resource)
+        if download_dir is None:
+            return fetch_data(url, reid=resource)
+        return fetch_data(url, path=os.path.join(download_dir, resource.replace("/", "_")), reid=resource)
+
+    if download_dir is not None:
+        os.makedirs(download_dir, exist_ok=True)
+
+    # Each distinct reid is downloaded once, all of them in parallel
+    resources = list(pending.keys())
+    with ThreadPoolExecutor(max_workers=min(fetch_workers, len(resources))) as executor:
+        blobs = list(executor.map(fetch, resources))
+
+    for resource, blob in zip(resources, blobs):
+        for path in pending[resource]:
+            set_object_by_path(cached, path, blob)
 
     return cached
 
@@ -240,14 +327,52 @@ def create_schema_from_definition(class_name, schema, definitions):
     return schema_class
 
 def json_schema_to_marshmallow(json_schema):
-    schemas = {}
-    class_name = json_schema.get("$ref", "").replace("#/definitions/", "")
-    definitions = json_schema.get("definitions", {})
+    return compile_schema(json_schema).schema_class
+
+#######################################################
+#  Compiled schemas
+#######################################################
+class CompiledSchema:
+    def __init__(self, class_name: str, schemas: Dict[str, type]):
+        self.schemas = schemas
+        self.schema_class = schemas[class_name]
+        self.schema = self.schema_class()
+        self.field_types = get_schema_field_types(self.schema)
+        self.resource_paths = [path for path, value in self.field_types.items() if value == Resource]
+        self.has_resources = len(self.resource_paths) > 0
+
+    def register(self):
+        # Nested fields are resolved by name, so a schema compiled later under the same
+        # definition name must not shadow ours. Only re-register what was overwritten.
+        for schema_name, schema_class in self.schemas.items():
+            registered = class_registry._registry.get(schema_name, [])
+            if registered != [schema_class]:
+                if schema_name in class_registry._registry:
+                    del class_registry._registry[schema_name]
+                class_registry.register(schema_name, schema_class)
+
+_compiled_schemas = LRU(64)
+_compiled_schemas_lock = threading.Lock()
+
+def compile_schema(json_schema) -> CompiledSchema:
+    key = hashlib.sha256(json.dumps(json_schema, sort_keys=True).encode('utf-8')).hexdigest()
+
+    with _compiled_schemas_lock:
+        compiled: CompiledSchema = _compiled_schemas.get(key)
+        if compiled is None:
+            schemas = {}
+            class_name = json_schema.get("$ref", "").replace("#/definitions/", "")
+            definitions = json_schema.get("definitions", {})
+
+            for schema_name, definition in definitions.items():
+                schemas[schema_name] = create_schema_from_definition(schema_name, definition, definitions)
+
+            compiled = CompiledSchema(class_name, schemas)
+            _compiled_schemas.put(key, compiled)
+        else:
+            compiled.register()
 
-    for schema_name, json_schema in definitions.items():
-        schemas[schema_name] = create_schema_from_definition(schema_name, json_schema, definitions)
-    
-    return schemas[class_name]
+    return compiled
 
 def load_schemas_from_folder(folder_path):
     loaded_schemas = {}
@@ -320,11 +445,11 @@ def create_class_from_schema(schema, class_name):
                 if isinstance(field, fields.List):
                     if isinstance(field.inner, fields.Nested):
                         nested_class = create_class(field.inner.schema, f"{class_name}_{key}")
-                        default_value = dataclass_field(default_factory=lambda: [nested_class()])
+                        default_value = dataclass_field(default_factory=lambda: TrackedList([nested_class()]))
                     else:
-                        default_value = dataclass_field(default_factory=list)
+                        default_value = dataclass_field(default_factory=TrackedList)
                 elif isinstance(field, fields.Dict):
-                    default_value = dataclass_field(default_factory=dict)
+                    default_value = dataclass_field(default_factory=TrackedDict)
                 elif isinstance(field, fields.String):
                     default_value = ""
                 elif isinstance(field, fields.Integer):
@@ -347,6 +472,7 @@ def create_class_from_schema(schema, class_name):
             annotations[key] = get_python_type(field)
 
         attrs['__annotations__'] = annotations
-        return dataclass(type(class_name, (object,), attrs))
+        # Tracked, so that the changes can be detected from the version of the instance
+        return dataclass(type(class_name, (TrackedObject,), attrs))
 
     return create_class(schema, class_name)
\ No newline at end of file
@@ -1,11 +1,50 @@
+import collections
 import hashlib
-from typing import Any, Union
+import os
+import threading
+from typing import Any, Callable, Optional, OrderedDict, Tuple, Union
+
+from openfabric_pysdk.logger import logger
+
+
+# ------------------------------------------------------------------------
+def _resource_hasher(name: str) -> Callable[[bytes], str]:
+    # The digest names the resource: 64 hex characters, 32 for xxh3
+    if name == 'blake2b':
+        return lambda data: hashlib.blake2b(data, digest_size=32).hexdigest()
+    if name == 'blake3':
+        try:
+            import blake3
+            return lambda data: blake3.blake3(data).hexdigest()
+        except ImportError:
+            logger.warning("Openfabric - blake3 is not installed, hashing resources with sha256")
+    elif name == 'xxh3':
+        try:
+            import xxhash
+            return lambda data: xxhash.xxh3_128_hexdigest(data)
+        except ImportError:
+            logger.warning("Openfabric - xxhash is not installed, hashing resources with sha256")
+    elif name != 'sha256':
+        logger.warning(f"Openfabric - unknown resource hash {name}, using sha256")
+    return lambda data: hashlib.sha256(data).hexdigest()
 
 
 #######################################################
 #  Hash service
 #######################################################
 class HashService:
+    # Hash of the resources, sha256 by default. blake2b, blake3 and xxh3 are faster, xxh3 is not
+    # cryptographic: only use it when the resources can't be crafted to collide.
+    __resource_hash = _resource_hasher(os.environ.get("OPENFABRIC_RESOURCE_HASH", "sha256"))
+    # Hashes of the large resources (64 KiB and more), keyed on their id, least recently used evicted first.
+    # Memory cost: str and bytes can't be weakly referenced, so the memo holds a strong reference to each
+    # value, which keeps its id from being reused by another object. The memoized values stay alive until
+    # evicted, up to OPENFABRIC_RESOURCE_HASH_MEMO bytes (16 MiB by default, 0 disables the memo).
+    __memo: OrderedDict[int, Tuple[Union[str, bytes], str]] = collections.OrderedDict()
+    __memo_size: int = 0
+    __memo_limit: int = int(os.environ.get("OPENFABRIC_RESOURCE_HASH_MEMO", 16 * 1024 * 1024))
+    __memo_min: int = 64 * 1024
+    __memo_lock: threading.Lock = threading.Lock()
 
     # ------------------------------------------------------------------------
     @staticmethod
@@ -30,7 +69,37 @@ class HashService:
         if obj is None:
             return None
 
-        if isinstance(obj, str):
-            return hashlib.sha256(obj.encode()).hexdigest()
+        # Only immutable values are memoized, the content of a bytearray may change under the same id
+        memoized = type(obj) in (str, bytes) and HashService.__memo_min <= len(obj) <= HashService.__memo_limit
+        if memoized:
+            digest = HashService.__recall(obj)
+            if digest is not None:
+                return digest
 
-        return hashlib.sha256(obj).hexdigest()
\ No newline at end of file
+        digest = HashService.__resource_hash(obj.encode() if isinstance(obj, str) else obj)
+        if memoized:
+            HashService.__remember(obj, digest)
+        return digest
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __recall(obj: Union[str, bytes]) -> Optional[str]:
+        with HashService.__memo_lock:
+            entry = HashService.__memo.get(id(obj), None)
+            if entry is None or entry[0] is not obj:
+                return None
+            HashService.__memo.move_to_end(id(obj))
+            return entry[1]
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __remember(obj: Union[str, bytes], digest: str):
+        with HashService.__memo_lock:
+            previous = HashService.__memo.pop(id(obj), None)
+            if previous is not None:
+                HashService.__memo_size -= len(previous[0])
+            HashService.__memo[id(obj)] = (obj, digest)
+            HashService.__memo_size += len(obj)
+            while HashService.__memo_size > HashService.__memo_limit:
+                _id, (evicted, _digest) = HashService.__memo.popitem(last=False)
+                HashService.__memo_size -= len(evicted)
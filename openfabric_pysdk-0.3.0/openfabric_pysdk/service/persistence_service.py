@@ -1,77 +1,205 @@
+import atexit
 import os
 import json
-import shutil
+import threading
+import time
 
 from pathlib import Path
-from typing import Any, Callable, Literal
+from typing import Any, Callable, Dict, Literal, Optional, Tuple
 
 from marshmallow import INCLUDE
 
 from openfabric_pysdk.logger import logger
+from openfabric_pysdk.service.resource_service import ResourceService
+from openfabric_pysdk.store.asset_store import open_asset_store
+from openfabric_pysdk.store.lru import LRU
 
 #######################################################
 #  Property service
 #######################################################
 class PersistenceService:
+    '''
+    Stores the assets of the executions, by default in 'executions/<qid>/<key>.json'. With
+    OPENFABRIC_PERSISTENCE_BACKEND=sqlite, they are all kept in a single database instead.
+
+    Writes are behind: set_asset only encodes the asset, a background thread writes it out once the
+    write window is over. Successive writes of the same asset within the window are coalesced, and
+    the pending writes are visible to get_asset meanwhile. Each asset is replaced atomically.
+    The other processes only see the assets once written: call flush(qid) before handing over an
+    execution to them.
+
+    Parsed assets are cached, and checked against the store before being reused: the data
+    returned by get_asset is shared, don't modify it.
+    '''
     __path = f"{os.getcwd()}/datastore"
+    __backend = os.environ.get("OPENFABRIC_PERSISTENCE_BACKEND", "files")
+    __store = None
+    # Seconds during which writes are held back, 0 to write synchronously
+    __window = float(os.environ.get("OPENFABRIC_PERSISTENCE_WINDOW", 0.25))
+    # (qid, key) -> (encoded asset, time of the write), the batch being written stays readable
+    __pending: Dict[Tuple[str, str], Tuple[str, float]] = dict()
+    __flushing: Dict[Tuple[str, str], Tuple[str, float]] = dict()
+    __lock = threading.Condition()
+    # Held while writing to disk, so that a flush returns once everything is actually written
+    __io_lock = threading.RLock()
+    __flusher: Optional[threading.Thread] = None
+    # (qid, key) -> (stamp of the asset, parsed asset)
+    __cache = LRU(int(os.environ.get("OPENFABRIC_PERSISTENCE_CACHE", 256)))
+
     # ------------------------------------------------------------------------
     @staticmethod
     def set_store_path(path: str):
         if not os.path.exists(path):
             os.makedirs(path)
 
-        PersistenceService.__path = path
+        PersistenceService.flush()
+        with PersistenceService.__io_lock:
+            if PersistenceService.__store is not None:
+                PersistenceService.__store.close()
+                PersistenceService.__store = None
+            PersistenceService.__path = path
 
     @staticmethod
     def get_asset_timestamp(qid: str, key: Literal['in', 'out', 'ray']):
-        asset_path = os.path.join(PersistenceService.__path, "executions", qid, str(key) + ".json")
-        if not os.path.exists(asset_path):
-            return None
+        pending = PersistenceService.__overlay(qid, key)
+        if pending is not None:
+            return pending[1]
+
+        return PersistenceService.__open().timestamp(qid, key)
 
-        return os.path.getmtime(asset_path)
-    
     @staticmethod
     def get_asset(qid: str, key: Literal['in', 'out', 'ray'], deserializer: Callable[[Any], Any] = None) -> Any:
-        asset_path = os.path.join(PersistenceService.__path, "executions", qid, str(key) + ".json")
+        try:
+            data = PersistenceService.__parsed(qid, key)
+            if data is None:
+                return None
 
-        if not os.path.exists(asset_path):
+            return deserializer(data) if deserializer is not None else data
+        except Exception as e:
+            logger.error(f"Failed to read asset: {qid}/{key}. \n Reason: {e}")
             return None
 
+    @staticmethod
+    def set_asset(qid: str, key: Literal['in', 'out', 'ray'], data: str, serializer: Callable[[Any], Any] = None):
         try:
-            with open(asset_path, 'r') as file:
-                data = file.read()
+            # Encoded right away: the caller may change the data once we return
+            encoded = '' if data is None else json.dumps(serializer(data) if serializer is not None else data)
+        except Exception as e:
+            logger.error(f"Failed to write asset: {qid}/{key}. \n Reason: {e}")
+            return None
 
-                if data is None:
-                    return None
+        if PersistenceService.__window <= 0:
+            with PersistenceService.__io_lock:
+                PersistenceService.__open().write({(qid, str(key)): (encoded, time.time())})
+                with PersistenceService.__lock:
+                    PersistenceService.__forget(qid, key)
+            return
 
-                data = json.loads(data)
+        with PersistenceService.__lock:
+            PersistenceService.__pending[(qid, str(key))] = (encoded, time.time())
+            PersistenceService.__forget(qid, key)
+            if PersistenceService.__flusher is None:
+                PersistenceService.__flusher = threading.Thread(target=PersistenceService.__flush_loop,
+                                                                name="persistence_flusher", daemon=True)
+                PersistenceService.__flusher.start()
+            PersistenceService.__lock.notify()
 
-                return deserializer(data) if deserializer is not None else data
-        except Exception as e:
-            logger.error(f"Failed to read asset: {asset_path}. \n Reason: {e}")
+    @staticmethod
+    def flush(qid: str = None):
+        # Write out the pending assets, of an execution or all of them
+        with PersistenceService.__io_lock:
+            with PersistenceService.__lock:
+                batch = {asset: pending for asset, pending in PersistenceService.__pending.items()
+                         if qid is None or asset[0] == qid}
+                if len(batch) == 0:
+                    return
+                for asset in batch:
+                    PersistenceService.__pending.pop(asset)
+                # Readable until written, as in the flush loop
+                PersistenceService.__flushing = batch
+            try:
+                PersistenceService.__open().write(batch)
+            finally:
+                with PersistenceService.__lock:
+                    PersistenceService.__flushing = dict()
+
+    @staticmethod
+    def drop_assets(qid: str):
+        with PersistenceService.__io_lock:
+            with PersistenceService.__lock:
+                for asset in [asset for asset in PersistenceService.__pending if asset[0] == qid]:
+                    PersistenceService.__pending.pop(asset)
+                for key in ('in', 'out', 'ray'):
+                    PersistenceService.__forget(qid, key)
+            # The blobs of the resources are shared, only those no longer linked are removed
+            ResourceService.drop(qid)
+            PersistenceService.__open().drop(qid)
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __parsed(qid: str, key: str) -> Any:
+        # Pending writes are stamped with their time, stored assets by the store
+        pending = PersistenceService.__overlay(qid, key)
+        store = PersistenceService.__open()
+        stamp = ('pending', pending[1]) if pending is not None else store.stamp(qid, key)
+        if stamp is None:
             return None
-    
+
+        with PersistenceService.__lock:
+            cached = PersistenceService.__cache.get((qid, str(key)), None)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        data = pending[0] if pending is not None else store.read(qid, key)
+        # Empty when None was stored
+        data = json.loads(data) if data else None
+        with PersistenceService.__lock:
+            PersistenceService.__cache.put((qid, str(key)), (stamp, data))
+        return data
+
     @staticmethod
-    def set_asset(qid: str, key: Literal['in', 'out', 'ray'], data: str, serializer: Callable[[Any], Any] = None):
-        asset_path = os.path.join(PersistenceService.__path, "executions", qid, str(key) + ".json")
-        os.makedirs(os.path.dirname(asset_path), exist_ok=True)
+    def __forget(qid: str, key: str):
+        if PersistenceService.__cache.get((qid, str(key)), None) is not None:
+            PersistenceService.__cache.rem((qid, str(key)))
 
-        try:
+    @staticmethod
+    def __overlay(qid: str, key: str) -> Optional[Tuple[str, float]]:
+        asset = (qid, str(key))
+        with PersistenceService.__lock:
+            pending = PersistenceService.__pending.get(asset, None)
+            return pending if pending is not None else PersistenceService.__flushing.get(asset, None)
 
-            with open(asset_path, 'w') as file:
-                if data is None:
-                    return
+    @staticmethod
+    def __open():
+        store = PersistenceService.__store
+        if store is not None:
+            return store
+        with PersistenceService.__io_lock:
+            if PersistenceService.__store is None:
+                PersistenceService.__store = open_asset_store(PersistenceService.__path, PersistenceService.__backend)
+            return PersistenceService.__store
 
-                file.write(json.dumps(serializer(data) if serializer is not None else data))
-        except Exception as e:
-            logger.error(f"Failed to write asset: {asset_path}. \n Reason: {e}")
-            return None
-        
     @staticmethod
-    def drop_assets(qid: str):
-        asset_path = os.path.join(PersistenceService.__path, "executions", qid)
-        if os.path.exists(asset_path):
-            try:
-                shutil.rmtree(asset_path)
-            except Exception as e:
-                logger.error(f"Failed to delete assets: {asset_path}. \n Reason: {e}")
+    def __flush_loop():
+        while True:
+            with PersistenceService.__lock:
+                while len(PersistenceService.__pending) == 0:
+                    PersistenceService.__lock.wait()
+
+            # Let the writes of the window accumulate, then write them in one batch
+            time.sleep(PersistenceService.__window)
+
+            with PersistenceService.__io_lock:
+                with PersistenceService.__lock:
+                    PersistenceService.__flushing = PersistenceService.__pending
+                    PersistenceService.__pending = dict()
+                try:
+                    PersistenceService.__open().write(PersistenceService.__flushing)
+                except Exception as e:
+                    logger.error(f"Failed to write assets. \n Reason: {e}")
+                finally:
+                    with PersistenceService.__lock:
+                        PersistenceService.__flushing = dict()
+
+
+atexit.register(PersistenceService.flush)
@@ -1,9 +1,20 @@
+import contextlib
+import contextvars
 import magic
 import os
+import shutil
 import threading
-from typing import Any, Optional
+import uuid
+from typing import Any, Iterator, Optional, Tuple
 
 from openfabric_pysdk.logger import logger
+from openfabric_pysdk.store.lru import LRU
+
+# Mime type of a resource, kept in an extended attribute of the file: shared by its hard links
+MIME_ATTRIBUTE = "user.openfabric.mime"
+
+# Where the resources being serialized are written, per thread (greenlet under gevent)
+_store_location: contextvars.ContextVar = contextvars.ContextVar("store_location", default="resources")
 
 
 #######################################################
@@ -11,25 +22,38 @@ from openfabric_pysdk.logger import logger
 #######################################################
 class ResourceService:
     __path = f"{os.getcwd()}/datastore"
-    __store_location = "resources"
-    __lock: threading.RLock = threading.RLock()
+    __blob_location = "blobs"
+    # libmagic handles can't be shared between threads without a lock, it also guards the mime cache
+    __magic = magic.Magic(mime=True)
+    __magic_lock: threading.Lock = threading.Lock()
+    __mimes: LRU = LRU(4096)
 
 
     @staticmethod
-    def lock(executionId: str):
-        ResourceService.__lock.acquire()
-        if executionId is not None:
-            ResourceService.__store_location = f"executions/{executionId}"
+    @contextlib.contextmanager
+    def location(executionId: Optional[str]) -> Iterator[None]:
+        # Resources serialized within the block are written to the execution, concurrent dumps don't interfere
+        token = _store_location.set(f"executions/{executionId}" if executionId is not None else "resources")
+        try:
+            yield
+        finally:
+            _store_location.reset(token)
+
 
+    # ------------------------------------------------------------------------
     @staticmethod
-    def unlock():
-        ResourceService.__store_location = "resources"
-        ResourceService.__lock.release()
+    def read(reid: Any):
+        path, mime = ResourceService.locate(reid)
+        if path is None:
+            return None, None
 
+        with open(f"{path}", 'rb') as f:
+            return f.read(), mime
 
     # ------------------------------------------------------------------------
     @staticmethod
-    def read(reid: Any):
+    def locate(reid: Any) -> Tuple[Optional[str], Optional[str]]:
+        # Path and mime type of the resource, without reading it
         parts = reid.split('/')
         location = ""
         if len(parts) > 1:
@@ -45,35 +69,146 @@ class ResourceService:
         relative_path = "/".join(parts)
 
         path = f"{ResourceService.__path}/{relative_path}"
-        
-        # TODO: Should we return a failure instead of an empty file
-        if not os.path.exists(f"{path}"):
-            logger.warning(f"Resource not found: {reid}")
+        if not os.path.realpath(path).startswith(os.path.realpath(f"{ResourceService.__path}/{location}") + os.sep):
+            logger.error(f"Invalid resource: {reid}")
             return None, None
 
-        mime = "application/json" if parts[-1].endswith(".json") else magic.Magic(mime=True).from_file(f"{path}")
+        # A failure rather than an empty file: the caller answers with a 404, never a blank resource.
+        # Only files are resources, not the directory of an execution.
+        if not os.path.isfile(path):
+            logger.warning(f"Resource not found: {reid}")
+            return None, None
 
-        with open(f"{path}", 'rb') as f:
-            return f.read(), mime
+        return path, ResourceService.__mime(path)
 
     # ------------------------------------------------------------------------
     @staticmethod
     def write(data: Any, resource_hash: str, resource_type: str, resource_encoding: str) -> Optional[str]:
-        ResourceService.__lock.acquire()
+        if data is None:
+            # Nothing to serialize for this entry.
+            return None
+
+        name = f"{resource_type}_{resource_encoding}_{resource_hash}"
+        location = _store_location.get()
+        path = f"{ResourceService.__path}/{location}/{name}"
+        # Same name, same content: a resource is written once
+        if not os.path.exists(path):
+            # The blob is written again when dropped with another execution in the meantime
+            for _attempt in range(3):
+                if ResourceService.__place(ResourceService.__blob(name, data), path):
+                    break
+            else:
+                raise OSError(f"Failed to write resource: {name}/{location}")
+        return f"{name}/{location}"
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def drop(executionId: str):
+        # Unlinks the resources of the execution, and the blobs no other execution links to
+        location = f"{ResourceService.__path}/executions/{executionId}"
         try:
-            if data is None:
-                # Nothing to serialize for this entry.
-                return None
+            entries = list(os.scandir(location))
+        except OSError:
+            return
 
-            if not os.path.exists(f"{ResourceService.__path}/{ResourceService.__store_location}"):
-                os.makedirs(f"{ResourceService.__path}/{ResourceService.__store_location}")
+        for entry in entries:
+            blob = f"{ResourceService.__path}/{ResourceService.__blob_location}/{entry.name}"
+            try:
+                if os.path.samefile(entry.path, blob):
+                    os.remove(entry.path)
+                # Copies don't hold on the blob either
+                if os.stat(blob).st_nlink == 1:
+                    os.remove(blob)
+            except OSError:
+                # Not a resource, or already removed
+                continue
 
-            # Ensure data is in bytes format
-            if isinstance(data, str):
-                data = data.encode('utf-8')
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __blob(name: str, data: Any) -> str:
+        # Content store shared by the executions, the resources are linked from there
+        blob = f"{ResourceService.__path}/{ResourceService.__blob_location}/{name}"
+        if os.path.exists(blob):
+            return blob
 
-            with open(f"{ResourceService.__path}/{ResourceService.__store_location}/{resource_type}_{resource_encoding}_{resource_hash}", 'wb') as f:
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        # Ensure data is in bytes format
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+
+        tmp = f"{blob}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
                 f.write(data)
-            return f"{resource_type}_{resource_encoding}_{resource_hash}/{ResourceService.__store_location}"
+            # Sniffed once, while the content is at hand
+            ResourceService.__save_mime(tmp, ResourceService.__sniff(data))
+            os.replace(tmp, blob)
         finally:
-            ResourceService.__lock.release()
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return blob
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __place(source: str, path: str) -> bool:
+        # Hard link when the file system allows it, copy otherwise, renamed in place either way.
+        # False when the source is gone.
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            try:
+                os.link(source, tmp)
+            except FileNotFoundError:
+                return False
+            except OSError:
+                # With its extended attributes, the mime type
+                shutil.copy2(source, tmp)
+            os.replace(tmp, path)
+            return True
+        except FileNotFoundError:
+            return False
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __mime(path: str) -> str:
+        if path.endswith(".json"):
+            return "application/json"
+
+        with ResourceService.__magic_lock:
+            mime = ResourceService.__mimes.get(path, None)
+        if mime is not None:
+            return mime
+
+        try:
+            mime = os.getxattr(path, MIME_ATTRIBUTE).decode()
+        except (AttributeError, OSError):
+            mime = None
+
+        if not mime:
+            # Written before mime types were saved, by hand, copied, or no extended attributes here
+            with ResourceService.__magic_lock:
+                mime = ResourceService.__magic.from_file(path)
+            ResourceService.__save_mime(path, mime)
+
+        with ResourceService.__magic_lock:
+            ResourceService.__mimes.put(path, mime)
+        return mime
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __sniff(data: bytes) -> str:
+        # The head of the content is enough to recognize the formats
+        with ResourceService.__magic_lock:
+            return ResourceService.__magic.from_buffer(data[:65536])
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __save_mime(path: str, mime: str):
+        try:
+            os.setxattr(path, MIME_ATTRIBUTE, mime.encode())
+        except (AttributeError, OSError) as e:
+            # Not supported by the platform or the file system, sniffed again by each process
+            logger.debug(f"Could not save the mime type of {path}: {e}")
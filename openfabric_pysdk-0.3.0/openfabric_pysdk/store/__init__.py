@@ -1,3 +1,4 @@
 from openfabric_pysdk.store.kvdb import KeyValueDB
 from openfabric_pysdk.store.lru import LRU
 from openfabric_pysdk.store.store import Store
+from openfabric_pysdk.store.asset_store import FileAssetStore, SqliteAssetStore, open_asset_store
@@ -0,0 +1,168 @@
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+
+from openfabric_pysdk.logger import logger
+
+# (qid, key) -> (encoded asset, time of the write)
+Assets = Dict[Tuple[str, str], Tuple[str, float]]
+
+
+#######################################################
+#  File asset store
+#######################################################
+class FileAssetStore:
+    '''
+    One json file per asset, in 'executions/<qid>/<key>.json'.
+    '''
+
+    # ------------------------------------------------------------------------
+    def __init__(self, path: str):
+        self.__path = path
+
+    # ------------------------------------------------------------------------
+    def read(self, qid: str, key: str) -> Optional[str]:
+        asset_path = self.__asset_path(qid, key)
+        if not os.path.exists(asset_path):
+            return None
+        with open(asset_path, 'r') as file:
+            return file.read()
+
+    # ------------------------------------------------------------------------
+    def timestamp(self, qid: str, key: str) -> Optional[float]:
+        asset_path = self.__asset_path(qid, key)
+        if not os.path.exists(asset_path):
+            return None
+        return os.path.getmtime(asset_path)
+
+    # ------------------------------------------------------------------------
+    def stamp(self, qid: str, key: str) -> Optional[Tuple[int, int, int]]:
+        # Assets are replaced by a rename, each write gives a new inode
+        try:
+            stat = os.stat(self.__asset_path(qid, key))
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    # ------------------------------------------------------------------------
+    def write(self, assets: Assets):
+        for (qid, key), (encoded, _ts) in assets.items():
+            # Written next to the asset and renamed over it, readers never see a partial file
+            asset_path = self.__asset_path(qid, key)
+            tmp_path = f"{asset_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                os.makedirs(os.path.dirname(asset_path), exist_ok=True)
+                with open(tmp_path, 'w') as file:
+                    file.write(encoded)
+                os.replace(tmp_path, asset_path)
+            except Exception as e:
+                logger.error(f"Failed to write asset: {asset_path}. \n Reason: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    # ------------------------------------------------------------------------
+    def drop(self, qid: str):
+        _drop_directory(os.path.join(self.__path, "executions", qid))
+
+    # ------------------------------------------------------------------------
+    def close(self):
+        pass
+
+    # ------------------------------------------------------------------------
+    def __asset_path(self, qid: str, key: str) -> str:
+        return os.path.join(self.__path, "executions", qid, str(key) + ".json")
+
+
+#######################################################
+#  Sqlite asset store
+#######################################################
+class SqliteAssetStore:
+    '''
+    All the assets in a single 'executions.db' database, keyed by (qid, key), with the time of
+    the write kept next to them. Shared by the processes of the app, WAL keeps readers and the
+    writer apart.
+    '''
+
+    # ------------------------------------------------------------------------
+    def __init__(self, path: str):
+        self.__path = path
+        os.makedirs(path, exist_ok=True)
+
+        # One connection shared by the threads of the process, serialized by the lock
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(f"{path}/executions.db", check_same_thread=False, isolation_level=None,
+                                    timeout=30)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute("PRAGMA synchronous=NORMAL")
+        self.__db.execute("CREATE TABLE IF NOT EXISTS assets ("
+                          "qid TEXT NOT NULL, "
+                          "key TEXT NOT NULL, "
+                          "data TEXT NOT NULL, "
+                          "modified REAL NOT NULL, "
+                          "PRIMARY KEY (qid, key)) WITHOUT ROWID")
+
+    # ------------------------------------------------------------------------
+    def read(self, qid: str, key: str) -> Optional[str]:
+        with self.__lock:
+            row = self.__db.execute("SELECT data FROM assets WHERE qid = ? AND key = ?", (qid, str(key))).fetchone()
+        return None if row is None else row[0]
+
+    # ------------------------------------------------------------------------
+    def timestamp(self, qid: str, key: str) -> Optional[float]:
+        with self.__lock:
+            row = self.__db.execute("SELECT modified FROM assets WHERE qid = ? AND key = ?",
+                                    (qid, str(key))).fetchone()
+        return None if row is None else row[0]
+
+    # ------------------------------------------------------------------------
+    def stamp(self, qid: str, key: str) -> Optional[float]:
+        return self.timestamp(qid, key)
+
+    # ------------------------------------------------------------------------
+    def write(self, assets: Assets):
+        # A batch is a single transaction
+        with self.__lock:
+            try:
+                self.__db.execute("BEGIN")
+                self.__db.executemany("INSERT INTO assets (qid, key, data, modified) VALUES (?, ?, ?, ?) "
+                                      "ON CONFLICT (qid, key) DO UPDATE SET "
+                                      "data = excluded.data, modified = excluded.modified",
+                                      [(qid, str(key), encoded, ts) for (qid, key), (encoded, ts) in assets.items()])
+                self.__db.execute("COMMIT")
+            except Exception as e:
+                logger.error(f"Failed to write assets: {list(assets.keys())}. \n Reason: {e}")
+                if self.__db.in_transaction:
+                    self.__db.execute("ROLLBACK")
+
+    # ------------------------------------------------------------------------
+    def drop(self, qid: str):
+        with self.__lock:
+            self.__db.execute("DELETE FROM assets WHERE qid = ?", (qid,))
+        # The resources of the execution still live in its directory
+        _drop_directory(os.path.join(self.__path, "executions", qid))
+
+    # ------------------------------------------------------------------------
+    def close(self):
+        with self.__lock:
+            self.__db.close()
+
+
+# ------------------------------------------------------------------------
+def _drop_directory(path: str):
+    if os.path.exists(path):
+        try:
+            shutil.rmtree(path)
+        except Exception as e:
+            logger.error(f"Failed to delete assets: {path}. \n Reason: {e}")
+
+
+# ------------------------------------------------------------------------
+def open_asset_store(path: str, backend: str = 'files'):
+    if backend == 'sqlite':
+        return SqliteAssetStore(path)
+    if backend != 'files':
+        logger.warning(f"Openfabric - unknown asset store backend {backend}, using files")
+    return FileAssetStore(path)
@@ -1,7 +1,10 @@
 import os
 import queue
+import sqlite3
+import threading
+from datetime import datetime
 from enum import Enum
-from typing import List, Any
+from typing import List, Optional, Tuple
 
 from openfabric_pysdk.logger import logger
 from openfabric_pysdk.store import Store
@@ -25,68 +28,174 @@ class TaskType(Enum):
 #  Task
 #######################################################
 class Task:
-    __tasks: queue.Queue = None
-    __store: Store = None
+    __path: str = None
+    __db: sqlite3.Connection = None
+    __lock: threading.Lock = None
 
     # ------------------------------------------------------------------------
-    def __init__(self):
-        self.__tasks = queue.Queue()
-        self.__store = Store(path=f"{os.getcwd()}/datastore", autodump=True)
-        pending_tasks = self.__load(TaskType.QUEUED)
-        if pending_tasks:
+    def __init__(self, path: str = None):
+        self.__path = f"{os.getcwd()}/datastore" if path is None else path
+        if not os.path.exists(self.__path):
+            os.makedirs(self.__path)
+
+        db_path = f"{self.__path}/tasks.db"
+        created = not os.path.exists(db_path)
+
+        # One connection shared by the engine threads, serialized by the lock
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.__db.execute("PRAGMA journal_mode=WAL")
+        self.__db.execute("PRAGMA synchronous=NORMAL")
+        # seq aliases the rowid: it grows with every insert, which gives the queue order for free
+        self.__db.execute("CREATE TABLE IF NOT EXISTS tasks ("
+                          "seq INTEGER PRIMARY KEY, "
+                          "qid TEXT NOT NULL UNIQUE, "
+                          "status TEXT NOT NULL)")
+        self.__db.execute("CREATE INDEX IF NOT EXISTS tasks_status_seq ON tasks (status, seq)")
+        # Compact index of the rays, so that they can be listed without loading them
+        self.__db.execute("CREATE TABLE IF NOT EXISTS rays ("
+                          "qid TEXT PRIMARY KEY, "
+                          "uid TEXT, "
+                          "created_at REAL NOT NULL, "
+                          "status TEXT)")
+        self.__db.execute("CREATE INDEX IF NOT EXISTS rays_uid_created_at ON rays (uid, created_at, qid)")
+        self.__db.execute("CREATE INDEX IF NOT EXISTS rays_uid_status_created_at ON rays (uid, status, created_at, qid)")
+
+        if created:
+            self.__migrate()
+
+        pending_tasks = self.__count(TaskType.QUEUED)
+        if pending_tasks > 0:
             logger.info(f"Openfabric - restore pre-existing tasks: {pending_tasks}")
-            [self.__tasks.put(sid) for sid in pending_tasks]
 
     # ------------------------------------------------------------------------
     def __del__(self):
-        self.__tasks = queue.Queue()
+        if self.__db is not None:
+            self.__db.close()
 
     # ------------------------------------------------------------------------
     def empty(self) -> bool:
-        return self.__tasks.empty()
+        with self.__lock:
+            row = self.__db.execute("SELECT 1 FROM tasks WHERE status = ? LIMIT 1",
+                                    (str(TaskType.QUEUED),)).fetchone()
+        return row is None
 
     # ------------------------------------------------------------------------
     def next(self) -> str:
-        tid = self.__tasks.get(False)
-        self.__save(TaskType.QUEUED, list(self.__tasks.queue))
-        self.__append(TaskType.COMPLETED, tid)
-        return tid
+        with self.__lock:
+            row = self.__db.execute("SELECT seq, qid FROM tasks WHERE status = ? ORDER BY seq LIMIT 1",
+                                    (str(TaskType.QUEUED),)).fetchone()
+            if row is None:
+                raise queue.Empty()
+            self.__db.execute("UPDATE tasks SET status = ? WHERE seq = ?", (str(TaskType.COMPLETED), row[0]))
+        return row[1]
 
     # ------------------------------------------------------------------------
     def add(self, tid: str):
-        self.__tasks.put(tid)
-        self.__save(TaskType.QUEUED, list(self.__tasks.queue))
-        self.__append(TaskType.REQUESTED, tid)
+        with self.__lock:
+            # Re-adding a known task queues it again, at the end of the queue
+            self.__db.execute("INSERT OR REPLACE INTO tasks (qid, status) VALUES (?, ?)",
+                              (tid, str(TaskType.QUEUED)))
 
     # ------------------------------------------------------------------------
     def rem(self, tid: str):
-        self.__remove(TaskType.REQUESTED, tid)
-        self.__remove(TaskType.COMPLETED, tid)
+        with self.__lock:
+            self.__db.execute("BEGIN")
+            self.__db.execute("DELETE FROM tasks WHERE qid = ?", (tid,))
+            self.__db.execute("DELETE FROM rays WHERE qid = ?", (tid,))
+            self.__db.execute("COMMIT")
 
     # ------------------------------------------------------------------------
-    def all(self):
-        return list(
-            set(
-                self.__load(TaskType.COMPLETED, list()) +
-                self.__load(TaskType.REQUESTED, list()) +
-                self.__load(TaskType.QUEUED, list())
-            )
-        )
+    def all(self) -> List[str]:
+        with self.__lock:
+            return [row[0] for row in self.__db.execute("SELECT qid FROM tasks ORDER BY seq")]
 
     # ------------------------------------------------------------------------
-    def __append(self, task_type: TaskType, tid: str):
-        entries: List[str] = self.__load(task_type, list())
-        entries.append(tid)
-        self.__save(task_type, entries)
-
-    def __remove(self, task_type: TaskType, tid: str):
-        entries: List[str] = self.__load(task_type, list())
-        if tid in entries:
-            entries.remove(tid)
-        self.__save(task_type, entries)
-
-    def __save(self, task_type: TaskType, value: Any):
-        self.__store.set(STATE, str(task_type), value)
-
-    def __load(self, task_type: TaskType, default=None):
-        return self.__store.get(STATE, str(task_type), default)
+    def index(self, tid: str, uid: Optional[str], created_at: datetime, status: str):
+        with self.__lock:
+            self.__db.execute("INSERT INTO rays (qid, uid, created_at, status) VALUES (?, ?, ?, ?) "
+                              "ON CONFLICT (qid) DO UPDATE SET "
+                              "uid = excluded.uid, created_at = excluded.created_at, status = excluded.status",
+                              (tid, uid, created_at.timestamp(), status))
+
+    # ------------------------------------------------------------------------
+    def unindexed(self) -> List[str]:
+        with self.__lock:
+            return [row[0] for row in self.__db.execute("SELECT tasks.qid FROM tasks "
+                                                        "LEFT JOIN rays ON rays.qid = tasks.qid "
+                                                        "WHERE rays.qid IS NULL")]
+
+    # ------------------------------------------------------------------------
+    def find(self, uid: Optional[str] = None) -> List[str]:
+        # Served by rays_uid_created_at, oldest first
+        with self.__lock:
+            if uid is None:
+                rows = self.__db.execute("SELECT qid FROM rays ORDER BY created_at, qid")
+            else:
+                rows = self.__db.execute("SELECT qid FROM rays WHERE uid = ? ORDER BY created_at, qid", (uid,))
+            return [row[0] for row in rows]
+
+    # ------------------------------------------------------------------------
+    def page(self, uid: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             status: Optional[str] = None, after: Optional[Tuple[float, str]] = None,
+             limit: int = 0, descending: bool = False) -> Tuple[List[str], Optional[Tuple[float, str]]]:
+        # Keyset pagination over (created_at, qid): each page is a range scan of one of the uid indexes,
+        # whatever its position. Returns the qids of the page and the key to continue from, if any.
+        clauses = ["uid = ?"]
+        params: list = [uid]
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if start is not None:
+            clauses.append("created_at >= ?")
+            params.append(start.timestamp())
+        if end is not None:
+            clauses.append("created_at <= ?")
+            params.append(end.timestamp())
+        if after is not None:
+            clauses.append("(created_at, qid) < (?, ?)" if descending else "(created_at, qid) > (?, ?)")
+            params.extend(after)
+
+        order = "DESC" if descending else "ASC"
+        query = f"SELECT created_at, qid FROM rays WHERE {' AND '.join(clauses)} " \
+                f"ORDER BY created_at {order}, qid {order}"
+        if limit > 0:
+            # One more row tells whether there is a next page
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self.__lock:
+            rows = self.__db.execute(query, params).fetchall()
+
+        following = None
+        if 0 < limit < len(rows):
+            rows = rows[:limit]
+            following = (rows[-1][0], rows[-1][1])
+        return [row[1] for row in rows], following
+
+    # ------------------------------------------------------------------------
+    def __count(self, task_type: TaskType) -> int:
+        with self.__lock:
+            return self.__db.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (str(task_type),)).fetchone()[0]
+
+    # ------------------------------------------------------------------------
+    def __migrate(self):
+        # Import the lists kept in state.json by previous versions, queued tasks last to keep their order
+        if not os.path.exists(f"{self.__path}/{STATE}.json"):
+            return
+
+        store = Store(path=self.__path, cache_size=0)
+        queued: List[str] = store.get(STATE, str(TaskType.QUEUED), list())
+        history: List[str] = store.get(STATE, str(TaskType.REQUESTED), list()) + \
+                             store.get(STATE, str(TaskType.COMPLETED), list())
+        pending = set(queued)
+
+        with self.__lock:
+            self.__db.execute("BEGIN")
+            self.__db.executemany("INSERT OR IGNORE INTO tasks (qid, status) VALUES (?, ?)",
+                                  [(tid, str(TaskType.COMPLETED)) for tid in history if tid not in pending])
+            self.__db.executemany("INSERT OR REPLACE INTO tasks (qid, status) VALUES (?, ?)",
+                                  [(tid, str(TaskType.QUEUED)) for tid in queued])
+            self.__db.execute("COMMIT")
+
+        logger.info(f"Openfabric - migrated {len(queued)} queued and {len(history)} past tasks from {STATE}.json")
@@ -1,8 +1,9 @@
+import os
 import uuid
 from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Optional
 
-from flask import Response, jsonify, make_response, request
+from flask import Response, jsonify, make_response, request, send_file
 from marshmallow import ValidationError, fields
 
 from openfabric_pysdk.engine import engine
@@ -10,6 +11,7 @@ from openfabric_pysdk.flask.rest import *
 from openfabric_pysdk.loader import *
 from openfabric_pysdk.service.resource_service import ResourceService
 from openfabric_pysdk.transport import ResourceDescriptor
+from openfabric_pysdk.utility.resource_util import ResourceUtil
 from .rest_api import WebApi
 
 
@@ -61,17 +63,42 @@ class ResourceApi(WebApi):
     def get(self, reid: str) -> Any:
         self.check_user()
 
-        content, mime = ResourceService.read(reid)
-        if content is None:
+        # Named after the hash of their content, such resources never change: the name is their etag
+        etag = ResourceUtil.key(reid)
+
+        # A client holding the etag of an immutable resource has its current content, no need to look at the disk
+        if etag is not None and self.__revalidated(etag):
+            response = make_response('', 304)
+            self.__cache_headers(response, etag)
+            return response
+
+        path, mime = ResourceService.locate(reid)
+        if path is None:
             response = make_response({"error": "File not found"}, 404)
             response.headers['Cache-Control'] = 'no-store, must-revalidate'  # Prevent caching
         else:
-            response = make_response(content)
-            response.mimetype = mime if mime is not None else 'text/plain'
-            response.headers['Cache-Control'] = 'public, max-age=86400, must-revalidate'
-            response.headers['CDN-Cache-Control'] = 'no-store'  # Prevent Cloudflare caching
-            response.headers['CF-Cache-Status'] = 'BYPASS'  # Ensure Cloudflare does not cache
-            response.headers['Expires'] = (datetime.utcnow() + timedelta(days=1)).strftime("%a, %d %b %Y %H:%M:%S GMT")
-            response.headers['ETag'] = reid  # Ensures client-side cache validation
-            response.headers['Last-Modified'] = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+            # Streamed from the file (sendfile when the server supports it), with Range requests support.
+            # Other resources get a validator from the file, conditional requests are answered from it.
+            response = send_file(path, mimetype=mime if mime is not None else 'text/plain', conditional=True,
+                                 etag=etag if etag is not None else True, last_modified=os.path.getmtime(path))
+            self.__cache_headers(response, etag)
         return response
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __revalidated(etag: str) -> bool:
+        # Only the etag proves the client holds this content. A date doesn't, the resource may not even
+        # exist: If-Modified-Since is left to send_file, once the resource is located.
+        return request.if_none_match.contains_weak(etag)
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __cache_headers(response: Response, etag: Optional[str]):
+        if etag is not None:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            response.headers['Expires'] = (datetime.utcnow() + timedelta(days=365)).strftime("%a, %d %b %Y %H:%M:%S GMT")
+        else:
+            response.headers['Cache-Control'] = 'public, max-age=0, must-revalidate'
+        response.headers['CDN-Cache-Control'] = 'no-store'  # Prevent Cloudflare caching
+        response.headers['CF-Cache-Status'] = 'BYPASS'  # Ensure Cloudflare does not cache
@@ -1,5 +1,8 @@
+import base64
+import json
 import uuid
 from datetime import datetime
+from typing import Tuple
 from marshmallow import fields, ValidationError
 from flask import request, jsonify
 
@@ -20,7 +23,17 @@ from .rest_api import WebApi
 #######################################################
 class PaginatedRaySchema(Schema):
     rays = fields.Nested(RaySchema, many=True, default=[])
-    next_cursor = fields.Integer(allow_none=True, default=None)
+    next_cursor = fields.String(allow_none=True, default=None)
+
+
+# Cursors are opaque to the clients: the (created_at, qid) key of the last ray of the previous page
+def encode_cursor(key: Tuple[float, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps([key[0], key[1]]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    created_at, qid = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return float(created_at), str(qid)
 
 
 class QueueGetApi(WebApi):
@@ -62,10 +75,11 @@ class QueueListApi(WebApi):
         'start_date': fields.DateTime(missing=None),
         'end_date': fields.DateTime(missing=datetime.now),
         'limit': fields.Integer(missing=0),
-        'cursor': fields.String(missing=None)
+        'cursor': fields.String(missing=None),
+        'status': fields.String(missing=None)
     }, location='query')
     @marshal_with(PaginatedRaySchema)
-    def get(self, start_date: datetime, end_date: datetime, limit: int, cursor: str, *args):
+    def get(self, start_date: datetime, end_date: datetime, limit: int, cursor: str, status: str, *args):
         uid = self.check_user()
         headers = request.headers
         requeste_uid = headers.get("uid", uid)
@@ -73,51 +87,25 @@ class QueueListApi(WebApi):
         if requeste_uid is None:
             return {'rays': [], 'next_cursor': None}
 
-        cursor_index = 0
+        after = None
         if cursor is not None:
             try:
-                cursor_index = int(cursor)
+                after = decode_cursor(cursor)
             except (ValueError, TypeError):
-                logger.warning(f"Invalid cursor value: {cursor}. Defaulting cursor_index to 0.")
-                cursor_index = 0
-
-        def criteria(ray: Ray):
-            if ray is None:
-                return False
-            if requeste_uid != None and ray.uid != requeste_uid:
-                return False
-            if start_date is not None and ray.created_at < start_date:
-                return False
-            if end_date is not None and ray.created_at > end_date:
-                return False
-            return True
-
-        available_rays = engine.pending_rays(criteria)
-
-        if start_date is not None:
-            available_rays.sort(key=lambda r: r.created_at)
-        else:
-            available_rays.sort(key=lambda r: r.created_at, reverse=True)
-
-        total_count = len(available_rays)
-        cursor_index = max(0, min(cursor_index, total_count))
-        remaining_rays = available_rays[cursor_index:]
-
-        if limit != 0 and limit < len(remaining_rays):
-            result_rays = remaining_rays[:limit]
-        else:
-            result_rays = remaining_rays
-
-        next_cursor = None
-        if 0 < limit == len(result_rays) and cursor_index + limit < total_count:
-            next_cursor = cursor_index + limit
-
-        if start_date is None:
+                logger.warning(f"Invalid cursor value: {cursor}. Starting from the first page.")
+                after = None
+
+        # Without a start date the latest rays come first, each page is still returned oldest first
+        descending = start_date is None
+        result_rays, following = engine.page_rays(requeste_uid, start_date=start_date, end_date=end_date,
+                                                  status=status.upper() if status else None, after=after,
+                                                  limit=max(0, limit), descending=descending)
+        if descending:
             result_rays = list(reversed(result_rays))
 
         return {
             'rays': result_rays,
-            'next_cursor': next_cursor
+            'next_cursor': encode_cursor(following) if following is not None else None
         }
 
 
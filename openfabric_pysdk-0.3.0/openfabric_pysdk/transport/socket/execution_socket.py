@@ -1,4 +1,4 @@
-from typing import Dict, Literal, Set
+from typing import Any, Dict, Literal, Set
 
 from openfabric_pysdk.app import Supervisor
 from openfabric_pysdk.flask.core import Webserver, request
@@ -14,7 +14,7 @@ from openfabric_pysdk.transport.socket.handlers.execute import ExecuteController
 from openfabric_pysdk.transport.socket.handlers.restore import RestoreController
 from openfabric_pysdk.transport.socket.handlers.resume import ResumeController
 from openfabric_pysdk.transport.socket.handlers.state import StateController
-from openfabric_pysdk.transport.socket.handlers.watch import WatchController
+from openfabric_pysdk.transport.socket.handlers.watch import PartialBroadcaster, WatchController
 
 from openfabric_pysdk.auth import session_manager, session_link
 
@@ -25,7 +25,7 @@ from openfabric_pysdk.auth import session_manager, session_link
 class ExecutionSocket(Namespace):
     __supervisor: Supervisor = None
     __sessions: Set[str] = None
-    __watchers: Dict[str, str] = None
+    __broadcaster: PartialBroadcaster = None
     __webserver: Webserver = None
     __sioserver: SocketIOServer = None
 
@@ -33,7 +33,7 @@ class ExecutionSocket(Namespace):
     def __init__(self, webserver: Webserver, descriptor: ResourceDescriptor):
         super().__init__(descriptor.endpoint)
         self.__sessions = set()
-        self.__watchers = dict()
+        self.__broadcaster = PartialBroadcaster(self)
         self.__supervisor = descriptor.app
         self.__webserver = webserver
 
@@ -86,12 +86,12 @@ class ExecutionSocket(Namespace):
     # ------------------------------------------------------------------------
     def on_watch(self, qid: str):
         if self.is_authorized(request.sid):
-            WatchController(self.__supervisor, self, self.__sessions, self.__watchers).send_partial(qid)
+            WatchController(self.__supervisor, self, self.__sessions, self.__broadcaster).send_partial(qid)
 
     # ------------------------------------------------------------------------
     def on_reset_watch(self, qid: str):
         if self.is_authorized(request.sid):
-            WatchController(self.__supervisor, self, self.__sessions, self.__watchers).reset_partial(qid)
+            WatchController(self.__supervisor, self, self.__sessions, self.__broadcaster).reset_partial(qid)
 
     # ------------------------------------------------------------------------
     def on_state(self, uid: str):
@@ -118,6 +118,12 @@ class ExecutionSocket(Namespace):
         session_link.unregister_session(sid)
         logger.debug(f'Openfabric - client disconnected {sid} on {request.host}')
         self.__sessions.remove(sid)
+        self.__broadcaster.disconnect(sid)
+
+    # ------------------------------------------------------------------------
+    def on_capabilities(self, capabilities: Dict[str, Any]):
+        # Capabilities of the client, answering ours
+        self.__broadcaster.accept(request.sid, capabilities)
 
     # ------------------------------------------------------------------------
     def on_challenge(self, challenge: Dict[str, str]):
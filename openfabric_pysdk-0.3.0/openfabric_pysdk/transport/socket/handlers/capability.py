@@ -17,7 +17,9 @@ class CapabilityController:
     __namespace: Namespace = None
     __supervisor: Supervisor = None
     __capabilities = {
-        "assets": True
+        "assets": True,
+        # Partial outputs as JSON patches, for the clients answering with the same capability
+        "patch": True
     }
 
     def __init__(self, supervisor: Supervisor, namespace: Namespace, sessions: Set[str]):
@@ -42,6 +42,6 @@ class ResumeController:
                 return True
 
             # Filter rays
-            rays = self.__engine.pending_rays(criteria)
+            rays = self.__engine.pending_rays(criteria, uid=uid)
             for ray in rays:
                 self.__namespace.emit('progress', RaySchemaInst.dump(ray), room=sid)
@@ -1,13 +1,8 @@
-import copy
-import json
+import threading
 import time
-from typing import Dict, Set
-
-import gevent
+from typing import Any, Dict, Optional, Set
 
 from openfabric_pysdk.app import Supervisor
-from openfabric_pysdk.benchmark import measure_block_time
-from openfabric_pysdk.context import Ray, RaySchema
 from openfabric_pysdk.context.ray_schema import RaySchemaInst
 from openfabric_pysdk.engine import engine as _engine
 from openfabric_pysdk.engine.engine import Engine
@@ -15,122 +10,198 @@ from openfabric_pysdk.flask.core import request
 from openfabric_pysdk.flask.socket import Namespace
 from openfabric_pysdk.loader import getSchemaInst
 from openfabric_pysdk.logger import logger
-from openfabric_pysdk.service import PersistenceService
-from openfabric_pysdk.utility import JsonUtil
+from openfabric_pysdk.utility import JsonTracker, JsonUtil
 
 from openfabric_pysdk.service.resource_service import ResourceService
 
 
 #################################################
-#  WatchController
+#  PartialBroadcaster
 #################################################
-class WatchController:
+class PartialBroadcaster:
+    '''
+    Pushes the partial outputs of the executions to the sockets watching them.
+
+    The engine notifies the broadcaster for every partial output it receives. The patch from the
+    previously sent output is computed once per execution and emitted to every watcher of it.
+    A watcher that is not in sync yet (new watcher, or reset requested) gets a refresh instead.
+
+    Only the clients announcing the 'patch' capability get patches. The others get the DeepDiff
+    delta they have always been sent, computed once per update too.
+    '''
     __engine: Engine = None
-    __sessions: Set[str] = None
     __namespace: Namespace = None
-    __supervisor: Supervisor = None
     __watchers: Dict[str, str] = None
+    __subscribers: Dict[str, Set[str]] = None
+    __trackers: Dict[str, JsonTracker] = None
+    __patching: Set[str] = None
 
-    last_output_update = -1
-    output_update_ts = None
-    prev_partial_output = None
-
-    def __init__(self, supervisor: Supervisor, namespace: Namespace, sessions: Set[str], watchers: Dict[str, str]):
-        self.__supervisor = supervisor
+    def __init__(self, namespace: Namespace, engine: Engine = _engine):
+        self.__engine = engine
         self.__namespace = namespace
-        self.__sessions = sessions
-        self.__engine = _engine
-        self.__watchers = watchers
+        # sid -> qid, a socket watches at most one execution
+        self.__watchers = dict()
+        # qid -> sids
+        self.__subscribers = dict()
+        # qid -> last output sent
+        self.__trackers = dict()
+        # sids of the clients applying patches
+        self.__patching = set()
+        self.__lock: threading.RLock = threading.RLock()
+        self.__engine.on_partial_output(self.publish)
 
     # --------------------------------------------------------------------------------
-    def reset_partial(self, qid: str):
-        if self.__engine.get_reported_partial_output(qid) is not None:
-            logger.debug(f'Openfabric - clearing partial output for {qid}')
-            self.__engine.reported_partial_output(qid, None)
+    def subscribe(self, sid: str, qid: str):
+        with self.__lock:
+            self.unsubscribe(sid)
+            self.__watchers[sid] = qid
+            self.__subscribers.setdefault(qid, set()).add(sid)
+        logger.info(f"Socket::watch:  {time.time()} {sid}/{qid} started.")
+        self.refresh(sid, qid)
 
     # --------------------------------------------------------------------------------
-    def send_partial(self, qid: str):
-        sid = request.sid
-        self.__watchers[sid] = qid
-        ray = self.__engine.ray(qid)
-
-        logger.info(f"Socket::watch:  {time.time()} {sid}/{qid} started.")
-        self.__engine.reported_partial_output(qid, None)
+    def accept(self, sid: str, capabilities: Dict[str, Any]):
+        with self.__lock:
+            patching = isinstance(capabilities, dict) and capabilities.get("patch", False) is True
+            if patching == (sid in self.__patching):
+                return
+            if patching:
+                self.__patching.add(sid)
+            else:
+                self.__patching.discard(sid)
+            qid = self.__watchers.get(sid, None)
+        # The format changes, start over
+        if qid is not None:
+            self.refresh(sid, qid)
 
-        # Execute in background
-        with measure_block_time("Socket::watch"):
-            while sid in self.__sessions and self.__watchers.get(sid) is qid:
+    # --------------------------------------------------------------------------------
+    def disconnect(self, sid: str):
+        self.unsubscribe(sid)
+        with self.__lock:
+            self.__patching.discard(sid)
 
-                if ray.finished is True:
-                    logger.info(f"Socket::watch: {time.time()} {sid}/{qid} finished - execution ended.")
-                    break
+    # --------------------------------------------------------------------------------
+    def unsubscribe(self, sid: str):
+        with self.__lock:
+            qid = self.__watchers.pop(sid, None)
+            if qid is None:
+                return
+            subscribers = self.__subscribers.get(qid, set())
+            subscribers.discard(sid)
+            if len(subscribers) == 0:
+                self.__subscribers.pop(qid, None)
+                self.__trackers.pop(qid, None)
+        logger.info(f"Socket::watch:  {time.time()} {sid}/{qid} finished - replaced or session finished.")
 
-                # Handle partial  ----------------
-                partial_output = self.__handle_partial(ray)
-                if partial_output is not None:
-                    try:
-                        logger.info(f"Socket::watch: {time.time()} {sid}/{qid} partial.")
-                        self.__namespace.emit('partial', partial_output, room=sid)
-                    except Exception as e:
-                        logger.error(
-                            f"Partial error: \n {e} "
-                            f"\n {partial_output}")
+    # --------------------------------------------------------------------------------
+    def refresh(self, sid: str, qid: str):
+        # Send the last broadcast output as a whole to a single watcher, so that it
+        # can apply the next patch together with the others
+        with self.__lock:
+            if self.__watchers.get(sid) != qid:
+                return
+
+            tracker = self.__trackers.get(qid, None)
+            if tracker is None:
+                current = self.__current(qid)
+                if current is None:
+                    return
+                tracker = self.__trackers[qid] = JsonTracker(current)
+
+            if sid in self.__patching:
+                self.__emit(qid, tracker.snapshot(), True, [sid])
+            else:
+                self.__emit(qid, self.__delta(None, tracker.document), True, [sid])
 
-                gevent.sleep(0.1)
+    # --------------------------------------------------------------------------------
+    def publish(self, qid: str):
+        with self.__lock:
+            subscribers = self.__subscribers.get(qid, None)
+            if not subscribers:
+                return
+
+            current = self.__current(qid)
+            if current is None:
+                return
+
+            tracker = self.__trackers.get(qid, None)
+            refresh = tracker is None
+            previous = None if refresh else tracker.document
+            if refresh:
+                tracker = self.__trackers[qid] = JsonTracker(current)
+                partial = tracker.snapshot()
+            else:
+                partial = tracker.update(current)
+                # Don't send empty object even if change was published by the worker
+                if partial is None:
+                    return
 
-                # TODO: might be worth to periodically send the full
-                #  object to make sure we are in sync?
-                #  or store hash of final object and compare?
+            patching = [sid for sid in subscribers if sid in self.__patching]
+            if len(patching) > 0:
+                self.__emit(qid, partial, refresh, patching)
+            legacy = [sid for sid in subscribers if sid not in self.__patching]
+            if len(legacy) > 0:
+                self.__emit(qid, self.__delta(previous, current), refresh, legacy)
 
-        logger.info(f"Socket::watch:  {time.time()} {sid}/{qid} finished - replaced or session finished.")
+    # --------------------------------------------------------------------------------
+    def __current(self, qid: str) -> Optional[Any]:
+        current = self.__engine.get_partial_output(qid)
+        if current is None:
+            return None
 
-    # ------------------------------------------------------------------------
-    def __handle_partial(self, ray: Ray):
-        qid = ray.qid
+        try:
+            with ResourceService.location(qid):
+                return getSchemaInst('out').dump(current)
+        except BaseException as e:
+            logger.error(f"Openfabric - failed to dump partial output: {e}")
+            return None
 
-        if self.__engine.get_reported_partial_output(qid) is None:
-            self.last_output_update = -1
-            self.prev_partial_output = None
+    # --------------------------------------------------------------------------------
+    @staticmethod
+    def __delta(previous: Optional[Any], current: Any) -> Dict[str, Any]:
+        # A refresh is the delta from an empty output
+        if previous is None:
+            previous = [] if isinstance(current, list) else {}
+        return JsonUtil.find_differences(previous, current)
 
-        self.output_update_ts = self.__engine.get_partial_output_ts(qid)
-        if self.output_update_ts is None or (
-                self.last_output_update is not None and self.output_update_ts == self.last_output_update):
-            return None
+    # --------------------------------------------------------------------------------
+    def __emit(self, qid: str, partial: Dict[str, Any], refresh: bool, sids):
+        partial['refresh'] = refresh
+        partial["qid"] = qid
+        message = dict(output=partial, ray=RaySchemaInst.dump(self.__engine.ray(qid)))
 
-        current_partial_update = self.__engine.get_partial_output(qid)
-        if current_partial_update is not None:
+        for sid in sids:
             try:
-                schema = getSchemaInst('out')
-
-                refresh = self.last_output_update == -1
-                base_json = json.loads('[]' if schema.many else '{}') if refresh else self.prev_partial_output
-                ResourceService.lock(qid)
-                try:
-                    current_partial_update = schema.dump(current_partial_update)
-                finally:
-                    ResourceService.unlock()
-                target_json = current_partial_update
-                partial = JsonUtil.find_differences(base_json, target_json)
-                partial['refresh'] = refresh
-
-                # Don't send empty object even if change was published by the worker
-                if partial["new_hash"] == self.__engine.get_reported_partial_output(qid):
-                    return None
+                logger.info(f"Socket::watch: {time.time()} {sid}/{qid} partial.")
+                self.__namespace.emit('partial', message, room=sid)
+            except Exception as e:
+                logger.error(f"Partial error: \n {e} \n {partial}")
 
-                self.prev_partial_output = copy.deepcopy(current_partial_update)
-                self.last_output_update = self.output_update_ts
-                partial["qid"] = qid
-                self.__engine.reported_partial_output(qid, partial["new_hash"])
 
-                # ------------------
-                # Save partial output to store
-                # TODO - very ugly hack !!! - need to fix
-                PersistenceService.set_asset(qid, 'out', current_partial_update)
+#################################################
+#  WatchController
+#################################################
+class WatchController:
+    __sessions: Set[str] = None
+    __namespace: Namespace = None
+    __supervisor: Supervisor = None
+    __broadcaster: PartialBroadcaster = None
 
-                return dict(output=partial, ray=RaySchemaInst.dump(ray))
+    def __init__(self, supervisor: Supervisor, namespace: Namespace, sessions: Set[str],
+                 broadcaster: PartialBroadcaster):
+        self.__supervisor = supervisor
+        self.__namespace = namespace
+        self.__sessions = sessions
+        self.__broadcaster = broadcaster
 
-            except BaseException as e:
-                logger.error(f"Openfabric - failed to send partial output: {e}")
-                pass
+    # --------------------------------------------------------------------------------
+    def reset_partial(self, qid: str):
+        logger.debug(f'Openfabric - clearing partial output for {qid}')
+        self.__broadcaster.refresh(request.sid, qid)
 
-            return None
+    # --------------------------------------------------------------------------------
+    def send_partial(self, qid: str):
+        sid = request.sid
+        if sid not in self.__sessions:
+            return
+        self.__broadcaster.subscribe(sid, qid)
@@ -4,3 +4,6 @@ from openfabric_pysdk.utility.change_util import ChangeUtil
 from openfabric_pysdk.utility.loader_util import LoaderUtil
 from openfabric_pysdk.utility.json_util import JsonUtil
 from openfabric_pysdk.utility.caching_util import LRUCacheMap
+from openfabric_pysdk.utility.json_patch import JsonPatch, JsonTracker
+from openfabric_pysdk.utility.tracking_util import TrackedDict, TrackedList, TrackedObject, TrackingUtil
+from openfabric_pysdk.utility.resource_util import ResourceUtil
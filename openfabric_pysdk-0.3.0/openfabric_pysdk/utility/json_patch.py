@@ -0,0 +1,289 @@
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+# Type tags of the hashed values, bool is tested before int on purpose
+_TAGS = ((bool, b'b'), (int, b'i'), (float, b'f'), (str, b's'))
+
+
+#######################################################
+#  Hash tree node
+#######################################################
+class _Node:
+    __slots__ = ('digest', 'children', 'prefix')
+
+    def __init__(self, digest: bytes, children=None, prefix: List[bytes] = None):
+        # Dictionaries: children by key. Lists: children by index, prefix[i] is the hash of the first i + 1 items.
+        self.digest = digest
+        self.children = children
+        self.prefix = prefix
+
+
+#######################################################
+#  Json patch
+#######################################################
+class JsonPatch:
+    '''
+    Structural diff of JSON documents as RFC 6902 patches.
+
+    Every document comes with a Merkle tree of hashes: the hash of a dictionary is computed from
+    the hashes of its entries, the hash of a list is chained item after item. Diffing against the
+    previous tree only hashes what changed, and appending to a list only hashes the new items.
+    '''
+    __NULL: bytes = hashlib.blake2b(b'n', digest_size=16).digest()
+    __EMPTY_LIST: bytes = hashlib.blake2b(b'l', digest_size=16).digest()
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def tree(document: Any) -> _Node:
+        if isinstance(document, dict):
+            children = {key: JsonPatch.tree(value) for key, value in document.items()}
+            return _Node(JsonPatch.__dict_digest(children), children)
+
+        if isinstance(document, list):
+            children = [JsonPatch.tree(value) for value in document]
+            prefix = JsonPatch.__chain(children, [], 0)
+            return _Node(prefix[-1] if prefix else JsonPatch.__EMPTY_LIST, children, prefix)
+
+        for kind, tag in _TAGS:
+            if isinstance(document, kind):
+                return _Node(hashlib.blake2b(tag + repr(document).encode(), digest_size=16).digest())
+        return _Node(JsonPatch.__NULL)
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def diff(source: Any, target: Any, tree: Optional[_Node] = None) -> Tuple[List[Dict[str, Any]], _Node]:
+        # Returns the operations turning source into target, and the hash tree of target
+        operations: List[Dict[str, Any]] = []
+        tree = JsonPatch.__diff(source, target, JsonPatch.tree(source) if tree is None else tree, '', operations)
+        return operations, tree
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def apply(document: Any, patch: List[Dict[str, Any]]) -> Any:
+        # The document is not modified: containers on the path of an operation are copied, once per call
+        copies = set()
+        for operation in patch:
+            document = JsonPatch.__apply(document, operation, copies)
+        return document
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def hash(tree: _Node) -> str:
+        return tree.digest.hex()
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __diff(source: Any, target: Any, node: _Node, path: str, operations: List[Dict[str, Any]]) -> _Node:
+        if isinstance(source, dict) and isinstance(target, dict):
+            changed = False
+            children = dict()
+            for key in source:
+                if key not in target:
+                    operations.append(dict(op='remove', path=f"{path}/{JsonPatch.__escape(key)}"))
+                    changed = True
+            for key, value in target.items():
+                if key not in source:
+                    operations.append(dict(op='add', path=f"{path}/{JsonPatch.__escape(key)}", value=value))
+                    children[key] = JsonPatch.tree(value)
+                    changed = True
+                elif JsonPatch.__same(source[key], value):
+                    children[key] = node.children[key]
+                else:
+                    children[key] = JsonPatch.__diff(source[key], value, node.children[key],
+                                                     f"{path}/{JsonPatch.__escape(key)}", operations)
+                    changed = True
+            if not changed:
+                return node
+            return _Node(JsonPatch.__dict_digest(children), children)
+
+        if isinstance(source, list) and isinstance(target, list):
+            common = min(len(source), len(target))
+            children = node.children[:common]
+            first = common
+            for index in range(common):
+                if not JsonPatch.__same(source[index], target[index]):
+                    children[index] = JsonPatch.__diff(source[index], target[index], children[index],
+                                                       f"{path}/{index}", operations)
+                    first = min(first, index)
+            # Remove from the end, so that the indexes stay valid
+            for index in range(len(source) - 1, common - 1, -1):
+                operations.append(dict(op='remove', path=f"{path}/{index}"))
+            for index in range(common, len(target)):
+                operations.append(dict(op='add', path=f"{path}/-", value=target[index]))
+                children.append(JsonPatch.tree(target[index]))
+            if first == common and len(source) == len(target):
+                return node
+            prefix = JsonPatch.__chain(children, node.prefix[:first], first)
+            return _Node(prefix[-1] if prefix else JsonPatch.__EMPTY_LIST, children, prefix)
+
+        if JsonPatch.__same(source, target):
+            return node
+        operations.append(dict(op='replace', path=path, value=target))
+        return JsonPatch.tree(target)
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __apply(document: Any, operation: Dict[str, Any], copies: set) -> Any:
+        op = operation.get('op', None)
+        tokens = JsonPatch.__tokens(operation.get('path', None))
+
+        if len(tokens) == 0:
+            if op in ('add', 'replace'):
+                return operation['value']
+            if op == 'remove':
+                return None
+            if op == 'test':
+                JsonPatch.__test(document, operation['value'])
+                return document
+            raise ValueError(f"Unsupported patch operation: {op}")
+
+        root = JsonPatch.__copy(document, copies)
+        parent = root
+        for token in tokens[:-1]:
+            key = JsonPatch.__key(parent, token)
+            parent[key] = JsonPatch.__copy(parent[key], copies)
+            parent = parent[key]
+
+        token = tokens[-1]
+        if op == 'add':
+            if isinstance(parent, list):
+                if token == '-':
+                    parent.append(operation['value'])
+                else:
+                    index = JsonPatch.__key(parent, token, append=True)
+                    parent.insert(index, operation['value'])
+            else:
+                parent[token] = operation['value']
+        elif op == 'remove':
+            del parent[JsonPatch.__key(parent, token)]
+        elif op == 'replace':
+            parent[JsonPatch.__key(parent, token)] = operation['value']
+        elif op == 'test':
+            JsonPatch.__test(parent[JsonPatch.__key(parent, token)], operation['value'])
+        else:
+            raise ValueError(f"Unsupported patch operation: {op}")
+        return root
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __copy(container: Any, copies: set) -> Any:
+        if id(container) in copies:
+            return container
+        if isinstance(container, dict):
+            container = dict(container)
+        elif isinstance(container, list):
+            container = list(container)
+        else:
+            raise ValueError(f"Invalid patch path through {type(container).__name__}")
+        copies.add(id(container))
+        return container
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __key(container: Any, token: str, append: bool = False):
+        if not isinstance(container, list):
+            if token not in container:
+                raise ValueError(f"Invalid patch path, missing key: {token}")
+            return token
+        if not token.isdigit():
+            raise ValueError(f"Invalid patch path, not an index: {token}")
+        index = int(token)
+        if index > len(container) or (index == len(container) and not append):
+            raise ValueError(f"Invalid patch path, index out of range: {token}")
+        return index
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __test(value: Any, expected: Any):
+        if not JsonPatch.__same(value, expected):
+            raise ValueError(f"Patch test failed: {value} != {expected}")
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __same(source: Any, target: Any) -> bool:
+        # Compared by the interpreter, much faster than hashing. The type check keeps 1 and True apart,
+        # inside containers they compare equal: fine for dumped schemas, where a field keeps its type.
+        return source is target or (type(source) is type(target) and source == target)
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __escape(key: Any) -> str:
+        return str(key).replace('~', '~0').replace('/', '~1')
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __tokens(path: Optional[str]) -> List[str]:
+        if path is None or (path != '' and not path.startswith('/')):
+            raise ValueError(f"Invalid patch path: {path}")
+        if path == '':
+            return []
+        return [token.replace('~1', '/').replace('~0', '~') for token in path[1:].split('/')]
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __dict_digest(children: Dict[str, _Node]) -> bytes:
+        digest = hashlib.blake2b(b'd', digest_size=16)
+        for key in sorted(children):
+            encoded = str(key).encode()
+            digest.update(len(encoded).to_bytes(4, 'big'))
+            digest.update(encoded)
+            digest.update(children[key].digest)
+        return digest.digest()
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def __chain(children: List[_Node], prefix: List[bytes], start: int) -> List[bytes]:
+        previous = prefix[-1] if prefix else JsonPatch.__EMPTY_LIST
+        for index in range(start, len(children)):
+            previous = hashlib.blake2b(previous + children[index].digest, digest_size=16).digest()
+            prefix.append(previous)
+        return prefix
+
+
+#######################################################
+#  Json tracker
+#######################################################
+class JsonTracker:
+    '''
+    Follows the successive versions of a document and yields the patches between them.
+    '''
+
+    # ------------------------------------------------------------------------
+    def __init__(self, document: Any = None):
+        self.__document = document
+        self.__tree = JsonPatch.tree(document)
+
+    # ------------------------------------------------------------------------
+    @property
+    def document(self) -> Any:
+        return self.__document
+
+    # ------------------------------------------------------------------------
+    @property
+    def hash(self) -> str:
+        return JsonPatch.hash(self.__tree)
+
+    # ------------------------------------------------------------------------
+    def update(self, document: Any) -> Optional[Dict[str, Any]]:
+        # Returns None when nothing changed
+        patch, tree = JsonPatch.diff(self.__document, document, self.__tree)
+        if len(patch) == 0:
+            return None
+
+        old_hash = self.hash
+        self.__document = document
+        self.__tree = tree
+        return {
+            "old_hash": old_hash,
+            "new_hash": self.hash,
+            "patch": patch
+        }
+
+    # ------------------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        # The whole document, as a patch that applies to anything
+        return {
+            "old_hash": None,
+            "new_hash": self.hash,
+            "patch": [dict(op='replace', path='', value=self.__document)]
+        }
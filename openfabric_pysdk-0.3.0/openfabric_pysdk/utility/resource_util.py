@@ -0,0 +1,22 @@
+import re
+from typing import Optional
+
+# Resource names are '{type}_{encoding}_{hash}', see ResourceService.write and HashService.compute_hash
+_content_address = re.compile(r"^[A-Za-z0-9.\-]+_[A-Za-z0-9.\-]+_(?:[0-9a-f]{32}){1,2}$")
+
+
+#######################################################
+#  Resource util
+#######################################################
+class ResourceUtil:
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def key(reid: Optional[str]) -> Optional[str]:
+        # The reid of a resource is '{name}/{location}': the name alone addresses the content
+        if reid is None:
+            return None
+        name = str(reid).split('/')[0]
+        if _content_address.match(name) is None:
+            return None
+        return name
@@ -0,0 +1,322 @@
+import itertools
+import weakref
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Optional
+from uuid import UUID
+
+# Versions are unique across objects: a new object never reuses the version of the one it replaces
+_versions = itertools.count(1)
+
+_IMMUTABLE = (str, bytes, int, float, complex, bool, type(None), Decimal, date, datetime, time, timedelta, Enum, UUID)
+
+
+#######################################################
+#  Tracked
+#######################################################
+class Tracked:
+    '''
+    Base of the objects that count their own mutations.
+
+    A mutation stamps the object, and the tracked objects holding it, with a new version.
+    Plain lists and dicts are stored as tracked copies, so the caller's own container is no
+    longer the one held. Other mutable values (a set for instance) may change without notice:
+    their holders are flagged as opaque for good and lose their version.
+    '''
+    _tracked_version: int = 0
+    _tracked_opaque: bool = False
+
+
+# ------------------------------------------------------------------------
+def _immutable(value: Any) -> bool:
+    if isinstance(value, _IMMUTABLE):
+        return True
+    if isinstance(value, (tuple, frozenset)):
+        return all(_immutable(item) for item in value)
+    return False
+
+
+# ------------------------------------------------------------------------
+def _wrap(value: Any) -> Any:
+    # Subclasses are left alone, they may not behave as a plain container
+    if type(value) is list:
+        return TrackedList(value)
+    if type(value) is dict:
+        return TrackedDict(value)
+    return value
+
+
+# ------------------------------------------------------------------------
+def _owners(tracked: Tracked):
+    owners = (ref() for ref in tracked.__dict__.get('_tracked_owners', ()))
+    return [owner for owner in owners if owner is not None]
+
+
+# ------------------------------------------------------------------------
+def _touch(tracked: Tracked):
+    version = next(_versions)
+    pending = [tracked]
+    while pending:
+        current = pending.pop()
+        if current.__dict__.get('_tracked_version', 0) == version:
+            continue
+        current.__dict__['_tracked_version'] = version
+        pending.extend(_owners(current))
+
+
+# ------------------------------------------------------------------------
+def _obscure(tracked: Tracked):
+    pending = [tracked]
+    while pending:
+        current = pending.pop()
+        if current.__dict__.get('_tracked_opaque', False):
+            continue
+        current.__dict__['_tracked_opaque'] = True
+        pending.extend(_owners(current))
+
+
+# ------------------------------------------------------------------------
+def _adopt(owner: Tracked, value: Any):
+    if isinstance(value, Tracked):
+        value.__dict__.setdefault('_tracked_owners', []).append(weakref.ref(owner))
+        if value._tracked_opaque:
+            _obscure(owner)
+    elif not _immutable(value):
+        _obscure(owner)
+
+
+# ------------------------------------------------------------------------
+def _release(owner: Tracked, value: Any):
+    if not isinstance(value, Tracked):
+        return
+    owners = value.__dict__.get('_tracked_owners', [])
+    for index, ref in enumerate(owners):
+        if ref() is owner:
+            del owners[index]
+            return
+
+
+#######################################################
+#  Tracked object
+#######################################################
+class TrackedObject(Tracked):
+    '''
+    Tracks the assignments to its attributes, base of the generated concept classes.
+    '''
+
+    # ------------------------------------------------------------------------
+    def __setattr__(self, name: str, value: Any):
+        if name.startswith('_tracked'):
+            object.__setattr__(self, name, value)
+            return
+        if name in self.__dict__:
+            _release(self, self.__dict__[name])
+        value = _wrap(value)
+        _adopt(self, value)
+        object.__setattr__(self, name, value)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def __delattr__(self, name: str):
+        if name in self.__dict__:
+            _release(self, self.__dict__[name])
+        object.__delattr__(self, name)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if not key.startswith('_tracked')}
+
+    # ------------------------------------------------------------------------
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+
+#######################################################
+#  Tracked list
+#######################################################
+class TrackedList(Tracked, list):
+
+    # ------------------------------------------------------------------------
+    def __init__(self, iterable=()):
+        list.__init__(self, (_wrap(item) for item in iterable))
+        for item in self:
+            _adopt(self, item)
+
+    # ------------------------------------------------------------------------
+    def __reduce__(self):
+        return TrackedList, (list(self),)
+
+    # ------------------------------------------------------------------------
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = [_wrap(item) for item in value]
+            for item in list.__getitem__(self, index):
+                _release(self, item)
+            for item in value:
+                _adopt(self, item)
+        else:
+            _release(self, list.__getitem__(self, index))
+            value = _wrap(value)
+            _adopt(self, value)
+        list.__setitem__(self, index, value)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def __delitem__(self, index):
+        removed = list.__getitem__(self, index)
+        list.__delitem__(self, index)
+        for item in (removed if isinstance(index, slice) else [removed]):
+            _release(self, item)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    # ------------------------------------------------------------------------
+    def __imul__(self, count: int):
+        if count <= 0:
+            self.clear()
+        else:
+            self.extend(list(self) * (count - 1))
+        return self
+
+    # ------------------------------------------------------------------------
+    def append(self, value):
+        value = _wrap(value)
+        _adopt(self, value)
+        list.append(self, value)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def extend(self, iterable):
+        values = [_wrap(value) for value in iterable]
+        for value in values:
+            _adopt(self, value)
+        list.extend(self, values)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def insert(self, index: int, value):
+        value = _wrap(value)
+        _adopt(self, value)
+        list.insert(self, index, value)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def pop(self, index: int = -1):
+        value = list.pop(self, index)
+        _release(self, value)
+        _touch(self)
+        return value
+
+    # ------------------------------------------------------------------------
+    def remove(self, value):
+        del self[self.index(value)]
+
+    # ------------------------------------------------------------------------
+    def clear(self):
+        for item in self:
+            _release(self, item)
+        list.clear(self)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def reverse(self):
+        list.reverse(self)
+        _touch(self)
+
+
+#######################################################
+#  Tracked dict
+#######################################################
+class TrackedDict(Tracked, dict):
+
+    # ------------------------------------------------------------------------
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        for key, value in self.items():
+            value = _wrap(value)
+            dict.__setitem__(self, key, value)
+            _adopt(self, value)
+
+    # ------------------------------------------------------------------------
+    def __reduce__(self):
+        return TrackedDict, (dict(self),)
+
+    # ------------------------------------------------------------------------
+    def __setitem__(self, key, value):
+        if key in self:
+            _release(self, dict.__getitem__(self, key))
+        value = _wrap(value)
+        _adopt(self, value)
+        dict.__setitem__(self, key, value)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def __delitem__(self, key):
+        value = dict.__getitem__(self, key)
+        dict.__delitem__(self, key)
+        _release(self, value)
+        _touch(self)
+
+    # ------------------------------------------------------------------------
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    # ------------------------------------------------------------------------
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    # ------------------------------------------------------------------------
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    # ------------------------------------------------------------------------
+    def pop(self, key, *default):
+        if key not in self:
+            return dict.pop(self, key, *default)
+        value = dict.__getitem__(self, key)
+        del self[key]
+        return value
+
+    # ------------------------------------------------------------------------
+    def popitem(self):
+        key, value = dict.popitem(self)
+        _release(self, value)
+        _touch(self)
+        return key, value
+
+    # ------------------------------------------------------------------------
+    def clear(self):
+        for value in self.values():
+            _release(self, value)
+        dict.clear(self)
+        _touch(self)
+
+
+#######################################################
+#  Tracking util
+#######################################################
+class TrackingUtil:
+
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def version(obj: Any) -> Optional[int]:
+        # None when the changes of the object can't be known from its version
+        if not isinstance(obj, Tracked) or obj._tracked_opaque:
+            return None
+        return obj._tracked_version
@@ -0,0 +1,32 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# The SDK keeps its state in the working directory, from the moment it is imported
+_workdir = tempfile.mkdtemp(prefix="openfabric_pysdk_tests_")
+atexit.register(shutil.rmtree, _workdir, True)
+os.chdir(_workdir)
+
+# Patched before anything else, as the server does
+import openfabric_pysdk.flask.core  # noqa: F401
+
+import pytest
+
+from openfabric_pysdk.service.persistence_service import PersistenceService
+from openfabric_pysdk.service.resource_service import ResourceService
+
+
+@pytest.fixture(params=["files", "sqlite"])
+def datastore(request, tmp_path, monkeypatch):
+    # The services keep their location in class attributes, set when imported
+    monkeypatch.setattr(PersistenceService, "_PersistenceService__path", str(tmp_path))
+    monkeypatch.setattr(PersistenceService, "_PersistenceService__backend", request.param)
+    monkeypatch.setattr(PersistenceService, "_PersistenceService__store", None)
+    monkeypatch.setattr(ResourceService, "_ResourceService__path", str(tmp_path))
+    yield tmp_path
+
+    PersistenceService.flush()
+    store = PersistenceService._PersistenceService__store
+    if store is not None:
+        store.close()
@@ -0,0 +1,67 @@
+from openfabric_pysdk.app.execution.ipc.action_decoder import ActionDecoder
+from openfabric_pysdk.app.execution.ipc.action_encoder import ActionEncoder
+from openfabric_pysdk.app.execution.ipc.actions import ACTION_CODES, DispatchActions, WIRE_HEADER, WIRE_VERSION
+
+
+class Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        if not name.startswith('on'):
+            raise AttributeError(name)
+        return lambda data: self.calls.append((name, data))
+
+
+def test_simple_actions_round_trip():
+    assert ActionDecoder.deserialize(ActionEncoder.add("q1")) == (DispatchActions.ADD, "q1")
+    assert ActionDecoder.deserialize(ActionEncoder.remove("q1")) == (DispatchActions.REMOVE, "q1")
+    assert ActionDecoder.deserialize(ActionEncoder.exit("suspend")) == (DispatchActions.EXIT, "suspend")
+    assert ActionDecoder.deserialize(ActionEncoder.configure()) == (DispatchActions.CONFIGURE, None)
+    assert ActionDecoder.deserialize(ActionEncoder.log(20, "message")) == \
+           (DispatchActions.LOG, {'level': 20, 'message': "message"})
+
+
+def test_state_update_payloads_travel_in_their_own_frames():
+    output = {"text": "x" * 1000, "items": [1, 2, 3]}
+    frames = ActionEncoder.state_update("q1", output=output, ray={"status": "COMPLETED"}, partial={"text": "x"})
+
+    assert len(frames) == 4
+    assert b"x" * 1000 not in frames[1]
+    action, data = ActionDecoder.deserialize(frames)
+    assert action == DispatchActions.UPDATE
+    assert data == {'qid': "q1", 'ray': {"status": "COMPLETED"}, 'output': output, 'partial': {"text": "x"}}
+
+
+def test_frames_can_be_buffers():
+    frames = [memoryview(frame) for frame in ActionEncoder.state_update("q1", input={"a": 1})]
+    assert ActionDecoder.deserialize(frames) == (DispatchActions.UPDATE, {'qid': "q1", 'input': {"a": 1}})
+
+
+def test_every_action_has_a_stable_code():
+    assert len(set(ACTION_CODES.values())) == len(ACTION_CODES)
+    for action in ActionDecoder._mappings:
+        frames = ActionEncoder.serialize(action, "data")
+        assert WIRE_HEADER.unpack(frames[0]) == (WIRE_VERSION, ACTION_CODES[action])
+        assert ActionDecoder.deserialize(frames) == (action, "data")
+
+
+def test_malformed_and_unknown_messages():
+    assert ActionDecoder.deserialize([b"add"]) == (None, None)
+    assert ActionDecoder.deserialize([WIRE_HEADER.pack(WIRE_VERSION + 1, 1), b"{}"]) == (None, None)
+    assert ActionDecoder.deserialize([WIRE_HEADER.pack(WIRE_VERSION, 250), b'{"data": 1}']) == (250, 1)
+
+
+def test_decode_dispatches_to_the_handler():
+    handler = Recorder()
+    decoder = ActionDecoder(handler)
+
+    decoder.decode(ActionEncoder.add("q1"))
+    decoder.decode(ActionEncoder.state_update("q2", output={"a": 1}))
+    decoder.decode([WIRE_HEADER.pack(WIRE_VERSION, 250), b'{"data": null}'])
+
+    assert handler.calls == [
+        ("onAdd", "q1"),
+        ("onUpdate", {'qid': "q2", 'output': {"a": 1}}),
+        ("onUnsupportedAction", 250),
+    ]
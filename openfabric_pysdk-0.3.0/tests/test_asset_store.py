@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from openfabric_pysdk.store.asset_store import FileAssetStore, SqliteAssetStore, open_asset_store
+
+
+@pytest.fixture(params=["files", "sqlite"])
+def store(request, tmp_path):
+    store = open_asset_store(str(tmp_path), request.param)
+    yield store
+    store.close()
+
+
+def test_open_by_backend(tmp_path):
+    assert isinstance(open_asset_store(str(tmp_path)), FileAssetStore)
+    assert isinstance(open_asset_store(str(tmp_path), "unknown"), FileAssetStore)
+    store = open_asset_store(str(tmp_path), "sqlite")
+    assert isinstance(store, SqliteAssetStore)
+    store.close()
+
+
+def test_write_read_drop(store):
+    store.write({("q1", "in"): ('{"a": 1}', 10.0), ("q1", "out"): ('{"b": 2}', 11.0), ("q2", "in"): ('{}', 12.0)})
+
+    assert store.read("q1", "in") == '{"a": 1}'
+    assert store.read("q1", "ray") is None
+    assert store.timestamp("q1", "out") is not None
+    assert store.stamp("q2", "in") is not None
+
+    store.drop("q1")
+    assert store.read("q1", "in") is None
+    assert store.read("q1", "out") is None
+    assert store.read("q2", "in") == '{}'
+
+
+def test_a_new_write_changes_the_stamp(store):
+    store.write({("q1", "out"): ('"a"', 10.0)})
+    stamp = store.stamp("q1", "out")
+    store.write({("q1", "out"): ('"b"', 11.0)})
+
+    assert store.read("q1", "out") == '"b"'
+    assert store.stamp("q1", "out") != stamp
+
+
+def test_sqlite_keeps_every_asset_in_one_file(tmp_path):
+    store = SqliteAssetStore(str(tmp_path))
+    store.write({(f"q{i}", key): ('{}', float(i)) for i in range(10) for key in ("in", "out", "ray")})
+    assert store.timestamp("q3", "ray") == 3.0
+    assert not os.path.exists(tmp_path / "executions")
+
+    # The resources of an execution still live in its directory
+    os.makedirs(tmp_path / "executions" / "q1")
+    (tmp_path / "executions" / "q1" / "resource").write_bytes(b"x")
+    store.drop("q1")
+    assert not os.path.exists(tmp_path / "executions" / "q1")
+    store.close()
+
+    # Shared by the processes of the app
+    other = SqliteAssetStore(str(tmp_path))
+    assert other.read("q2", "in") == '{}'
+    assert other.read("q1", "in") is None
+    other.close()
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from openfabric_pysdk.helper import async_proxy as async_proxy_module
+from openfabric_pysdk.helper.async_proxy import AsyncProxy
+
+
+class AsyncClient:
+    def __init__(self, ssl_verify=True):
+        self.connected = False
+        self.handlers = dict()
+        self.emitted = []
+
+    def event(self, handler=None, namespace='/'):
+        def register(function):
+            self.handlers[(namespace, function.__name__)] = function
+            return function
+        return register if handler is None else register(handler)
+
+    async def connect(self, url, transports=None, namespaces=None, wait_timeout=None):
+        self.connected = True
+        for namespace in namespaces:
+            await self.handlers[(namespace, 'connect')]()
+
+    async def disconnect(self):
+        self.connected = False
+        await self.handlers[('/app', 'disconnect')]()
+
+    async def emit(self, event, data=None, namespace=None):
+        self.emitted.append((event, data, namespace))
+
+    async def receive(self, event, data):
+        await self.handlers[('/app', event)](data)
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    monkeypatch.setattr(async_proxy_module.socketio, "AsyncClient", AsyncClient)
+    return AsyncProxy("http://app")
+
+
+def test_connection_events_are_handled_on_the_app_namespace(proxy):
+    handlers = proxy._AsyncProxy__sio.handlers
+    for event in ("connect", "connect_error", "disconnect"):
+        assert ('/app', event) in handlers
+        assert ('/', event) not in handlers
+
+
+def test_request_resolves_with_its_response(proxy):
+    async def scenario():
+        await proxy.connect()
+        request = asyncio.ensure_future(proxy.request({"prompt": "hi"}))
+        await asyncio.sleep(0)
+        rid = list(proxy._AsyncProxy__pending)[0]
+        await proxy._AsyncProxy__sio.receive("response", {"ray": {"rid": rid, "status": "COMPLETED"}, "output": 1})
+        output = await request
+        await proxy.disconnect()
+        return output
+
+    assert asyncio.run(scenario()) == 1
+
+
+@pytest.mark.parametrize("side", ["client", "server"])
+def test_disconnect_fails_the_requests_in_flight(proxy, side):
+    connected = []
+    proxy.register("connected", connected.append)
+
+    async def scenario():
+        await proxy.connect()
+        requests = [asyncio.ensure_future(proxy.request({"prompt": "hi"})) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert proxy.pending() == 2
+
+        if side == "client":
+            await proxy.disconnect()
+        else:
+            await proxy._AsyncProxy__sio.handlers[('/app', 'disconnect')]()
+        return await asyncio.gather(*requests, return_exceptions=True)
+
+    errors = asyncio.run(scenario())
+    assert all(isinstance(error, ConnectionError) for error in errors)
+    assert proxy.pending() == 0
+    assert connected == [True, False]
@@ -0,0 +1,102 @@
+import threading
+import time
+from datetime import datetime
+
+from openfabric_pysdk.context import Ray, RayStatus
+from openfabric_pysdk.context.ray_schema import RaySchemaInst
+from openfabric_pysdk.engine.engine import Engine
+from openfabric_pysdk.service import PersistenceService
+from openfabric_pysdk.task import Task
+
+
+class Supervisor:
+    # Holds the requests until released, recording how many run at once
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.released = threading.Event()
+        self.running = 0
+        self.peak = 0
+        self.done = []
+
+    def execution_callback_function(self, input, ray):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.released.wait(10)
+        with self.lock:
+            self.running -= 1
+            self.done.append(ray.qid)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_requests_run_concurrently_up_to_the_workers(datastore, monkeypatch):
+    monkeypatch.setattr(Engine, "_Engine__slots", threading.BoundedSemaphore(2))
+    monkeypatch.chdir(datastore)
+    engine = Engine()
+    supervisor = Supervisor()
+
+    qids = [engine.prepare(supervisor, {"prompt": f"p{i}"}, uid="u") for i in range(5)]
+    wait_until(lambda: supervisor.running == 2)
+    time.sleep(0.2)
+    assert supervisor.running == 2
+
+    supervisor.released.set()
+    wait_until(lambda: len(supervisor.done) == 5)
+    assert supervisor.peak == 2
+    # Taken in the order of the queue
+    assert sorted(supervisor.done[:2]) == sorted(qids[:2])
+
+
+def test_rays_indexed_before_the_index_keep_their_creation_time(datastore, monkeypatch):
+    monkeypatch.chdir(datastore)
+    task = Task()
+    for qid in ("with_ray", "with_input", "bare"):
+        task.add(qid)
+        task.next()
+
+    ray = Ray("with_ray")
+    ray.sid = "s"
+    object.__setattr__(ray, 'created_at', datetime(2024, 1, 1))
+    PersistenceService.set_asset("with_ray", 'ray', ray, RaySchemaInst.dump)
+    PersistenceService.set_asset("with_input", 'in', "{}")
+    PersistenceService.flush()
+
+    engine = Engine()
+    # From the ray, from the input, unknown
+    assert engine._Engine__task.unindexed() == []
+    assert engine._Engine__task.find() == ["bare", "with_ray", "with_input"]
+
+
+def test_ray_cache_keeps_the_active_rays(datastore, monkeypatch):
+    monkeypatch.setenv("OPENFABRIC_RAY_CACHE", "2")
+    monkeypatch.chdir(datastore)
+    engine = Engine()
+
+    running = engine.ray("running")
+    running.status = RayStatus.RUNNING
+    completed = engine.ray("completed")
+    completed.status = RayStatus.COMPLETED
+    completed.sid = "s"
+    PersistenceService.set_asset("completed", 'ray', completed, RaySchemaInst.dump)
+
+    # Over the limit, the least recently used inactive ray goes
+    engine.ray("queued").status = RayStatus.QUEUED
+    assert list(engine._Engine__rays) == ["running", "queued"]
+    assert engine.ray("running") is running
+
+    # Paged in again from the persistence
+    reloaded = engine.ray("completed")
+    assert reloaded is not completed
+    assert reloaded.status == RayStatus.COMPLETED
+    # The active rays stay, the cache grows over its limit rather than dropping one
+    assert list(engine._Engine__rays) == ["queued", "running", "completed"]
+    engine.ray("pending").status = RayStatus.PENDING
+    assert list(engine._Engine__rays) == ["queued", "running", "pending"]
+    engine.ray("other").status = RayStatus.RUNNING
+    assert list(engine._Engine__rays) == ["queued", "running", "pending", "other"]
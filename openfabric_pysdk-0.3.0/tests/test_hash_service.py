@@ -0,0 +1,115 @@
+import collections
+import hashlib
+import sys
+
+import pytest
+
+from openfabric_pysdk.service import hash_service
+from openfabric_pysdk.service.hash_service import HashService
+
+LARGE = 64 * 1024
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+    # Fresh memo, counts the values actually hashed
+    monkeypatch.setattr(HashService, "_HashService__memo", collections.OrderedDict())
+    monkeypatch.setattr(HashService, "_HashService__memo_size", 0)
+    hashed = []
+    resource_hash = HashService._HashService__resource_hash
+
+    def counted(data):
+        hashed.append(data)
+        return resource_hash(data)
+
+    monkeypatch.setattr(HashService, "_HashService__resource_hash", counted)
+    return hashed
+
+
+def test_memo_is_on_by_default():
+    assert HashService._HashService__memo_limit == 16 * 1024 * 1024
+
+
+def test_large_values_are_hashed_once(hashed):
+    data = b"a" * LARGE
+    assert HashService.compute_hash(data) == hashlib.sha256(data).hexdigest()
+    assert HashService.compute_hash(data) == hashlib.sha256(data).hexdigest()
+    assert len(hashed) == 1
+
+    text = "a" * LARGE
+    assert HashService.compute_hash(text) == HashService.compute_hash(text) == hashlib.sha256(data).hexdigest()
+    assert len(hashed) == 2
+
+
+def test_only_the_same_immutable_object_is_recalled(hashed):
+    data = b"a" * LARGE
+    HashService.compute_hash(data)
+    # Equal, but another object
+    HashService.compute_hash(bytes(bytearray(data)))
+    # Could be changed in place
+    mutable = bytearray(data)
+    HashService.compute_hash(mutable)
+    HashService.compute_hash(mutable)
+    # Too small to be worth it
+    HashService.compute_hash(b"small")
+    HashService.compute_hash(b"small")
+    assert len(hashed) == 6
+
+
+def test_least_recently_used_values_are_evicted(hashed, monkeypatch):
+    monkeypatch.setattr(HashService, "_HashService__memo_limit", 2 * LARGE)
+    first, second, third = (name * LARGE for name in (b"a", b"b", b"c"))
+    HashService.compute_hash(first)
+    HashService.compute_hash(second)
+    HashService.compute_hash(first)
+    assert len(hashed) == 2
+
+    # Evicts the second one, the first was used since
+    HashService.compute_hash(third)
+    HashService.compute_hash(first)
+    HashService.compute_hash(third)
+    assert len(hashed) == 3
+    HashService.compute_hash(second)
+    assert len(hashed) == 4
+    assert HashService._HashService__memo_size == 2 * LARGE
+
+    # Larger than the memo, never kept
+    larger = b"d" * (3 * LARGE)
+    HashService.compute_hash(larger)
+    HashService.compute_hash(larger)
+    assert len(hashed) == 6
+
+
+def test_memo_can_be_disabled(hashed, monkeypatch):
+    monkeypatch.setattr(HashService, "_HashService__memo_limit", 0)
+    data = b"a" * LARGE
+    HashService.compute_hash(data)
+    HashService.compute_hash(data)
+    assert len(hashed) == 2
+    assert HashService._HashService__memo == dict()
+
+
+def test_sha256_and_blake2b():
+    assert hash_service._resource_hasher("sha256")(b"abc") == hashlib.sha256(b"abc").hexdigest()
+    assert hash_service._resource_hasher("blake2b")(b"abc") == hashlib.blake2b(b"abc", digest_size=32).hexdigest()
+    assert len(hash_service._resource_hasher("blake2b")(b"abc")) == 64
+    # Unknown, sha256 instead
+    assert hash_service._resource_hasher("md5")(b"abc") == hashlib.sha256(b"abc").hexdigest()
+
+
+def test_blake3():
+    blake3 = pytest.importorskip("blake3")
+    assert hash_service._resource_hasher("blake3")(b"abc") == blake3.blake3(b"abc").hexdigest()
+    assert len(hash_service._resource_hasher("blake3")(b"abc")) == 64
+
+
+def test_xxh3():
+    xxhash = pytest.importorskip("xxhash")
+    assert hash_service._resource_hasher("xxh3")(b"abc") == xxhash.xxh3_128_hexdigest(b"abc")
+    assert len(hash_service._resource_hasher("xxh3")(b"abc")) == 32
+
+
+@pytest.mark.parametrize("name", ["blake3", "xxh3"])
+def test_missing_module_falls_back_to_sha256(monkeypatch, name):
+    monkeypatch.setitem(sys.modules, {"blake3": "blake3", "xxh3": "xxhash"}[name], None)
+    assert hash_service._resource_hasher(name)(b"abc") == hashlib.sha256(b"abc").hexdigest()
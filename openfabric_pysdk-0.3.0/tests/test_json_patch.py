@@ -0,0 +1,73 @@
+import copy
+
+import pytest
+
+from openfabric_pysdk.utility.json_patch import JsonPatch, JsonTracker
+
+DOCUMENTS = [
+    ({"a": 1, "b": [1, 2, 3]}, {"a": 2, "b": [1, 2, 3, 4]}),
+    ({"a": 1, "b": [1, 2, 3]}, {"b": [1]}),
+    ({"a": {"b": {"c": "x"}}}, {"a": {"b": {"c": "y", "d": None}}}),
+    ({"list": [{"x": 1}, {"x": 2}]}, {"list": [{"x": 1}, {"x": 3}, {"x": 4}]}),
+    ({"flag": 1}, {"flag": True}),
+    ({"a/b": 1, "c~d": 2}, {"a/b": 2}),
+    ([1, 2, 3], [3, 2, 1, 0]),
+    ({"a": 1}, [1]),
+    (None, {"a": 1}),
+    ("text", "other"),
+]
+
+
+@pytest.mark.parametrize("source,target", DOCUMENTS)
+def test_diff_then_apply_gives_the_target(source, target):
+    original = copy.deepcopy(source)
+    patch, tree = JsonPatch.diff(source, target)
+
+    assert JsonPatch.apply(source, patch) == target
+    assert source == original
+    assert JsonPatch.hash(tree) == JsonPatch.hash(JsonPatch.tree(target))
+
+
+def test_diff_of_equal_documents_is_empty():
+    patch, tree = JsonPatch.diff({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]})
+    assert patch == []
+
+
+def test_appending_to_a_list_only_adds():
+    patch, _ = JsonPatch.diff({"items": [1, 2]}, {"items": [1, 2, 3, 4]})
+    assert patch == [dict(op='add', path="/items/-", value=3), dict(op='add', path="/items/-", value=4)]
+
+
+def test_incremental_tree_matches_a_full_one():
+    documents = [{"items": []}, {"items": [1]}, {"items": [1, 2]}, {"items": [0, 2, 3]}, {"items": [0], "x": 1}]
+    tree = JsonPatch.tree(documents[0])
+    for source, target in zip(documents, documents[1:]):
+        _, tree = JsonPatch.diff(source, target, tree)
+        assert JsonPatch.hash(tree) == JsonPatch.hash(JsonPatch.tree(target))
+
+
+def test_apply_rejects_invalid_operations():
+    with pytest.raises(ValueError):
+        JsonPatch.apply({"a": 1}, [dict(op='remove', path="/b")])
+    with pytest.raises(ValueError):
+        JsonPatch.apply({"a": [1]}, [dict(op='replace', path="/a/5", value=2)])
+    with pytest.raises(ValueError):
+        JsonPatch.apply({"a": 1}, [dict(op='move', path="/a")])
+    with pytest.raises(ValueError):
+        JsonPatch.apply({"a": 1}, [dict(op='test', path="/a", value=2)])
+
+
+def test_tracker_chains_the_hashes():
+    tracker = JsonTracker()
+    document = None
+    snapshot = None
+    for version in ({"a": 1}, {"a": 1, "b": [1]}, {"a": 2, "b": [1, 2]}):
+        update = tracker.update(version)
+        assert update["old_hash"] == (snapshot["new_hash"] if snapshot else JsonPatch.hash(JsonPatch.tree(None)))
+        document = JsonPatch.apply(document, update["patch"])
+        snapshot = update
+
+    assert document == {"a": 2, "b": [1, 2]}
+    assert tracker.update({"a": 2, "b": [1, 2]}) is None
+    assert JsonPatch.apply("anything", tracker.snapshot()["patch"]) == tracker.document
+    assert tracker.snapshot()["new_hash"] == tracker.hash
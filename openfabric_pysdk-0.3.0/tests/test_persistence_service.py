@@ -0,0 +1,167 @@
+import time
+
+import pytest
+
+from openfabric_pysdk.service.persistence_service import PersistenceService
+from openfabric_pysdk.store.asset_store import open_asset_store
+
+
+@pytest.fixture
+def window(monkeypatch):
+    # Long enough for the background flusher to never write during a test
+    monkeypatch.setattr(PersistenceService, "_PersistenceService__window", 60.0)
+
+
+def stored(datastore, qid, key):
+    # What the other processes see
+    store = open_asset_store(str(datastore), PersistenceService._PersistenceService__backend)
+    try:
+        return store.read(qid, key)
+    finally:
+        store.close()
+
+
+def test_pending_writes_are_visible_before_being_written(datastore, window):
+    PersistenceService.set_asset("q1", "out", {"text": "partial"})
+
+    assert stored(datastore, "q1", "out") is None
+    assert PersistenceService.get_asset("q1", "out") == {"text": "partial"}
+    assert PersistenceService.get_asset_timestamp("q1", "out") is not None
+
+
+def test_last_write_wins(datastore, window):
+    PersistenceService.set_asset("q1", "out", {"text": "partial"})
+    PersistenceService.set_asset("q1", "out", {"text": "final"})
+    assert PersistenceService.get_asset("q1", "out") == {"text": "final"}
+
+    PersistenceService.flush("q1")
+    assert stored(datastore, "q1", "out") == '{"text": "final"}'
+
+    # A write after the flush shadows the stored asset until written in turn
+    PersistenceService.set_asset("q1", "out", {"text": "again"})
+    assert PersistenceService.get_asset("q1", "out") == {"text": "again"}
+    assert stored(datastore, "q1", "out") == '{"text": "final"}'
+
+
+def test_flush_of_an_execution_leaves_the_others_pending(datastore, window):
+    PersistenceService.set_asset("q1", "in", {"prompt": "a"})
+    PersistenceService.set_asset("q2", "in", {"prompt": "b"})
+
+    PersistenceService.flush("q1")
+    assert stored(datastore, "q1", "in") == '{"prompt": "a"}'
+    assert stored(datastore, "q2", "in") is None
+
+    PersistenceService.flush()
+    assert stored(datastore, "q2", "in") == '{"prompt": "b"}'
+
+
+def test_data_is_encoded_when_set(datastore, window):
+    data = {"items": [1]}
+    PersistenceService.set_asset("q1", "out", data)
+    data["items"].append(2)
+
+    assert PersistenceService.get_asset("q1", "out") == {"items": [1]}
+
+
+def test_none_is_stored(datastore, window):
+    PersistenceService.set_asset("q1", "out", {"text": "x"})
+    PersistenceService.flush()
+    PersistenceService.set_asset("q1", "out", None)
+
+    assert PersistenceService.get_asset("q1", "out") is None
+    PersistenceService.flush()
+    assert PersistenceService.get_asset("q1", "out") is None
+
+
+def test_drop_discards_the_pending_writes(datastore, window):
+    PersistenceService.set_asset("q1", "in", {"prompt": "a"})
+    PersistenceService.flush()
+    PersistenceService.set_asset("q1", "out", {"text": "x"})
+
+    PersistenceService.drop_assets("q1")
+    PersistenceService.flush()
+    assert PersistenceService.get_asset("q1", "in") is None
+    assert PersistenceService.get_asset("q1", "out") is None
+    assert stored(datastore, "q1", "out") is None
+
+
+def test_synchronous_without_window(datastore, monkeypatch):
+    monkeypatch.setattr(PersistenceService, "_PersistenceService__window", 0)
+    PersistenceService.set_asset("q1", "ray", {"status": "COMPLETED"})
+
+    assert stored(datastore, "q1", "ray") == '{"status": "COMPLETED"}'
+    assert PersistenceService.get_asset("q1", "ray") == {"status": "COMPLETED"}
+
+
+def test_flushed_assets_stay_readable_while_written(datastore, window):
+    PersistenceService.set_asset("q1", "out", {"text": "old"})
+    PersistenceService.flush("q1")
+    PersistenceService.set_asset("q1", "out", {"text": "new"})
+
+    store = PersistenceService._PersistenceService__open()
+    write = store.write
+    seen = []
+
+    def observed(assets):
+        # Another thread reading while the batch is written
+        seen.append(PersistenceService.get_asset("q1", "out"))
+        write(assets)
+
+    store.write = observed
+    PersistenceService.flush("q1")
+    assert seen == [{"text": "new"}]
+    assert PersistenceService.get_asset("q1", "out") == {"text": "new"}
+
+
+def test_parsed_asset_is_cached(datastore, window):
+    PersistenceService.set_asset("q1", "out", {"text": "x"})
+    assert PersistenceService.get_asset("q1", "out") is PersistenceService.get_asset("q1", "out")
+
+    # Still the same once written, the stamp of the stored asset is cached
+    PersistenceService.flush()
+    stored_asset = PersistenceService.get_asset("q1", "out")
+    assert stored_asset == {"text": "x"}
+    assert PersistenceService.get_asset("q1", "out") is stored_asset
+
+
+@pytest.mark.parametrize("delay", [60.0, 0])
+def test_set_asset_invalidates_the_cached_asset(datastore, monkeypatch, delay):
+    monkeypatch.setattr(PersistenceService, "_PersistenceService__window", delay)
+    PersistenceService.set_asset("q1", "out", {"text": "old"})
+    PersistenceService.flush()
+    assert PersistenceService.get_asset("q1", "out") == {"text": "old"}
+
+    PersistenceService.set_asset("q1", "out", {"text": "new"})
+    assert PersistenceService.get_asset("q1", "out") == {"text": "new"}
+    PersistenceService.flush()
+    assert PersistenceService.get_asset("q1", "out") == {"text": "new"}
+
+
+def test_drop_assets_invalidates_the_cached_assets(datastore, window):
+    PersistenceService.set_asset("q1", "in", {"prompt": "a"})
+    PersistenceService.set_asset("q2", "in", {"prompt": "b"})
+    PersistenceService.flush()
+    assert PersistenceService.get_asset("q1", "in") == {"prompt": "a"}
+    assert PersistenceService.get_asset("q2", "in") == {"prompt": "b"}
+
+    PersistenceService.drop_assets("q1")
+    assert PersistenceService.get_asset("q1", "in") is None
+    assert PersistenceService.get_asset("q2", "in") == {"prompt": "b"}
+
+    # Created again under the same qid
+    PersistenceService.set_asset("q1", "in", {"prompt": "c"})
+    PersistenceService.flush()
+    assert PersistenceService.get_asset("q1", "in") == {"prompt": "c"}
+
+
+def test_write_of_another_process_invalidates_the_cached_asset(datastore, window):
+    PersistenceService.set_asset("q1", "ray", {"status": "RUNNING"})
+    PersistenceService.flush()
+    assert PersistenceService.get_asset("q1", "ray") == {"status": "RUNNING"}
+
+    store = open_asset_store(str(datastore), PersistenceService._PersistenceService__backend)
+    try:
+        store.write({("q1", "ray"): ('{"status": "COMPLETED"}', time.time() + 1)})
+    finally:
+        store.close()
+    assert PersistenceService.get_asset("q1", "ray") == {"status": "COMPLETED"}
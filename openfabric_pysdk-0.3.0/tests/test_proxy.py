@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from openfabric_pysdk.helper import proxy as proxy_module
+from openfabric_pysdk.helper.proxy import ExecutionResult, Proxy
+
+
+class Client:
+    def __init__(self, ssl_verify=True):
+        self.connected = False
+        self.handlers = dict()
+        self.emitted = []
+        self.__closed = threading.Event()
+
+    def event(self, handler=None, namespace='/'):
+        def register(function):
+            self.handlers[(namespace, function.__name__)] = function
+            return function
+        return register if handler is None else register(handler)
+
+    def connect(self, url, transports=None, namespaces=None):
+        self.connected = True
+
+    def wait(self):
+        self.__closed.wait()
+
+    def disconnect(self):
+        self.connected = False
+        self.__closed.set()
+
+    def emit(self, event, data=None, namespace=None):
+        self.emitted.append((event, data, namespace))
+
+    def receive(self, event, data):
+        self.handlers[('/app', event)](data)
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    monkeypatch.setattr(proxy_module.socketio, "Client", Client)
+    proxy = Proxy("http://app", connection_timeout=1)
+    yield proxy
+    proxy.disconnect()
+
+
+def response(rid, output):
+    return {"ray": {"rid": rid, "qid": "q", "status": "COMPLETED"}, "output": output}
+
+
+def test_wait_wakes_up_on_response(proxy):
+    execution = proxy.request({"prompt": "hi"}, "u")
+    assert execution.wait(timeout=0.05) is False
+
+    threading.Timer(0.05, proxy._Proxy__sio.receive, ("response", response(execution.request_id(), "out"))).start()
+    assert execution.wait(timeout=5) is True
+    assert execution.data() == "out"
+    assert execution.future().result(timeout=0) == "out"
+    assert execution.status() == "COMPLETED"
+
+
+def test_wait_wakes_up_on_cancel():
+    execution = ExecutionResult(None)
+    threading.Timer(0.05, execution.cancel).start()
+
+    assert execution.wait(timeout=5) is False
+    assert execution.status() == "CANCELLED"
+    assert execution.future().cancelled()
+
+
+def test_get_response(proxy):
+    threading.Timer(0.05, proxy._Proxy__sio.receive, ("response", response("r1", "out"))).start()
+    assert proxy.get_response("r1", timeout=5) == "out"
+
+
+def test_late_response_of_timed_out_request_is_dropped(proxy):
+    assert proxy.get_response("r1", timeout=0.05) is None
+
+    proxy._Proxy__sio.receive("response", response("r1", "late"))
+    assert proxy._Proxy__results == {}
+    # Only the first late response is expected, a reused rid is delivered again
+    proxy._Proxy__sio.receive("response", response("r1", "again"))
+    assert proxy.get_response("r1", timeout=0) == "again"
+
+
+def test_late_response_of_cancelled_request_is_dropped(proxy):
+    threading.Timer(0.05, proxy.cancel_next).start()
+    assert proxy.get_response("r1", timeout=5) is None
+
+    proxy._Proxy__sio.receive("response", response("r1", "late"))
+    assert proxy._Proxy__results == {}
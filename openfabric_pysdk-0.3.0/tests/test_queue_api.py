@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from flask_restful import Api
+
+from openfabric_pysdk.context import RayStatus
+from openfabric_pysdk.engine.engine import Engine
+from openfabric_pysdk.transport.rest import queue_api
+from openfabric_pysdk.transport.rest.queue_api import QueueListApi, decode_cursor, encode_cursor
+
+EPOCH = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def engine(datastore, monkeypatch):
+    monkeypatch.chdir(datastore)
+    engine = Engine()
+    monkeypatch.setattr(queue_api, "engine", engine)
+
+    for i in range(7):
+        ray = engine.ray(f"q{i}")
+        object.__setattr__(ray, 'uid', "u")
+        object.__setattr__(ray, 'sid', "s")
+        object.__setattr__(ray, 'created_at', EPOCH + timedelta(seconds=i // 2))
+        object.__setattr__(ray, 'status', RayStatus.COMPLETED if i % 3 == 0 else RayStatus.FAILED)
+        engine.update(ray)
+    other = engine.ray("other")
+    object.__setattr__(other, 'uid', "v")
+    engine.update(other)
+    return engine
+
+
+@pytest.fixture
+def client(engine):
+    app = Flask(__name__)
+    Api(app).add_resource(QueueListApi, '/queue/list', resource_class_kwargs={'descriptor': None})
+    return app.test_client()
+
+
+def walk(client, **query):
+    # Every page, following the cursors
+    pages = []
+    cursor = None
+    while True:
+        params = dict(query, **({'cursor': cursor} if cursor is not None else {}))
+        body = client.get('/queue/list', query_string=params, headers={'uid': 'u'}).get_json()
+        pages.append([ray['qid'] for ray in body['rays']])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor((1704067200.5, "q1"))) == (1704067200.5, "q1")
+
+
+def test_pages_from_a_start_date_are_oldest_first(client):
+    pages = walk(client, start_date=EPOCH.isoformat(), limit=3)
+    assert pages == [["q0", "q1", "q2"], ["q3", "q4", "q5"], ["q6"]]
+
+
+def test_pages_without_a_start_date_are_latest_first(client):
+    # Each page is still sorted oldest first
+    pages = walk(client, limit=3)
+    assert pages == [["q4", "q5", "q6"], ["q1", "q2", "q3"], ["q0"]]
+
+
+def test_status_and_date_filters(client):
+    assert walk(client, status="completed", limit=2) == [["q3", "q6"], ["q0"]]
+    assert walk(client, start_date=(EPOCH + timedelta(seconds=1)).isoformat(),
+                end_date=(EPOCH + timedelta(seconds=2)).isoformat()) == [["q2", "q3", "q4", "q5"]]
+    assert walk(client, status="running") == [[]]
+
+
+def test_invalid_cursor_starts_over(client):
+    assert walk(client, start_date=EPOCH.isoformat(), limit=5, cursor="not a cursor")[0] == \
+           ["q0", "q1", "q2", "q3", "q4"]
+
+
+def test_rays_of_another_user_are_not_listed(client):
+    body = client.get('/queue/list', headers={'uid': 'v'}).get_json()
+    assert [ray['qid'] for ray in body['rays']] == ["other"]
+    assert body['next_cursor'] is None
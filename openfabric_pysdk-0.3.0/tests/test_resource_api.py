@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from flask_restful import Api
+
+from openfabric_pysdk.service.hash_service import HashService
+from openfabric_pysdk.service.resource_service import ResourceService
+from openfabric_pysdk.transport.rest.execution_api import ResourceApi
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResourceService, "_ResourceService__path", str(tmp_path))
+    app = Flask(__name__)
+    Api(app).add_resource(ResourceApi, '/resource', resource_class_kwargs={'descriptor': None})
+    return app.test_client()
+
+
+@pytest.fixture
+def reid(client):
+    with ResourceService.location("q1"):
+        return ResourceService.write("content", HashService.compute_hash("content"), "text", "blob")
+
+
+def http_date(delta: timedelta) -> str:
+    return (datetime.utcnow() + delta).strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+
+def test_resource_is_cached_for_good(client, reid):
+    response = client.get('/resource', query_string={'reid': reid})
+
+    assert response.status_code == 200
+    assert response.data == b"content"
+    assert response.mimetype == "text/plain"
+    assert response.headers['ETag'] == f'"{reid.split("/")[0]}"'
+    assert response.headers['Cache-Control'] == IMMUTABLE
+
+
+def test_matching_etag_is_not_modified(client, reid):
+    etag = reid.split('/')[0]
+    response = client.get('/resource', query_string={'reid': reid}, headers={'If-None-Match': f'"{etag}"'})
+
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers['ETag'] == f'"{etag}"'
+    assert response.headers['Cache-Control'] == IMMUTABLE
+
+    response = client.get('/resource', query_string={'reid': reid}, headers={'If-None-Match': '"other"'})
+    assert response.status_code == 200
+    assert response.data == b"content"
+
+
+def test_modified_since_is_checked_against_the_file(client, reid):
+    response = client.get('/resource', query_string={'reid': reid},
+                          headers={'If-Modified-Since': http_date(timedelta(days=1))})
+    assert response.status_code == 304
+    assert response.headers['Cache-Control'] == IMMUTABLE
+
+    response = client.get('/resource', query_string={'reid': reid},
+                          headers={'If-Modified-Since': http_date(-timedelta(days=1))})
+    assert response.status_code == 200
+    assert response.data == b"content"
+
+
+def test_missing_resource_is_not_found(client, reid):
+    missing = reid.replace("/q1", "/q2")
+    for headers in ({}, {'If-Modified-Since': http_date(timedelta(days=1))}):
+        response = client.get('/resource', query_string={'reid': missing}, headers=headers)
+        assert response.status_code == 404
+        assert response.headers['Cache-Control'] == 'no-store, must-revalidate'
+        assert 'ETag' not in response.headers
+
+
+def test_other_resources_are_revalidated(client, tmp_path):
+    (tmp_path / "executions" / "q1").mkdir(parents=True)
+    (tmp_path / "executions" / "q1" / "image.png").write_bytes(b"content")
+
+    response = client.get('/resource', query_string={'reid': "image.png/executions/q1"})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=0, must-revalidate'
+    etag = response.headers['ETag']
+
+    response = client.get('/resource', query_string={'reid': "image.png/executions/q1"},
+                          headers={'If-None-Match': etag})
+    assert response.status_code == 304
@@ -0,0 +1,96 @@
+import os
+import time
+
+import pytest
+
+from openfabric_pysdk.helper.resource_cache import ResourceCache
+
+
+def reid(name):
+    return f"image_png_{name * 32}/executions/q1"
+
+
+def key(name):
+    return reid(name).split('/')[0]
+
+
+@pytest.fixture
+def location(tmp_path):
+    return str(tmp_path / "cache")
+
+
+def test_entries_are_addressed_by_content(location):
+    cache = ResourceCache(location, memory_limit=1024, disk_limit=1024)
+    cache.put(reid("a"), b"content")
+
+    # Same content, produced by another execution
+    assert cache.get(f"{key('a')}/executions/q2") == b"content"
+    assert cache.path(reid("a")) == f"{location}/{key('a')}"
+    # Only content addressed reids are cached
+    cache.put("image.png/executions/q1", b"content")
+    assert cache.get("image.png/executions/q1") is None
+    assert os.listdir(location) == [key("a")]
+
+
+def test_memory_evicts_least_recently_used(location):
+    cache = ResourceCache(location, memory_limit=8, disk_limit=0)
+    cache.put(reid("a"), b"aaaa")
+    cache.put(reid("b"), b"bbbb")
+    assert cache.get(reid("a")) == b"aaaa"
+
+    # Evicts "b", "a" was used since
+    cache.put(reid("c"), b"cccc")
+    assert cache.get(reid("a")) == b"aaaa"
+    assert cache.get(reid("b")) is None
+    assert cache.get(reid("c")) == b"cccc"
+
+    # Larger than the whole cache, never kept
+    cache.put(reid("d"), b"dddddddddd")
+    assert cache.get(reid("d")) is None
+    assert cache.get(reid("a")) == b"aaaa"
+
+
+def test_disk_evicts_least_recently_used(location):
+    cache = ResourceCache(location, memory_limit=0, disk_limit=8)
+    cache.put(reid("a"), b"aaaa")
+    cache.put(reid("b"), b"bbbb")
+    assert cache.path(reid("a")) is not None
+
+    cache.put(reid("c"), b"cccc")
+    assert sorted(os.listdir(location)) == [key("a"), key("c")]
+    assert cache.get(reid("b")) is None
+    assert cache.get(reid("a")) == b"aaaa"
+
+    cache.put(reid("d"), b"dddddddddd")
+    assert cache.path(reid("d")) is None
+    assert sorted(os.listdir(location)) == [key("a"), key("c")]
+
+
+def test_disk_index_is_rebuilt_by_recency(location):
+    cache = ResourceCache(location, memory_limit=0, disk_limit=1024)
+    for index, name in enumerate("abc"):
+        cache.put(reid(name), name.encode() * 4)
+        # Oldest first
+        os.utime(f"{location}/{key(name)}", (time.time() - 100 + index, time.time() - 100 + index))
+    # Leftover of an interrupted write
+    with open(f"{location}/.{key('d')}.tmp", "wb") as f:
+        f.write(b"dddd")
+
+    # Used again, "a" becomes the most recent
+    restarted = ResourceCache(location, memory_limit=0, disk_limit=1024)
+    assert restarted.get(reid("a")) == b"aaaa"
+
+    # Restarted with a smaller limit, the least recently used entries go first
+    restarted = ResourceCache(location, memory_limit=0, disk_limit=8)
+    assert restarted.path(reid("b")) is None
+    assert restarted.get(reid("c")) == b"cccc"
+    assert restarted.get(reid("a")) == b"aaaa"
+
+
+def test_clear(location):
+    cache = ResourceCache(location, memory_limit=1024, disk_limit=1024)
+    cache.put(reid("a"), b"aaaa")
+    cache.clear()
+
+    assert cache.get(reid("a")) is None
+    assert os.listdir(location) == []
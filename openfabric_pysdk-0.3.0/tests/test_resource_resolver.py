@@ -0,0 +1,188 @@
+import os
+import threading
+
+import pytest
+import requests
+from marshmallow import class_registry
+
+from openfabric_pysdk.fields import Resource
+from openfabric_pysdk.helper import resource_resolver
+from openfabric_pysdk.helper.resource_cache import ResourceCache
+from openfabric_pysdk.helper.resource_resolver import compile_schema, fetch_data, json_schema_to_marshmallow, \
+    resolve_resources
+from openfabric_pysdk.service.resource_service import ResourceService
+from openfabric_pysdk.store.lru import LRU
+
+
+def output_schema(item_property="name", image=True):
+    properties = {"items": {"type": "array", "items": {"$ref": "#/definitions/Item"}}}
+    if image:
+        properties["image"] = {"type": "string", "is_resource": True, "resource_type": "image"}
+    return {
+        "$ref": "#/definitions/Output",
+        "definitions": {
+            "Output": {"type": "object", "properties": properties},
+            "Item": {"type": "object", "properties": {item_property: {"type": "string"}}},
+        },
+    }
+
+
+@pytest.fixture
+def compiled_schemas(monkeypatch):
+    cache = LRU(2)
+    monkeypatch.setattr(resource_resolver, "_compiled_schemas", cache)
+    return cache
+
+
+def test_compiled_schema_is_reused(compiled_schemas):
+    compiled = compile_schema(output_schema())
+
+    # Same content, whatever the order of the keys
+    reordered = dict(reversed(list(output_schema().items())))
+    assert compile_schema(reordered) is compiled
+    assert json_schema_to_marshmallow(output_schema()) is compiled.schema_class
+    assert compile_schema(output_schema(image=False)) is not compiled
+
+
+def test_compiled_schema_lists_its_resources(compiled_schemas):
+    compiled = compile_schema(output_schema())
+    assert compiled.has_resources
+    assert compiled.resource_paths == ["image"]
+    assert compiled.field_types["image"] is Resource
+
+    assert not compile_schema(output_schema(image=False)).has_resources
+
+
+def test_least_recently_used_schema_is_compiled_again(compiled_schemas):
+    first = compile_schema(output_schema("a"))
+    second = compile_schema(output_schema("b"))
+    assert compile_schema(output_schema("a")) is first
+
+    # Evicts "b", the least recently used one
+    compile_schema(output_schema("c"))
+    assert compile_schema(output_schema("a")) is first
+    assert compile_schema(output_schema("b")) is not second
+
+
+def test_reused_schema_takes_its_nested_definitions_back(compiled_schemas):
+    first = compile_schema(output_schema("a"))
+    second = compile_schema(output_schema("b"))
+    assert class_registry.get_class("Item") is second.schemas["Item"]
+
+    assert compile_schema(output_schema("a")) is first
+    assert class_registry.get_class("Item") is first.schemas["Item"]
+    assert first.schema.load({"items": [{"a": "x"}]}) == {"items": [{"a": "x"}]}
+
+
+class Response:
+    def __init__(self, content, fail_after=None, status=200):
+        self.content = content
+        self.__fail_after = fail_after
+        self.__status = status
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.__status >= 400:
+            raise requests.HTTPError(f"{self.__status}")
+
+    def iter_content(self, chunk_size=None):
+        for index in range(0, len(self.content), 4):
+            if self.__fail_after is not None and index >= self.__fail_after:
+                raise requests.ConnectionError("connection lost")
+            yield self.content[index:index + 4]
+
+
+class Session:
+    def __init__(self):
+        self.responses = dict()
+        self.urls = []
+        self.active = 0
+        self.concurrent = 0
+        self.__lock = threading.Lock()
+        self.gate = threading.Barrier(1)
+
+    def get(self, url, params=None, headers=None, timeout=None, stream=False):
+        with self.__lock:
+            self.urls.append(url)
+            self.active += 1
+            self.concurrent = max(self.concurrent, self.active)
+        try:
+            self.gate.wait(timeout=5)
+        except threading.BrokenBarrierError:
+            pass
+        with self.__lock:
+            self.active -= 1
+        return self.responses[url]
+
+
+def reid(name):
+    return f"image_png_{name * 32}/executions/q1"
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    session = Session()
+    monkeypatch.setattr(resource_resolver, "_session", session)
+    monkeypatch.setattr(resource_resolver, "resource_cache",
+                        ResourceCache(str(tmp_path / "cache"), memory_limit=1024, disk_limit=1024))
+    monkeypatch.setattr(ResourceService, "_ResourceService__path", str(tmp_path / "datastore"))
+    return session
+
+
+def test_download_is_atomic(session, tmp_path):
+    url = "https://app/resource?reid=" + reid("a")
+    target = tmp_path / "downloads" / "image.png"
+    target.parent.mkdir()
+    target.write_bytes(b"previous")
+
+    session.responses[url] = Response(b"0123456789abcdef", fail_after=8)
+    assert fetch_data(url, path=str(target)) is None
+    # Nothing half written, the previous file is left as it was
+    assert target.read_bytes() == b"previous"
+    assert os.listdir(target.parent) == ["image.png"]
+
+    session.responses[url] = Response(b"", status=404)
+    assert fetch_data(url, path=str(target)) is None
+    assert target.read_bytes() == b"previous"
+
+    session.responses[url] = Response(b"0123456789abcdef")
+    assert fetch_data(url, path=str(target)) == str(target)
+    assert target.read_bytes() == b"0123456789abcdef"
+    assert os.listdir(target.parent) == ["image.png"]
+
+
+def test_downloaded_resource_is_cached(session, tmp_path):
+    url = "https://app/resource?reid=" + reid("a")
+    session.responses[url] = Response(b"content")
+
+    assert fetch_data(url, path=str(tmp_path / "first")) == str(tmp_path / "first")
+    assert fetch_data(url, path=str(tmp_path / "second")) == str(tmp_path / "second")
+    assert fetch_data(url) == b"content"
+    assert session.urls == [url]
+    assert (tmp_path / "second").read_bytes() == b"content"
+
+
+def test_resources_are_downloaded_once_in_parallel(session, compiled_schemas):
+    schema = {
+        "$ref": "#/definitions/Output",
+        "definitions": {"Output": {"type": "object", "properties": {
+            name: {"type": "string", "is_resource": True} for name in ("first", "second", "again")}}},
+    }
+    compiled = compile_schema(schema)
+    for name in ("a", "b"):
+        session.responses[f"https://app/resource?reid={reid(name)}"] = Response(name.encode())
+    # Both downloads have to be in flight at the same time to get through
+    session.gate = threading.Barrier(2)
+
+    output = resolve_resources("https://app/resource?reid={reid}",
+                               {"first": reid("a"), "second": reid("b"), "again": reid("a")},
+                               compiled.schema, compiled.field_types)
+
+    assert output == {"first": b"a", "second": b"b", "again": b"a"}
+    assert sorted(session.urls) == [f"https://app/resource?reid={reid(name)}" for name in ("a", "b")]
+    assert session.concurrent == 2
@@ -0,0 +1,160 @@
+import os
+import threading
+
+import gevent
+import pytest
+from gevent.event import Event
+
+from openfabric_pysdk.service.hash_service import HashService
+from openfabric_pysdk.service.resource_service import MIME_ATTRIBUTE, ResourceService
+from openfabric_pysdk.store.lru import LRU
+
+
+def dump(data):
+    return ResourceService.write(data, HashService.compute_hash(data), "text", "blob")
+
+
+def write(qid, data):
+    with ResourceService.location(qid):
+        return dump(data)
+
+
+@pytest.fixture
+def resources(tmp_path, monkeypatch):
+    monkeypatch.setattr(ResourceService, "_ResourceService__path", str(tmp_path))
+    monkeypatch.setattr(ResourceService, "_ResourceService__mimes", LRU(16))
+    return tmp_path
+
+
+def test_resources_are_linked_from_the_content_store(resources):
+    reid = write("q1", "content")
+    name = f"text_blob_{HashService.compute_hash('content')}"
+
+    assert reid == f"{name}/executions/q1"
+    blob = resources / "blobs" / name
+    assert os.path.samefile(resources / "executions" / "q1" / name, blob)
+    assert ResourceService.read(reid) == (b"content", "text/plain")
+    assert ResourceService.locate(reid) == (f"{resources}/executions/q1/{name}", "text/plain")
+
+
+def test_outside_of_an_execution(resources):
+    reid = write(None, b"content")
+    assert reid.endswith("/resources")
+    assert ResourceService.read(reid)[0] == b"content"
+
+
+def test_the_same_content_is_stored_once(resources):
+    first = write("q1", "content")
+    second = write("q2", "content")
+
+    name = first.split('/')[0]
+    assert second == f"{name}/executions/q2"
+    assert os.stat(resources / "blobs" / name).st_nlink == 3
+
+
+def test_drop_keeps_the_blobs_still_linked(resources):
+    shared = write("q1", "shared").split('/')[0]
+    write("q2", "shared")
+    own = write("q1", "own").split('/')[0]
+    (resources / "executions" / "q1" / "out.json").write_text("{}")
+
+    ResourceService.drop("q1")
+    assert not (resources / "executions" / "q1" / shared).exists()
+    assert not (resources / "executions" / "q1" / own).exists()
+    assert not (resources / "blobs" / own).exists()
+    assert (resources / "blobs" / shared).exists()
+    # Not a resource
+    assert (resources / "executions" / "q1" / "out.json").exists()
+
+    ResourceService.drop("q2")
+    assert not (resources / "blobs" / shared).exists()
+    ResourceService.drop("unknown")
+
+
+def test_dropped_blobs_are_written_again(resources):
+    name = write("q1", "content").split('/')[0]
+    ResourceService.drop("q1")
+    assert not (resources / "blobs" / name).exists()
+
+    assert write("q2", "content") == f"{name}/executions/q2"
+    assert (resources / "blobs" / name).exists()
+    assert ResourceService.read(f"{name}/executions/q2")[0] == b"content"
+
+
+
+def test_resources_do_not_leave_their_location(resources):
+    write("q1", "content")
+    (resources / "state.json").write_text("{}")
+    (resources / "tasks.db").write_text("")
+
+    assert ResourceService.locate("tasks.db/executions/../..") == (None, None)
+    assert ResourceService.locate("tasks.db/executions/..") == (None, None)
+    assert ResourceService.locate("state.json") == (None, None)
+    assert ResourceService.locate("missing/executions/q1") == (None, None)
+    # The directory of the execution is not a resource either
+    assert ResourceService.locate("q1/executions") == (None, None)
+    assert ResourceService.read("missing/executions/q1") == (None, None)
+
+
+def test_mime_type_is_read_from_the_extended_attribute(resources, monkeypatch):
+    reid = write("q1", "content")
+    path, _mime = ResourceService.locate(reid)
+    try:
+        assert os.getxattr(path, MIME_ATTRIBUTE) == b"text/plain"
+    except OSError:
+        pytest.skip("no extended attributes on this file system")
+
+    # Not sniffed again, as in another process
+    os.setxattr(path, MIME_ATTRIBUTE, b"text/x-saved")
+    monkeypatch.setattr(ResourceService, "_ResourceService__mimes", LRU(16))
+    assert ResourceService.locate(reid) == (path, "text/x-saved")
+
+
+def test_mime_type_is_sniffed_without_extended_attributes(resources, monkeypatch):
+    def unsupported(*args):
+        raise OSError(95, "Operation not supported")
+
+    monkeypatch.setattr(os, "getxattr", unsupported)
+    monkeypatch.setattr(os, "setxattr", unsupported)
+
+    reid = write("q1", "content")
+    assert ResourceService.read(reid) == (b"content", "text/plain")
+    # Sniffed from the file, then served from the cache
+    monkeypatch.setattr(ResourceService, "_ResourceService__magic", None)
+    assert ResourceService.locate(reid)[1] == "text/plain"
+
+
+def test_locations_are_isolated_between_greenlets(resources):
+    entered = {qid: Event() for qid in ("q1", "q2")}
+
+    def serialize(qid, other):
+        with ResourceService.location(qid):
+            entered[qid].set()
+            # Both blocks are open at the same time
+            entered[other].wait(5)
+            reid = dump(f"content of {qid}")
+        return reid, dump("after")
+
+    first = gevent.spawn(serialize, "q1", "q2")
+    second = gevent.spawn(serialize, "q2", "q1")
+    gevent.joinall([first, second], timeout=5)
+
+    assert first.value[0].endswith("/executions/q1")
+    assert second.value[0].endswith("/executions/q2")
+    # Restored on leaving the block
+    assert first.value[1].endswith("/resources") and second.value[1].endswith("/resources")
+
+
+def test_locations_are_not_inherited_by_threads(resources):
+    results = []
+    with ResourceService.location("q1"):
+        # A thread (a greenlet once patched) and a native thread of the hub
+        thread = threading.Thread(target=lambda: results.append(dump("thread")))
+        thread.start()
+        thread.join()
+        results.append(gevent.get_hub().threadpool.spawn(write, "q2", "native").get())
+        results.append(dump("caller"))
+
+    assert results[0].endswith("/resources")
+    assert results[1].endswith("/executions/q2")
+    assert results[2].endswith("/executions/q1")
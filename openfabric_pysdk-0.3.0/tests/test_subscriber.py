@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+import zmq
+
+from openfabric_pysdk.app.execution.ipc.publisher import Publisher
+from openfabric_pysdk.app.execution.ipc.subscriber import Subscriber
+
+
+def free_address():
+    context = zmq.Context()
+    socket = context.socket(zmq.PUB)
+    port = socket.bind_to_random_port("tcp://127.0.0.1")
+    socket.close(linger=0)
+    context.term()
+    return f"tcp://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def publisher():
+    address = free_address()
+    publisher = Publisher(address)
+    yield publisher, address
+    publisher.close()
+
+
+def deliver(publisher, received, message, timeout=5.0):
+    # A subscriber misses what is sent before its connection is up, send until it gets through
+    deadline = time.monotonic() + timeout
+    while message not in received:
+        assert time.monotonic() < deadline
+        publisher.publish(message)
+        time.sleep(0.05)
+
+
+def test_subscriber_delivers_messages_and_stops(publisher):
+    publisher, address = publisher
+    received = []
+    subscriber = Subscriber(address, callback=received.append)
+    handler = subscriber._Subscriber__execution
+    assert handler.is_alive()
+
+    deliver(publisher, received, [b"action", b"payload"])
+
+    # Asked to stop through the control socket, the handler thread exits and releases the sockets
+    subscriber.close()
+    assert not handler.is_alive()
+    assert subscriber.subscriber_socket.closed
+    assert subscriber.context.closed
+    # Closing again is a no-op
+    subscriber.close()
+
+
+def test_failing_callback_does_not_stop_the_subscriber(publisher):
+    publisher, address = publisher
+    received = []
+
+    def callback(message):
+        if message == [b"fail"]:
+            raise ValueError("cannot handle")
+        received.append(message)
+
+    subscriber = Subscriber(address, callback=callback)
+    try:
+        publisher.publish([b"fail"])
+        deliver(publisher, received, [b"ok"])
+    finally:
+        subscriber.close()
+    assert not subscriber._Subscriber__execution.is_alive()
+
+
+def test_stop_from_the_callback(publisher):
+    publisher, address = publisher
+    stopped = threading.Event()
+    subscriber = None
+
+    def callback(message):
+        subscriber.close()
+        stopped.set()
+
+    subscriber = Subscriber(address, callback=callback)
+    deadline = time.monotonic() + 5.0
+    while not stopped.is_set():
+        assert time.monotonic() < deadline
+        publisher.publish([b"exit"])
+        time.sleep(0.05)
+
+    subscriber._Subscriber__execution.join(5.0)
+    assert not subscriber._Subscriber__execution.is_alive()
@@ -0,0 +1,219 @@
+import threading
+import time
+import types
+
+import pytest
+
+from openfabric_pysdk import engine as engine_package
+from openfabric_pysdk.app import supervisor as supervisor_module
+from openfabric_pysdk.app import worker as worker_module
+from openfabric_pysdk.app.execution import ActionEncoder
+from openfabric_pysdk.app.supervisor import Supervisor
+from openfabric_pysdk.app.worker import Worker
+from openfabric_pysdk.context import Ray, RayStatus, State, StateSchema, StateStatus
+from openfabric_pysdk.context.ray_schema import RaySchemaInst
+from openfabric_pysdk.engine.engine import Engine
+
+
+class Context:
+    def __init__(self, publisher_port, subscriber_port):
+        self.published = []
+
+    def register(self, callback):
+        pass
+
+    def publish(self, data):
+        self.published.append(data)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def state(status: StateStatus):
+    state = State()
+    state.status = status
+    return StateSchema().dump(state)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(worker_module, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+@pytest.fixture
+def starts(monkeypatch):
+    # No executor processes, the workers only record their starts
+    starts = []
+    monkeypatch.setattr(worker_module, "ExecutionContext", Context)
+    monkeypatch.setattr(Worker, "start", lambda self: starts.append(self.index))
+    monkeypatch.setattr(Worker, "kill", lambda self: None)
+    return starts
+
+
+@pytest.fixture
+def supervisor(monkeypatch, starts, clock):
+    monkeypatch.setattr(Supervisor, "workers", 3)
+    supervisor = Supervisor()
+    for worker in workers(supervisor):
+        worker.onAppState(state(StateStatus.RUNNING))
+    starts.clear()
+    return supervisor
+
+
+def workers(supervisor):
+    return supervisor._Supervisor__workers
+
+
+def route(supervisor, qid):
+    worker = supervisor._Supervisor__route(qid)
+    return None if worker is None else worker.index
+
+
+def test_a_process_per_worker(monkeypatch, starts):
+    monkeypatch.setattr(Supervisor, "workers", 3)
+    supervisor = Supervisor()
+    assert starts == [0, 1, 2]
+    assert [worker.index for worker in workers(supervisor)] == [0, 1, 2]
+    # Each worker has its own pair of ports
+    ports = [port for worker in workers(supervisor) for port in (worker.publisher_port, worker.subscriber_port)]
+    assert len(set(ports)) == 6
+
+
+def test_requests_go_to_the_least_loaded_worker(supervisor):
+    assert [route(supervisor, f"q{i}") for i in range(4)] == [0, 1, 2, 0]
+    # Routed again (watchdog), the request stays where it is
+    assert route(supervisor, "q1") == 1
+    assert [worker.load() for worker in workers(supervisor)] == [2, 1, 1]
+
+    workers(supervisor)[1].release("q1")
+    assert route(supervisor, "q4") == 1
+
+
+def test_requests_leave_a_crashed_worker(supervisor):
+    route(supervisor, "q0")
+    route(supervisor, "q1")
+    workers(supervisor)[0].onAppState(state(StateStatus.CRASHED))
+
+    # The application stays available through the other workers
+    assert supervisor.state.status == StateStatus.RUNNING
+    assert route(supervisor, "q0") == 2
+    assert not workers(supervisor)[0].owns("q0")
+    assert route(supervisor, "q2") == 1
+
+    for worker in workers(supervisor)[1:]:
+        worker.onAppState(state(StateStatus.CRASHED))
+    assert supervisor.state.status == StateStatus.CRASHED
+    assert route(supervisor, "q3") is None
+
+
+def test_dispatch_targets(supervisor):
+    worker = workers(supervisor)[1]
+    supervisor.dispatch([b"one"], worker=worker)
+    supervisor.dispatch([b"all"], False)
+
+    assert [w.executionContext.published for w in workers(supervisor)] == [[[b"all"]], [[b"one"], [b"all"]], [[b"all"]]]
+
+
+def test_crashed_workers_restart_with_a_growing_delay(supervisor, starts, clock):
+    worker = workers(supervisor)[0]
+
+    delays = []
+    for _ in range(8):
+        worker.onAppState(state(StateStatus.CRASHED))
+        crashed_at = clock.now
+        while not worker.recover():
+            clock.now += 0.5
+        delays.append(clock.now - crashed_at)
+        assert worker.state.status == StateStatus.STARTING
+    assert delays == [1, 2, 4, 8, 16, 32, 60, 60]
+    assert starts == [0] * 8
+
+    # Back to the shortest delay once the executor runs again
+    worker.onAppState(state(StateStatus.RUNNING))
+    assert not worker.recover()
+    worker.onAppState(state(StateStatus.CRASHED))
+    clock.now += 1
+    assert worker.recover()
+
+
+def test_routing_restarts_the_crashed_workers(supervisor, starts, clock):
+    workers(supervisor)[2].onAppState(state(StateStatus.CRASHED))
+    route(supervisor, "q0")
+    assert starts == []
+
+    clock.now += 1
+    assert route(supervisor, "q1") == 1
+    assert starts == [2]
+    assert workers(supervisor)[2].state.status == StateStatus.STARTING
+    assert supervisor.state.status == StateStatus.RUNNING
+
+
+def finished(qid: str, status: RayStatus):
+    ray = Ray(qid)
+    ray.sid = "s"
+    ray.status = status
+    ray.complete()
+    return RaySchemaInst.dump(ray)
+
+
+def execute(supervisor, ray):
+    # Runs the callback as the engine does, returns how long it waited
+    waited = []
+
+    def run():
+        started = time.monotonic()
+        supervisor.execution_callback_function(None, ray)
+        waited.append(time.monotonic() - started)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    while not any(worker.owns(ray.qid) for worker in workers(supervisor)):
+        time.sleep(0.01)
+    return thread, waited
+
+
+@pytest.fixture
+def engine(datastore, monkeypatch):
+    # The rays of a previous test must not be cached
+    engine = Engine()
+    monkeypatch.setattr(engine_package, "engine", engine)
+    return engine
+
+
+def test_finished_ray_wakes_up_the_callback(engine, supervisor):
+    ray = engine.ray("q1")
+    ray.sid = "s"
+    thread, waited = execute(supervisor, ray)
+    assert [w.executionContext.published for w in workers(supervisor)][0] == [ActionEncoder.add("q1")]
+
+    # Progress does not complete the request
+    supervisor.onUpdate({"qid": "q1", "ray": RaySchemaInst.dump(ray)})
+    time.sleep(0.1)
+    assert thread.is_alive()
+
+    supervisor.onUpdate({"qid": "q1", "ray": finished("q1", RayStatus.COMPLETED)})
+    thread.join(5)
+    # Well before the watchdog would have looked at the ray
+    assert waited[0] < 0.9
+    assert ray.finished and ray.status == RayStatus.COMPLETED
+    assert supervisor._Supervisor__completions == dict()
+    assert not any(worker.owns("q1") for worker in workers(supervisor))
+
+
+def test_cancel_wakes_up_the_callback(engine, supervisor):
+    ray = engine.ray("q2")
+    ray.sid = "s"
+    thread, waited = execute(supervisor, ray)
+
+    supervisor.cancel_execution(ray)
+    thread.join(5)
+    assert waited[0] < 0.9
+    assert ray.status == RayStatus.CANCELED
+    assert supervisor._Supervisor__completions == dict()
@@ -0,0 +1,95 @@
+import queue
+from datetime import datetime, timedelta
+
+import pytest
+
+from openfabric_pysdk.store import Store
+from openfabric_pysdk.task import STATE, Task, TaskType
+
+EPOCH = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def task(tmp_path):
+    return Task(path=str(tmp_path))
+
+
+def test_queue_order(task):
+    for tid in ("q1", "q2", "q3"):
+        task.add(tid)
+    # Queued again, at the end
+    task.add("q1")
+
+    assert [task.next(), task.next(), task.next()] == ["q2", "q3", "q1"]
+    assert task.empty()
+    with pytest.raises(queue.Empty):
+        task.next()
+    assert task.all() == ["q2", "q3", "q1"]
+
+
+def test_rem_drops_the_task_and_its_index(task):
+    task.add("q1")
+    task.index("q1", "u", EPOCH, "QUEUED")
+    task.rem("q1")
+
+    assert task.all() == []
+    assert task.find("u") == []
+
+
+def test_find_and_unindexed(task):
+    for i, tid in enumerate(("q3", "q1", "q2")):
+        task.add(tid)
+        task.index(tid, "u" if tid != "q2" else "v", EPOCH + timedelta(seconds=i), "QUEUED")
+    task.add("q4")
+
+    assert task.find() == ["q3", "q1", "q2"]
+    assert task.find("u") == ["q3", "q1"]
+    assert task.unindexed() == ["q4"]
+
+
+def test_page_walks_every_ray_once(task):
+    # Rays sharing a creation time are ordered by qid
+    for i in range(10):
+        task.index(f"q{i}", "u", EPOCH + timedelta(seconds=i // 2), "COMPLETED" if i % 3 == 0 else "QUEUED")
+    task.index("other", "v", EPOCH, "QUEUED")
+
+    for descending in (False, True):
+        qids, after = [], None
+        while True:
+            page, after = task.page("u", after=after, limit=3, descending=descending)
+            assert len(page) <= 3
+            qids += page
+            if after is None:
+                break
+        expected = [f"q{i}" for i in range(10)]
+        assert qids == (list(reversed(expected)) if descending else expected)
+
+
+def test_page_filters(task):
+    for i in range(10):
+        task.index(f"q{i}", "u", EPOCH + timedelta(seconds=i), "COMPLETED" if i % 3 == 0 else "QUEUED")
+
+    assert task.page("u", status="COMPLETED") == (["q0", "q3", "q6", "q9"], None)
+    assert task.page("u", start=EPOCH + timedelta(seconds=2), end=EPOCH + timedelta(seconds=4)) == \
+           (["q2", "q3", "q4"], None)
+    assert task.page("u", limit=4) == (["q0", "q1", "q2", "q3"], (
+        (EPOCH + timedelta(seconds=3)).timestamp(), "q3"))
+    assert task.page("nobody") == ([], None)
+
+
+def test_migrates_the_state_of_previous_versions(tmp_path):
+    store = Store(path=str(tmp_path))
+    store.set(STATE, str(TaskType.QUEUED), ["q4", "q2"])
+    store.set(STATE, str(TaskType.REQUESTED), ["q2", "q3"])
+    store.set(STATE, str(TaskType.COMPLETED), ["q1"])
+    store.flush(STATE)
+
+    task = Task(path=str(tmp_path))
+    assert task.all() == ["q3", "q1", "q4", "q2"]
+    assert [task.next(), task.next()] == ["q4", "q2"]
+    assert task.empty()
+
+    # Only once, when the database is created
+    task.add("q5")
+    del task
+    assert Task(path=str(tmp_path)).all() == ["q3", "q1", "q4", "q2", "q5"]
@@ -0,0 +1,81 @@
+import pickle
+
+from openfabric_pysdk.utility import TrackedDict, TrackedList, TrackedObject, TrackingUtil
+
+
+class Concept(TrackedObject):
+    pass
+
+
+def test_assignment_bumps_the_version():
+    concept = Concept()
+    concept.name = "a"
+    first = TrackingUtil.version(concept)
+
+    concept.name = "b"
+    assert TrackingUtil.version(concept) > first
+    assert TrackingUtil.version("plain") is None
+
+
+def test_assigned_containers_are_tracked():
+    concept = Concept()
+    concept.items = [1, [2]]
+    concept.options = {"size": {"width": 1}}
+
+    assert isinstance(concept.items, TrackedList) and isinstance(concept.items[1], TrackedList)
+    assert isinstance(concept.options, TrackedDict) and isinstance(concept.options["size"], TrackedDict)
+    assert concept.items == [1, [2]] and concept.options == {"size": {"width": 1}}
+    assert TrackingUtil.version(concept) is not None
+
+
+def test_nested_mutations_bump_the_holders():
+    concept = Concept()
+    concept.items = [[1]]
+    concept.options = {}
+
+    for mutate in (lambda: concept.items[0].append(2),
+                   lambda: concept.items.append({"key": "value"}),
+                   lambda: concept.items[1].update(key=[]),
+                   lambda: concept.items[1]["key"].append(3),
+                   lambda: concept.options.setdefault("size", {"width": 1}),
+                   lambda: concept.options["size"].pop("width"),
+                   lambda: concept.options.__setitem__("width", 1)):
+        before = TrackingUtil.version(concept)
+        mutate()
+        assert TrackingUtil.version(concept) > before
+
+    assert concept.items == [[1, 2], {"key": [3]}]
+    assert isinstance(concept.options["size"], TrackedDict)
+
+
+def test_released_values_no_longer_bump_their_holder():
+    concept = Concept()
+    concept.items = [1]
+    items = concept.items
+    concept.items = [2]
+
+    before = TrackingUtil.version(concept)
+    items.append(3)
+    assert TrackingUtil.version(concept) == before
+
+
+def test_untracked_mutable_values_make_the_holders_opaque():
+    concept = Concept()
+    concept.items = [Concept()]
+    concept.items[0].tags = {"a"}
+
+    assert TrackingUtil.version(concept.items[0]) is None
+    assert TrackingUtil.version(concept.items) is None
+    assert TrackingUtil.version(concept) is None
+
+
+def test_pickled_object_is_tracked_again():
+    concept = Concept()
+    concept.items = [{"key": "value"}]
+
+    restored = pickle.loads(pickle.dumps(concept))
+    assert restored.items == [{"key": "value"}]
+    assert isinstance(restored.items[0], TrackedDict)
+    before = TrackingUtil.version(restored)
+    restored.items[0]["key"] = "other"
+    assert TrackingUtil.version(restored) > before
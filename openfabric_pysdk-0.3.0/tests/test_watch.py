@@ -0,0 +1,191 @@
+import pytest
+from deepdiff import Delta
+from marshmallow import Schema, fields
+
+from openfabric_pysdk.context import Ray
+from openfabric_pysdk.transport.socket.handlers import watch
+from openfabric_pysdk.transport.socket.handlers.watch import PartialBroadcaster
+from openfabric_pysdk.utility import JsonPatch
+
+OutputSchema = Schema.from_dict({"message": fields.Str()})
+
+
+class Output:
+    def __init__(self, message):
+        self.message = message
+
+
+class Engine:
+    def __init__(self):
+        self.outputs = dict()
+        self.listener = None
+
+    def on_partial_output(self, listener):
+        self.listener = listener
+
+    def get_partial_output(self, qid):
+        return self.outputs.get(qid, None)
+
+    def ray(self, qid):
+        return Ray(qid=qid)
+
+    def update(self, qid, message):
+        self.outputs[qid] = Output(message)
+        self.listener(qid)
+
+
+class Namespace:
+    def __init__(self):
+        self.messages = []
+
+    def emit(self, event, message, room=None):
+        self.messages.append((room, message['output']))
+
+    def take(self):
+        messages, self.messages = self.messages, []
+        return [(room, output['qid'], output['refresh']) for room, output in messages]
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(watch, "getSchemaInst", lambda schema: OutputSchema())
+    return Engine()
+
+
+@pytest.fixture
+def namespace():
+    return Namespace()
+
+
+def test_subscribe_sends_the_current_output(engine, namespace):
+    broadcaster = PartialBroadcaster(namespace, engine)
+
+    # Nothing to send yet
+    broadcaster.subscribe("s1", "q1")
+    assert namespace.take() == []
+
+    engine.update("q1", "a")
+    assert namespace.take() == [("s1", "q1", True)]
+
+    broadcaster.subscribe("s2", "q1")
+    assert namespace.take() == [("s2", "q1", True)]
+
+
+def test_publish_reaches_the_watchers_of_the_execution_only(engine, namespace):
+    broadcaster = PartialBroadcaster(namespace, engine)
+    broadcaster.subscribe("s1", "q1")
+    broadcaster.subscribe("s2", "q1")
+    broadcaster.subscribe("s3", "q2")
+
+    engine.update("q1", "a")
+    assert sorted(namespace.take()) == [("s1", "q1", True), ("s2", "q1", True)]
+    engine.update("q1", "ab")
+    assert sorted(namespace.take()) == [("s1", "q1", False), ("s2", "q1", False)]
+    # Unchanged
+    engine.update("q1", "ab")
+    assert namespace.take() == []
+    engine.update("q3", "x")
+    assert namespace.take() == []
+
+
+def test_a_socket_watches_one_execution(engine, namespace):
+    broadcaster = PartialBroadcaster(namespace, engine)
+    engine.update("q1", "a")
+    engine.update("q2", "b")
+    broadcaster.subscribe("s1", "q1")
+    broadcaster.subscribe("s1", "q2")
+    namespace.take()
+
+    engine.update("q1", "aa")
+    engine.update("q2", "bb")
+    assert namespace.take() == [("s1", "q2", False)]
+
+
+def test_disconnect_stops_the_updates(engine, namespace):
+    broadcaster = PartialBroadcaster(namespace, engine)
+    broadcaster.subscribe("s1", "q1")
+    broadcaster.subscribe("s2", "q1")
+    engine.update("q1", "a")
+    namespace.take()
+
+    broadcaster.disconnect("s1")
+    engine.update("q1", "ab")
+    assert namespace.take() == [("s2", "q1", False)]
+
+    # The last watcher gone, the next one starts over
+    broadcaster.disconnect("s2")
+    broadcaster.disconnect("s2")
+    engine.update("q1", "abc")
+    assert namespace.take() == []
+    broadcaster.subscribe("s3", "q1")
+    assert namespace.take() == [("s3", "q1", True)]
+
+
+def test_refresh_resends_to_a_single_watcher(engine, namespace):
+    broadcaster = PartialBroadcaster(namespace, engine)
+    broadcaster.subscribe("s1", "q1")
+    broadcaster.subscribe("s2", "q1")
+    engine.update("q1", "a")
+    namespace.take()
+
+    broadcaster.refresh("s1", "q1")
+    assert namespace.take() == [("s1", "q1", True)]
+    # Not watching that execution
+    broadcaster.refresh("s1", "q2")
+    broadcaster.refresh("s3", "q1")
+    assert namespace.take() == []
+
+
+def converge(namespace):
+    # Rebuild the output as each client does: patching clients apply patches, the others DeepDiff deltas
+    documents = dict()
+    for room, output in namespace.messages:
+        base = None if output['refresh'] else documents.get(room, None)
+        if 'patch' in output:
+            documents[room] = JsonPatch.apply(base, output['patch'])
+        else:
+            documents[room] = Delta(output['delta']) + (base if base is not None else {})
+    return documents
+
+
+def test_patches_only_for_the_clients_announcing_them(engine, namespace):
+    broadcaster = PartialBroadcaster(namespace, engine)
+    broadcaster.accept("new", {"patch": True})
+    broadcaster.accept("old", {"other": True})
+    broadcaster.subscribe("new", "q1")
+    broadcaster.subscribe("old", "q1")
+
+    for message in ("a", "ab", "abc"):
+        engine.update("q1", message)
+
+    assert {room: 'patch' in output for room, output in namespace.messages} == {"new": True, "old": False}
+    assert {room: 'delta' in output for room, output in namespace.messages} == {"new": False, "old": True}
+    assert converge(namespace) == {"new": {"message": "abc"}, "old": {"message": "abc"}}
+
+
+def test_changing_format_refreshes_the_watcher(engine, namespace):
+    broadcaster = PartialBroadcaster(namespace, engine)
+    broadcaster.subscribe("s1", "q1")
+    engine.update("q1", "a")
+    namespace.take()
+
+    broadcaster.accept("s1", {"patch": True})
+    assert namespace.take() == [("s1", "q1", True)]
+    # Same format, nothing to do
+    broadcaster.accept("s1", {"patch": True})
+    assert namespace.take() == []
+
+    engine.update("q1", "ab")
+    assert 'patch' in namespace.messages[-1][1]
+    broadcaster.accept("s1", {"patch": False})
+    assert 'delta' in namespace.messages[-1][1] and namespace.messages[-1][1]['refresh']
+
+
+def test_disconnect_forgets_the_capabilities(engine, namespace):
+    broadcaster = PartialBroadcaster(namespace, engine)
+    broadcaster.accept("s1", {"patch": True})
+    broadcaster.disconnect("s1")
+    engine.update("q1", "a")
+
+    broadcaster.subscribe("s1", "q1")
+    assert 'delta' in namespace.messages[-1][1]